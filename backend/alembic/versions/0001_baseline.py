@@ -0,0 +1,88 @@
+"""Esquema inicial (el que creaba create_all en el arranque)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Las bases existentes ya tienen estas tablas porque main.py ejecutaba
+    # create_all al importarse: solo se crean las que falten
+    existing = set() if op.get_context().as_sql else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "programmers" not in existing:
+        op.create_table(
+            "programmers",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String()),
+            sa.Column("seniority", sa.String()),
+            sa.Column("coefficient", sa.DECIMAL(3, 2)),
+        )
+        op.create_index("ix_programmers_id", "programmers", ["id"])
+        op.create_index("ix_programmers_name", "programmers", ["name"])
+
+    if "tasks" not in existing:
+        op.create_table(
+            "tasks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String()),
+            sa.Column("description", sa.String()),
+            sa.Column("type", sa.String()),
+            sa.Column("base_time_hours", sa.DECIMAL(5, 2)),
+        )
+        op.create_index("ix_tasks_id", "tasks", ["id"])
+        op.create_index("ix_tasks_name", "tasks", ["name"])
+
+    if "projects" not in existing:
+        op.create_table(
+            "projects",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String()),
+            sa.Column("description", sa.String()),
+            sa.Column("start_date", sa.Date()),
+            sa.Column("end_date", sa.Date()),
+            sa.Column("responsible_id", sa.Integer(), sa.ForeignKey("programmers.id"), nullable=True),
+        )
+        op.create_index("ix_projects_id", "projects", ["id"])
+        op.create_index("ix_projects_name", "projects", ["name"])
+
+    if "stages" not in existing:
+        op.create_table(
+            "stages",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+            sa.Column("name", sa.String()),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("order_index", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_stages_id", "stages", ["id"])
+        op.create_index("ix_stages_name", "stages", ["name"])
+
+    if "project_tasks" not in existing:
+        op.create_table(
+            "project_tasks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("stage_id", sa.Integer(), sa.ForeignKey("stages.id"), nullable=False),
+            sa.Column("task_id", sa.Integer(), sa.ForeignKey("tasks.id")),
+            sa.Column("programmer_id", sa.Integer(), sa.ForeignKey("programmers.id"), nullable=True),
+            sa.Column("assigned_time_hours", sa.DECIMAL(5, 2), nullable=True),
+            sa.Column("status", sa.String()),
+        )
+        op.create_index("ix_project_tasks_id", "project_tasks", ["id"])
+
+
+def downgrade():
+    op.drop_table("project_tasks")
+    op.drop_table("stages")
+    op.drop_table("projects")
+    op.drop_table("tasks")
+    op.drop_table("programmers")
@@ -0,0 +1,35 @@
+"""Nombre de tarea único y tabla resource_versions
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # El importador del catálogo hace upsert por nombre (ON CONFLICT (name)).
+    # Si hay nombres duplicados de cargas anteriores hay que resolverlos antes.
+    op.drop_index("ix_tasks_name", table_name="tasks")
+    op.create_index("ix_tasks_name", "tasks", ["name"], unique=True)
+
+    # create_all pudo crearla ya en bases que arrancaron con la versión anterior
+    if op.get_context().as_sql or not sa.inspect(op.get_bind()).has_table("resource_versions"):
+        op.create_table(
+            "resource_versions",
+            sa.Column("key", sa.String(), primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table("resource_versions")
+    op.drop_index("ix_tasks_name", table_name="tasks")
+    op.create_index("ix_tasks_name", "tasks", ["name"])
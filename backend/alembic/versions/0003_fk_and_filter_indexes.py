@@ -0,0 +1,52 @@
+"""Índices de claves foráneas y de filtros por estado
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas). stage_id y programmer_id no llevan índice propio:
+# los compuestos empiezan por ellas y sirven también para las búsquedas y
+# joins solo por esa columna.
+INDEXES = [
+    ("ix_projects_responsible_id", "projects", ["responsible_id"]),
+    ("ix_stages_project_id", "stages", ["project_id"]),
+    ("ix_project_tasks_task_id", "project_tasks", ["task_id"]),
+    ("ix_project_tasks_status", "project_tasks", ["status"]),
+    ("ix_project_tasks_stage_id_status", "project_tasks", ["stage_id", "status"]),
+    ("ix_project_tasks_programmer_id_status", "project_tasks", ["programmer_id", "status"]),
+]
+
+
+def _is_postgresql():
+    # Del contexto y no de op.get_bind(): también funciona con --sql
+    return op.get_context().dialect.name == "postgresql"
+
+
+def upgrade():
+    if _is_postgresql():
+        # CONCURRENTLY no bloquea las escrituras mientras se construye el
+        # índice, pero no puede ejecutarse dentro de una transacción
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
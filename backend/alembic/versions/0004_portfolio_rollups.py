@@ -0,0 +1,78 @@
+"""Agregados de cartera para la analítica
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Una fila por (proyecto, programador, estado, tipo de tarea, responsable, fechas)
+PROJECT_ROLLUPS_SQL = """
+INSERT INTO project_rollups
+    (project_id, programmer_id, responsible_id, status, task_type, start_date, end_date, hours, task_count)
+SELECT s.project_id, pt.programmer_id, p.responsible_id, COALESCE(pt.status, 'pending'), t.type,
+       p.start_date, p.end_date, COALESCE(SUM(t.base_time_hours * COALESCE(pr.coefficient, 1)), 0), COUNT(*)
+FROM project_tasks pt
+JOIN stages s ON s.id = pt.stage_id
+JOIN projects p ON p.id = s.project_id
+JOIN tasks t ON t.id = pt.task_id
+LEFT JOIN programmers pr ON pr.id = pt.programmer_id
+GROUP BY s.project_id, pt.programmer_id, p.responsible_id, COALESCE(pt.status, 'pending'), t.type,
+         p.start_date, p.end_date
+"""
+
+
+def upgrade():
+    op.create_table(
+        "project_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("programmer_id", sa.Integer(), nullable=True),
+        sa.Column("responsible_id", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("task_type", sa.String(), nullable=True),
+        sa.Column("start_date", sa.Date(), nullable=True),
+        sa.Column("end_date", sa.Date(), nullable=True),
+        sa.Column("hours", sa.DECIMAL(14, 4), nullable=False),
+        sa.Column("task_count", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_project_rollups_project_id", "project_rollups", ["project_id"])
+    op.create_table(
+        "portfolio_rollups",
+        sa.Column("dimension", sa.String(), primary_key=True),
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("hours", sa.DECIMAL(16, 4), nullable=False),
+        sa.Column("task_count", sa.Integer(), nullable=False),
+    )
+
+    # Carga inicial con los proyectos existentes. SQL propio (copia congelada
+    # de app/rollups.py en esta revisión) para que la migración no cambie si
+    # cambia la aplicación y funcione también con --sql
+    op.execute(PROJECT_ROLLUPS_SQL)
+    month = "to_char({}, 'YYYY-MM')" if op.get_context().dialect.name == "postgresql" else "strftime('%Y-%m', {})"
+    for dimension, key in (
+        ("status", "status"),
+        ("task_type", "task_type"),
+        ("programmer", "CAST(programmer_id AS VARCHAR)"),
+        ("responsible", "CAST(responsible_id AS VARCHAR)"),
+        ("start_month", month.format("start_date")),
+        ("end_month", month.format("end_date")),
+    ):
+        op.execute(
+            "INSERT INTO portfolio_rollups (dimension, key, hours, task_count) "
+            f"SELECT '{dimension}', COALESCE({key}, 'none'), SUM(hours), SUM(task_count) "
+            f"FROM project_rollups GROUP BY COALESCE({key}, 'none')"
+        )
+
+
+def downgrade():
+    op.drop_table("portfolio_rollups")
+    op.drop_index("ix_project_rollups_project_id", table_name="project_rollups")
+    op.drop_table("project_rollups")
@@ -0,0 +1,69 @@
+"""Totales guardados en projects y stages
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+TABLES = ("projects", "stages")
+COUNT_COLUMNS = ("task_count", "pending_count", "in_progress_count", "completed_count")
+STATUS_COLUMNS = {"pending": "pending_count", "in_progress": "in_progress_count", "completed": "completed_count"}
+HOURS = "t.base_time_hours * COALESCE(pr.coefficient, 1)"
+STATUS = "COALESCE(pt.status, 'pending')"
+
+
+def _subquery(scope, aggregate, condition=None):
+    # Agregado de las tareas de una etapa o de un proyecto (subconsulta correlacionada)
+    where = scope if condition is None else f"{scope} AND {condition}"
+    return (
+        f"SELECT {aggregate} FROM project_tasks pt "
+        "JOIN stages s ON s.id = pt.stage_id "
+        "JOIN tasks t ON t.id = pt.task_id "
+        "LEFT JOIN programmers pr ON pr.id = pt.programmer_id "
+        f"WHERE {where}"
+    )
+
+
+def _rounded(expression, dialect):
+    # Redondeo a céntimos con empate al par, como Decimal.quantize en
+    # app/totals.py (ROUND de SQL redondea los empates hacia arriba)
+    cents = f"({expression}) * 100"
+    whole = f"trunc({cents})" if dialect == "postgresql" else f"CAST({cents} AS INTEGER)"
+    return (
+        f"CASE WHEN {cents} - {whole} = 0.5 AND {whole} % 2 = 0 "
+        f"THEN {whole} / 100.0 ELSE ROUND({expression}, 2) END"
+    )
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("estimated_hours", sa.DECIMAL(12, 2), nullable=False, server_default="0"))
+            for column in COUNT_COLUMNS:
+                batch.add_column(sa.Column(column, sa.Integer(), nullable=False, server_default="0"))
+
+    # Carga inicial con los datos existentes. SQL propio (copia congelada de
+    # app/totals.py en esta revisión): no depende de la aplicación y sirve con --sql
+    hours = _rounded(f"COALESCE(SUM({HOURS}), 0)", op.get_context().dialect.name)
+    for table, scope in (("stages", "pt.stage_id = stages.id"), ("projects", "s.project_id = projects.id")):
+        assignments = [f"estimated_hours = ({_subquery(scope, hours)})",
+                       f"task_count = ({_subquery(scope, 'COUNT(*)')})"]
+        for status, column in STATUS_COLUMNS.items():
+            assignments.append(f"{column} = ({_subquery(scope, 'COUNT(*)', STATUS + ' = ' + repr(status))})")
+        op.execute(f"UPDATE {table} SET " + ", ".join(assignments))
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            for column in reversed(COUNT_COLUMNS):
+                batch.drop_column(column)
+            batch.drop_column("estimated_hours")
@@ -0,0 +1,44 @@
+"""Índices de búsqueda del catálogo de tareas (solo PostgreSQL)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# Las expresiones tienen que coincidir con las de app/task_search.py
+# (DOCUMENT_SQL y lower(name)) para que el planificador use los índices. Son
+# índices de expresión: autogenerate no los compara con los modelos. En SQLite
+# la búsqueda usa el índice en memoria y no se crea nada.
+# Cada entrada: (nombre, definición tras USING gin)
+INDEXES = [
+    (
+        "ix_tasks_search_document",
+        "((setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')))"
+    ),
+    ("ix_tasks_name_trgm", "(lower(name) gin_trgm_ops)"),
+]
+
+
+def upgrade():
+    if op.get_context().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, expression in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON tasks USING gin {expression}")
+
+
+def downgrade():
+    if op.get_context().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,46 @@
+"""Índices para filtrar y ordenar los listados de proyectos y tareas
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas): rangos de fechas y orden de /api/projects/ y
+# filtro y orden por tipo de /api/tasks/
+INDEXES = [
+    ("ix_projects_start_date", "projects", ["start_date"]),
+    ("ix_projects_end_date", "projects", ["end_date"]),
+    ("ix_tasks_type", "tasks", ["type"]),
+]
+
+
+def _is_postgresql():
+    return op.get_context().dialect.name == "postgresql"
+
+
+def upgrade():
+    if _is_postgresql():
+        # Igual que 0003: CONCURRENTLY, fuera de la transacción
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,51 @@
+"""Diferencias pendientes de portfolio_rollups
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+# Al bajar se pliegan las diferencias pendientes antes de borrar la tabla
+FOLD_SQL = [
+    """
+    UPDATE portfolio_rollups SET
+        hours = hours + (SELECT SUM(d.hours) FROM portfolio_rollup_deltas d
+                         WHERE d.dimension = portfolio_rollups.dimension AND d.key = portfolio_rollups.key),
+        task_count = task_count + (SELECT SUM(d.task_count) FROM portfolio_rollup_deltas d
+                                   WHERE d.dimension = portfolio_rollups.dimension AND d.key = portfolio_rollups.key)
+    WHERE EXISTS (SELECT 1 FROM portfolio_rollup_deltas d
+                  WHERE d.dimension = portfolio_rollups.dimension AND d.key = portfolio_rollups.key)
+    """,
+    """
+    INSERT INTO portfolio_rollups (dimension, key, hours, task_count)
+    SELECT d.dimension, d.key, SUM(d.hours), SUM(d.task_count) FROM portfolio_rollup_deltas d
+    WHERE NOT EXISTS (SELECT 1 FROM portfolio_rollups r WHERE r.dimension = d.dimension AND r.key = d.key)
+    GROUP BY d.dimension, d.key
+    """,
+    "DELETE FROM portfolio_rollups WHERE task_count = 0",
+]
+
+
+def upgrade():
+    op.create_table(
+        "portfolio_rollup_deltas",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("dimension", sa.String(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("hours", sa.DECIMAL(16, 4), nullable=False),
+        sa.Column("task_count", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    for statement in FOLD_SQL:
+        op.execute(statement)
+    op.drop_table("portfolio_rollup_deltas")
@@ -0,0 +1,38 @@
+"""Índice de project_rollups por programador
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+# Un cambio de coeficiente refresca solo las filas de ese programador
+# (app/rollups.py refresh_programmer)
+NAME, TABLE, COLUMNS = "ix_project_rollups_programmer_id", "project_rollups", ["programmer_id"]
+
+
+def _is_postgresql():
+    return op.get_context().dialect.name == "postgresql"
+
+
+def upgrade():
+    if _is_postgresql():
+        # Igual que 0003: CONCURRENTLY, fuera de la transacción
+        with op.get_context().autocommit_block():
+            op.create_index(NAME, TABLE, COLUMNS, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        op.create_index(NAME, TABLE, COLUMNS, if_not_exists=True)
+
+
+def downgrade():
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.drop_index(NAME, table_name=TABLE, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(NAME, table_name=TABLE, if_exists=True)
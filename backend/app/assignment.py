@@ -0,0 +1,332 @@
+# Asignación automática de tareas sin programador. Minimiza las horas
+# ponderadas (base_time_hours x coeficiente) respetando:
+#   - reglas de seniority por tipo de tarea (ELIGIBLE_SENIORITIES; las de
+#     gestión solo a PM/lead y el PM no recibe tareas de desarrollo)
+#   - la capacidad libre de cada programador en la ventana de los proyectos
+#     (CAPACITY_HOURS_PER_WEEK menos su carga actual, de app/capacity.py)
+#
+# 1. Plan: flujo de coste mínimo de las horas base de cada grupo de tareas
+#    (mismos candidatos) a los programadores, con su capacidad libre. Es la
+#    solución fraccionaria y decide, por ejemplo, cuánto de los lead va a
+#    gestión y cuánto a desarrollo.
+# 2. Voraz con heap: primero las tareas que caben en la cuota de su plan y,
+#    dentro de eso, las más grandes. Al sacar una tarea se recalcula su mejor
+#    opción; si bajó de nivel vuelve al heap (evaluación perezosa).
+# 3. Búsqueda local: mover una tarea a un programador más barato con hueco y,
+#    si no cabe, intercambiarla con una tarea más pequeña suya. Se repite
+#    hasta que ninguna mejora o se agota MAX_PASSES.
+#
+# Solo propone: la ruta devuelve el diff y lo aplica con apply=true
+# (crud.assign_project_tasks, solo a filas que sigan sin programador).
+import heapq
+from bisect import bisect_left, insort
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import capacity, models
+
+# Tipo de tarea -> seniorities que pueden hacerla; el resto de tipos usa "*"
+ELIGIBLE_SENIORITIES = {
+    "management": {"PM", "lead"},
+    "*": {"Junior", "Pleno", "Senior", "lead"},
+}
+DEFAULT_HORIZON_WEEKS = 4
+MAX_PASSES = 5
+EPSILON = 1e-9
+INFINITY = float("inf")
+
+
+def _to_hours(value):
+    return Decimal(repr(round(float(value), 2))).quantize(Decimal("0.01"))
+
+
+def eligible(task_type: Optional[str], seniority: Optional[str]):
+    return seniority in ELIGIBLE_SENIORITIES.get(task_type, ELIGIBLE_SENIORITIES["*"])
+
+
+class AssignmentProblem:
+    def __init__(self, tasks, programmers, budgets):
+        # tasks: (project_task_id, project_id, stage_id, task_name, task_type, base_hours)
+        # programmers: (id, name, seniority, coefficient); budgets: {id: horas libres}
+        self.tasks = tasks
+        self.programmers = {p[0]: p for p in programmers}
+        self.coefficients = {p[0]: float(p[3] if p[3] is not None else 1) for p in programmers}
+        self.remaining = dict(budgets)
+        # Candidatos de cada tarea ordenados por coste
+        self.options = [
+            sorted(
+                (base_hours * self.coefficients[pid], pid)
+                for pid, (_, _, seniority, _) in self.programmers.items()
+                if eligible(task_type, seniority)
+            )
+            for _, _, _, _, task_type, base_hours in tasks
+        ]
+        # Grupo (candidatos) de cada tarea asignable, para el plan
+        self.group = {}
+        self.assigned = {}
+        # Por programador: (horas base, índice de tarea) ordenadas, para los intercambios
+        self.by_programmer = {pid: [] for pid in self.programmers}
+
+    def cost(self, index: int, programmer_id: int):
+        return self.tasks[index][5] * self.coefficients[programmer_id]
+
+    def _plan(self):
+        # Caminos más cortos sucesivos (Bellman-Ford) sobre
+        # fuente -> grupo -> programador -> sumidero; devuelve
+        # {(grupo, programador): horas base}. Hay pocos nodos: grupos + programadores
+        groups = {}
+        for index, options in enumerate(self.options):
+            if options:
+                self.group[index] = tuple(sorted(pid for _, pid in options))
+                groups[self.group[index]] = groups.get(self.group[index], 0.0) + self.tasks[index][5]
+        keys = list(groups)
+        pids = list(self.programmers)
+        node = {pid: len(keys) + 1 + i for i, pid in enumerate(pids)}
+        sink = len(keys) + len(pids) + 1
+        graph = [[] for _ in range(sink + 1)]
+
+        def add(u, v, capacity, cost):
+            graph[u].append([v, capacity, cost, len(graph[v])])
+            graph[v].append([u, 0.0, -cost, len(graph[u]) - 1])
+
+        for g, key in enumerate(keys, start=1):
+            add(0, g, groups[key], 0.0)
+            for pid in key:
+                add(g, node[pid], INFINITY, self.coefficients[pid])
+        for pid in pids:
+            coefficient = self.coefficients[pid]
+            add(node[pid], sink, max(self.remaining[pid], 0) / coefficient if coefficient > 0 else INFINITY, 0.0)
+
+        while True:
+            distance = [INFINITY] * (sink + 1)
+            distance[0] = 0.0
+            previous = [None] * (sink + 1)
+            for _ in range(sink + 1):
+                changed = False
+                for u, edges in enumerate(graph):
+                    if distance[u] == INFINITY:
+                        continue
+                    for k, (v, capacity, cost, _) in enumerate(edges):
+                        if capacity > EPSILON and distance[u] + cost < distance[v] - EPSILON:
+                            distance[v] = distance[u] + cost
+                            previous[v] = (u, k)
+                            changed = True
+                if not changed:
+                    break
+            if distance[sink] == INFINITY:
+                break
+            flow, v = INFINITY, sink
+            while v:
+                u, k = previous[v]
+                flow = min(flow, graph[u][k][1])
+                v = u
+            v = sink
+            while v:
+                u, k = previous[v]
+                edge = graph[u][k]
+                edge[1] -= flow
+                graph[v][edge[3]][1] += flow
+                v = u
+
+        quota = {}
+        for g, key in enumerate(keys, start=1):
+            for v, _, _, reverse in graph[g]:
+                if v != 0 and graph[v][reverse][1] > EPSILON:
+                    quota[(key, pids[v - len(keys) - 1])] = graph[v][reverse][1]
+        return quota
+
+    def _best(self, index: int, quota):
+        # (nivel, programador): 0 cabe en la cuota del plan, 1 cuota parcial,
+        # 2 fuera del plan; dentro de cada nivel, el más barato con hueco
+        hours = self.tasks[index][5]
+        best = None
+        for cost, pid in self.options[index]:
+            if self.remaining[pid] + EPSILON < cost:
+                continue
+            left = quota.get((self.group[index], pid), 0.0)
+            level = 0 if left + EPSILON >= hours else 1 if left > EPSILON else 2
+            if best is None or level < best[0]:
+                best = (level, pid)
+                if level == 0:
+                    break
+        return best
+
+    def _assign(self, index: int, programmer_id: int):
+        self.assigned[index] = programmer_id
+        self.remaining[programmer_id] -= self.cost(index, programmer_id)
+        insort(self.by_programmer[programmer_id], (self.tasks[index][5], index))
+
+    def _unassign(self, index: int):
+        programmer_id = self.assigned.pop(index)
+        self.remaining[programmer_id] += self.cost(index, programmer_id)
+        entries = self.by_programmer[programmer_id]
+        del entries[bisect_left(entries, (self.tasks[index][5], index))]
+        return programmer_id
+
+    def greedy(self):
+        quota = self._plan()
+        heap = []
+        for index in self.group:
+            best = self._best(index, quota)
+            if best is not None:
+                heap.append((best[0], -self.tasks[index][5], index))
+        heapq.heapify(heap)
+        while heap:
+            level, size, index = heapq.heappop(heap)
+            best = self._best(index, quota)
+            if best is None:
+                continue
+            if best[0] != level:
+                heapq.heappush(heap, (best[0], size, index))
+                continue
+            self._assign(index, best[1])
+            key = (self.group[index], best[1])
+            if key in quota:
+                quota[key] -= self.tasks[index][5]
+
+    def _relocate(self, index: int):
+        current = self.assigned[index]
+        current_cost = self.cost(index, current)
+        for cost, pid in self.options[index]:
+            if cost >= current_cost - EPSILON:
+                return False
+            if self.remaining[pid] + EPSILON >= cost:
+                self._unassign(index)
+                self._assign(index, pid)
+                return True
+        return False
+
+    def _swap(self, index: int):
+        # Cambia la tarea por otra más pequeña de un programador más barato:
+        # mejora (h_t - h_u) x (c_p - c_q) y libera horas en p
+        current = self.assigned[index]
+        hours = self.tasks[index][5]
+        for cost, pid in self.options[index]:
+            if cost >= self.cost(index, current) - EPSILON:
+                return False
+            # u tiene que caber en q junto con t: h_u >= h_t - libre_q / c_q
+            # (con coeficiente 0 cualquier u cabe, igual que en _plan)
+            coefficient = self.coefficients[pid]
+            threshold = hours - self.remaining[pid] / coefficient if coefficient > 0 else -INFINITY
+            entries = self.by_programmer[pid]
+            position = bisect_left(entries, (threshold - EPSILON, -1))
+            while position < len(entries) and entries[position][0] < hours - EPSILON:
+                other = entries[position][1]
+                fits_current = self.remaining[current] + self.cost(index, current) + EPSILON >= self.cost(other, current)
+                if eligible(self.tasks[other][4], self.programmers[current][2]) and fits_current:
+                    self._unassign(index)
+                    self._unassign(other)
+                    self._assign(index, pid)
+                    self._assign(other, current)
+                    return True
+                position += 1
+        return False
+
+    def improve(self):
+        moves = 0
+        for _ in range(MAX_PASSES):
+            improved = 0
+            for index in sorted(self.assigned, key=lambda i: -self.tasks[i][5]):
+                if index in self.assigned and (self._relocate(index) or self._swap(index)):
+                    improved += 1
+            moves += improved
+            if not improved:
+                break
+        return moves
+
+    def total_cost(self):
+        return sum(self.cost(index, pid) for index, pid in self.assigned.items())
+
+    def solve(self):
+        self.greedy()
+        greedy_cost = self.total_cost()
+        moves = self.improve()
+        return greedy_cost, moves
+
+
+def _tasks_statement(project_ids=None):
+    stmt = select(
+        models.ProjectTask.id,
+        models.Stage.project_id,
+        models.ProjectTask.stage_id,
+        models.Task.name,
+        models.Task.type,
+        models.Task.base_time_hours
+    ).join(
+        models.Stage, models.Stage.id == models.ProjectTask.stage_id
+    ).join(
+        models.Task, models.Task.id == models.ProjectTask.task_id
+    ).where(
+        models.ProjectTask.programmer_id.is_(None),
+        func.coalesce(models.ProjectTask.status, "pending") != "completed"
+    ).order_by(models.ProjectTask.id)
+    if project_ids is not None:
+        stmt = stmt.where(models.Stage.project_id.in_(project_ids))
+    return stmt
+
+
+def _horizon(db: Session, project_ids, as_of: date):
+    # Ventana conjunta de los proyectos desde as_of; sin fechas, DEFAULT_HORIZON_WEEKS
+    stmt = select(func.min(models.Project.start_date), func.max(models.Project.end_date))
+    if project_ids is not None:
+        stmt = stmt.where(models.Project.id.in_(project_ids))
+    start, end = db.execute(stmt).one()
+    start = max(start or as_of, as_of)
+    if end is None or end < start:
+        end = start + timedelta(weeks=DEFAULT_HORIZON_WEEKS) - timedelta(days=1)
+    return start, end
+
+
+def propose(db: Session, project_ids=None, programmer_ids=None, as_of: Optional[date] = None):
+    as_of = as_of or date.today()
+    tasks = [
+        (row.id, row.project_id, row.stage_id, row.name, row.type, float(row.base_time_hours or 0))
+        for row in db.execute(_tasks_statement(project_ids))
+    ]
+    stmt = select(models.Programmer.id, models.Programmer.name, models.Programmer.seniority, models.Programmer.coefficient)
+    if programmer_ids is not None:
+        stmt = stmt.where(models.Programmer.id.in_(programmer_ids))
+    programmers = db.execute(stmt.order_by(models.Programmer.id)).all()
+
+    start, end = _horizon(db, project_ids, as_of)
+    index = capacity.get_index(db)
+    first, last = index.week_index(start), index.week_index(end)
+    budgets = {p.id: index.free_hours(p.id, first, last) if p.id in index.names else 0.0 for p in programmers}
+
+    problem = AssignmentProblem(tasks, programmers, budgets)
+    greedy_cost, moves = problem.solve()
+
+    assignments = []
+    for i, programmer_id in sorted(problem.assigned.items(), key=lambda item: tasks[item[0]][0]):
+        project_task_id, project_id, stage_id, name, task_type, base_hours = tasks[i]
+        assignments.append({
+            'project_task_id': project_task_id,
+            'project_id': project_id,
+            'stage_id': stage_id,
+            'task_name': name,
+            'task_type': task_type,
+            'base_hours': _to_hours(base_hours),
+            'programmer_id': programmer_id,
+            'programmer_name': problem.programmers[programmer_id][1],
+            'weighted_hours': _to_hours(problem.cost(i, programmer_id))
+        })
+    unassigned = []
+    for i, (project_task_id, project_id, stage_id, name, task_type, base_hours) in enumerate(tasks):
+        if i in problem.assigned:
+            continue
+        reason = "no eligible programmer" if not problem.options[i] else "no capacity left"
+        unassigned.append({'project_task_id': project_task_id, 'project_id': project_id, 'task_name': name, 'reason': reason})
+    return {
+        'window_start': start,
+        'window_end': end,
+        'assignments': assignments,
+        'unassigned': unassigned,
+        'total_weighted_hours': _to_hours(problem.total_cost()),
+        'greedy_weighted_hours': _to_hours(greedy_cost),
+        'local_search_moves': moves,
+        'applied': 0
+    }
@@ -0,0 +1,61 @@
+# Versiones asíncronas (AsyncSession) de las lecturas de crud.py. Reutilizan
+# las mismas sentencias y el mismo post-procesado, solo cambia la ejecución.
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models, schemas, versioning
+
+
+async def _keyset_page(db: AsyncSession, stmt, sort_column, id_column, cursor: Optional[str], limit: int,
+                       descending: bool = False):
+    stmt = crud._keyset_order(stmt, sort_column, id_column, cursor, descending).limit(limit + 1)
+    rows = (await db.scalars(stmt)).all()
+    return crud._next_page(rows, limit, sort_column.key)
+
+async def get_versions(db: AsyncSession, keys):
+    return versioning.collect_versions((await db.execute(versioning.versions_statement(keys))).all(), keys)
+
+# ========== PROGRAMMERS ==========
+async def get_programmer_workloads(db: AsyncSession, skip: int = 0, limit: int = 100,
+                                   programmer_id: Optional[int] = None, cursor: Optional[str] = None):
+    stmt = crud._programmer_workloads_statement(skip, limit, programmer_id, cursor)
+    return crud._fold_programmer_workloads(await db.execute(stmt))
+
+async def get_programmers(db: AsyncSession, skip: int = 0, limit: int = 100):
+    return await get_programmer_workloads(db, skip=skip, limit=limit)
+
+async def get_programmers_page(db: AsyncSession, cursor: Optional[str] = None, limit: int = 100):
+    rows = await get_programmer_workloads(db, limit=limit + 1, cursor=cursor)
+    return crud._next_page(rows, limit, 'name')
+
+# ========== TASKS ==========
+async def get_tasks(db: AsyncSession, skip: int = 0, limit: int = 100,
+                    filters: Optional[schemas.TaskFilters] = None, sort: str = "name"):
+    return (await db.scalars(crud._tasks_statement(skip, limit, filters, sort))).all()
+
+async def get_tasks_page(db: AsyncSession, cursor: Optional[str] = None, limit: int = 100,
+                         filters: Optional[schemas.TaskFilters] = None, sort: str = "name"):
+    sort_column, descending = crud._sort_column(crud.TASK_SORT_KEYS, sort)
+    stmt = select(models.Task).where(*crud._task_conditions(filters))
+    return await _keyset_page(db, stmt, sort_column, models.Task.id, cursor, limit, descending)
+
+# ========== PROJECTS ==========
+async def get_projects(db: AsyncSession, skip: int = 0, limit: int = 100,
+                       filters: Optional[schemas.ProjectFilters] = None, sort: str = "name"):
+    return (await db.scalars(crud._projects_list_statement(skip, limit, filters, sort))).all()
+
+async def get_projects_page(db: AsyncSession, cursor: Optional[str] = None, limit: int = 100,
+                            filters: Optional[schemas.ProjectFilters] = None, sort: str = "name"):
+    sort_column, descending = crud._sort_column(crud.PROJECT_SORT_KEYS, sort)
+    return await _keyset_page(db, crud._projects_statement(filters), sort_column, models.Project.id, cursor, limit, descending)
+
+async def get_task_hours(db: AsyncSession, project_id: int):
+    return crud._fold_task_hours(await db.execute(crud._task_hours_statement(project_id)))
+
+async def get_project_with_details(db: AsyncSession, project_id: int, loading: str = "selectin"):
+    project = (await db.scalars(crud._project_detail_statement(project_id, loading))).unique().first()
+    if project:
+        crud._apply_task_hours(project, await get_task_hours(db, project_id))
+    return project
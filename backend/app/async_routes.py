@@ -0,0 +1,82 @@
+# Endpoints de lectura sobre AsyncSession. main.py registra este router antes
+# que las rutas síncronas cuando DB_ASYNC está activo, de modo que estas
+# versiones atienden las mismas URLs sin ocupar un hilo del threadpool.
+import logging
+from typing import List, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import async_crud, schemas, versioning
+from .cache import project_cache, serialize_project_detail, json_response
+from .database import get_async_db
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/api/programmers/", response_model=Union[schemas.Page[schemas.Programmer], List[schemas.Programmer]], tags=["Programmers"])
+async def read_programmers(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    cached = versioning.not_modified(request, response, await async_crud.get_versions(
+        db, [versioning.PROGRAMMERS, versioning.PROJECTS]
+    ))
+    if cached is not None:
+        return cached
+    if cursor is not None:
+        try:
+            return await async_crud.get_programmers_page(db, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return await async_crud.get_programmers(db, skip=skip, limit=limit)
+
+
+@router.get("/api/tasks/", response_model=Union[schemas.Page[schemas.Task], List[schemas.Task]], tags=["Tasks"])
+async def read_tasks(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                     filters: schemas.TaskFilters = Depends(), sort: str = "name", db: AsyncSession = Depends(get_async_db)):
+    cached = versioning.not_modified(request, response, await async_crud.get_versions(db, [versioning.TASKS]))
+    if cached is not None:
+        return cached
+    try:
+        if cursor is not None:
+            return await async_crud.get_tasks_page(db, cursor=cursor, limit=limit, filters=filters, sort=sort)
+        return await async_crud.get_tasks(db, skip=skip, limit=limit, filters=filters, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/api/projects/", response_model=Union[schemas.Page[schemas.Project], List[schemas.Project]], tags=["Projects"])
+async def read_projects(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                        filters: schemas.ProjectFilters = Depends(), sort: str = "name", db: AsyncSession = Depends(get_async_db)):
+    cached = versioning.not_modified(request, response, await async_crud.get_versions(
+        db, [versioning.PROJECTS, versioning.PROGRAMMERS]
+    ))
+    if cached is not None:
+        return cached
+    try:
+        if cursor is not None:
+            return await async_crud.get_projects_page(db, cursor=cursor, limit=limit, filters=filters, sort=sort)
+        return await async_crud.get_projects(db, skip=skip, limit=limit, filters=filters, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/api/projects/{project_id}", response_model=schemas.ProjectDetail, tags=["Projects"])
+async def read_project(project_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    key = versioning.project_key(project_id)
+    versions = await async_crud.get_versions(db, [key])
+    cached = versioning.not_modified(request, response, versions)
+    if cached is not None:
+        return cached
+    if project_cache is not None:
+        payload = project_cache.get(project_id, versions[key])
+        if payload is not None:
+            return json_response(payload, response.headers["ETag"])
+    db_project = await async_crud.get_project_with_details(db, project_id=project_id)
+    if db_project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project_cache is not None:
+        payload = serialize_project_detail(db_project)
+        project_cache.set(project_id, versions[key], payload)
+        return json_response(payload, response.headers["ETag"])
+    return db_project
@@ -0,0 +1,162 @@
+# Caché del ProjectDetail ya serializado (JSON), por id de proyecto.
+#
+# Cada entrada guarda la versión "project:<id>" de resource_versions con la que
+# se construyó. Las escrituras que cambian el detalle de un proyecto (etapas,
+# tareas del proyecto, coeficiente o datos del programador asignado, horas base
+# de una tarea usada) incrementan esa versión, así que una entrada con versión
+# distinta se descarta en la siguiente lectura. Al no depender de avisos entre
+# procesos, el mismo esquema vale para un backend compartido (Redis).
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Response
+
+from app import config, schemas
+
+
+class LRUCache:
+    # LRU en memoria del proceso, acotado por número de entradas y con TTL opcional
+    name = "memory"
+
+    def __init__(self, maxsize: int = 256, ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+class RedisCache:
+    # Backend compartido entre workers; la expulsión la hace Redis (maxmemory-policy)
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float = 0, prefix: str = "project-detail:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "PROJECT_CACHE_BACKEND=redis requiere el paquete redis (pip install -r requirements.txt)"
+            ) from e
+
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self._client.get(self.prefix + str(key))
+
+    def set(self, key, value):
+        self._client.set(self.prefix + str(key), value, ex=int(self.ttl) if self.ttl > 0 else None)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + str(key))
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+    def stats(self):
+        return {'ttl': self.ttl}
+
+
+class ProjectDetailCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Solo protege los contadores; el backend tiene su propia sincronización
+        self._lock = threading.Lock()
+
+    def get(self, project_id: int, version: int) -> Optional[bytes]:
+        raw = self.backend.get(project_id)
+        if raw is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        cached_version, _, payload = raw.partition(b":")
+        if int(cached_version) != version:
+            self.backend.delete(project_id)
+            with self._lock:
+                self.invalidations += 1
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return payload
+
+    def set(self, project_id: int, version: int, payload: bytes):
+        self.backend.set(project_id, str(version).encode() + b":" + payload)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            counters = {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations}
+        return {'backend': self.backend.name, **counters, **self.backend.stats()}
+
+
+def serialize_project_detail(project) -> bytes:
+    return schemas.ProjectDetail.model_validate(project).model_dump_json().encode()
+
+
+def json_response(payload: bytes, etag: str):
+    # El payload ya está validado y serializado: se devuelve tal cual
+    return Response(content=payload, media_type="application/json", headers={"ETag": etag})
+
+
+def build_project_cache():
+    if config.PROJECT_CACHE_BACKEND == "none":
+        return None
+    if config.PROJECT_CACHE_BACKEND == "redis":
+        backend = RedisCache(config.REDIS_URL, ttl=config.PROJECT_CACHE_TTL)
+    else:
+        backend = LRUCache(maxsize=config.PROJECT_CACHE_SIZE, ttl=config.PROJECT_CACHE_TTL)
+    return ProjectDetailCache(backend)
+
+
+project_cache = build_project_cache()
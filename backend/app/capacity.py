@@ -0,0 +1,293 @@
+# Motor de capacidad: reparte las horas asignadas a cada programador (tareas no
+# completadas, base_time_hours x coeficiente) entre las semanas de la ventana
+# start_date/end_date de su proyecto y detecta semanas por encima de
+# CAPACITY_HOURS_PER_WEEK.
+#
+# El índice se construye una vez por versión de los datos (una consulta
+# agregada por programador y proyecto) y queda en memoria:
+#   load          matriz programadores x semanas (arrays de diferencias +
+#                 suma acumulada, sin recorrer semana a semana)
+#   _range_max    tabla dispersa por potencias de dos: pico de carga de todos
+#                 los programadores en un rango de semanas en O(1) por fila
+#   _overloaded   semana -> programadores sobrecargados, para el informe
+#   intervals     por programador, ventanas ordenadas por semana de inicio
+# Las tareas de proyectos sin fechas no se pueden repartir y se devuelven
+# como horas sin planificar.
+import threading
+from bisect import bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import config, models, versioning
+
+# Cualquier cambio de tareas, fechas, coeficientes u horas base de un proyecto
+# cambia ANALYTICS (derivada de las versiones de los proyectos); PROGRAMMERS cubre altas, bajas y nombres
+VERSION_KEYS = [versioning.ANALYTICS, versioning.PROGRAMMERS]
+
+
+def _to_hours(value):
+    return Decimal(repr(round(float(value), 2))).quantize(Decimal("0.01"))
+
+
+def week_start(day: date):
+    return day - timedelta(days=day.weekday())
+
+
+class CapacityIndex:
+    def __init__(self, programmers, rows, capacity: float):
+        # programmers: (id, name, coefficient)
+        # rows: (programmer_id, project_id, start_date, end_date, hours)
+        self.capacity = capacity
+        self.programmer_ids = [p[0] for p in programmers]
+        self.names = {p[0]: p[1] for p in programmers}
+        self.coefficients = {p[0]: float(p[2] if p[2] is not None else 1) for p in programmers}
+        self._position = {pid: i for i, pid in enumerate(self.programmer_ids)}
+        self.unscheduled = {pid: 0.0 for pid in self.programmer_ids}
+
+        scheduled = [r for r in rows if r[2] is not None and r[0] in self._position]
+        for r in rows:
+            if r[2] is None and r[0] in self._position:
+                self.unscheduled[r[0]] += float(r[4] or 0)
+
+        if scheduled:
+            self.origin = week_start(min(r[2] for r in scheduled))
+            weeks = max(self.week_index(r[3] or r[2]) for r in scheduled) + 1
+        else:
+            self.origin = week_start(date.today())
+            weeks = 1
+        self.weeks = weeks
+
+        # Reparto uniforme de las horas entre las semanas de la ventana
+        diff = np.zeros((len(self.programmer_ids), weeks + 1))
+        self.intervals = {pid: [] for pid in self.programmer_ids}
+        for programmer_id, project_id, start, end, hours in scheduled:
+            first = self.week_index(start)
+            last = max(first, self.week_index(end or start))
+            rate = float(hours or 0) / (last - first + 1)
+            row = self._position[programmer_id]
+            diff[row, first] += rate
+            diff[row, last + 1] -= rate
+            self.intervals[programmer_id].append((first, last, project_id, rate))
+        for intervals in self.intervals.values():
+            intervals.sort()
+        self._starts = {pid: [i[0] for i in intervals] for pid, intervals in self.intervals.items()}
+        self.load = np.cumsum(diff, axis=1)[:, :weeks]
+
+        self._range_max = [self.load]
+        span = 1
+        while span * 2 <= weeks:
+            previous = self._range_max[-1]
+            self._range_max.append(np.maximum(previous[:, :-span], previous[:, span:]))
+            span *= 2
+
+        self._overloaded = {}
+        rows_over, weeks_over = np.nonzero(self.load > capacity + 1e-9)
+        for row, week in zip(rows_over.tolist(), weeks_over.tolist()):
+            self._overloaded.setdefault(week, []).append(row)
+
+    def week_index(self, day: date):
+        return (week_start(day) - self.origin).days // 7
+
+    def week_date(self, index: int):
+        return self.origin + timedelta(weeks=index)
+
+    def _clip(self, first: int, last: int):
+        return max(first, 0), min(last, self.weeks - 1)
+
+    def peak_loads(self, first: int, last: int):
+        # Pico de carga de cada programador entre dos semanas (tabla dispersa)
+        first, last = self._clip(first, last)
+        if first > last:
+            return np.zeros(len(self.programmer_ids))
+        level = (last - first + 1).bit_length() - 1
+        table = self._range_max[level]
+        return np.maximum(table[:, first], table[:, last - (1 << level) + 1])
+
+    def projects_at(self, programmer_id: int, week: int):
+        # Ventanas que empiezan antes de la semana y aún no han terminado
+        intervals = self.intervals[programmer_id]
+        return [
+            (project_id, rate)
+            for first, last, project_id, rate in intervals[:bisect_right(self._starts[programmer_id], week)]
+            if last >= week
+        ]
+
+    def programmer_weeks(self, programmer_id: int, first: Optional[int] = None, last: Optional[int] = None):
+        row = self._position[programmer_id]
+        if first is None or last is None:
+            busy = np.flatnonzero(self.load[row] > 1e-9)
+            if not len(busy):
+                return []
+            first = busy[0] if first is None else first
+            last = busy[-1] if last is None else last
+        weeks = []
+        for week in range(int(first), int(last) + 1):
+            hours = float(self.load[row, week]) if 0 <= week < self.weeks else 0.0
+            weeks.append({
+                'week_start': self.week_date(week),
+                'hours': _to_hours(hours),
+                'capacity': _to_hours(self.capacity),
+                'overloaded': hours > self.capacity + 1e-9,
+                'projects': [
+                    {'project_id': project_id, 'hours': _to_hours(rate)}
+                    for project_id, rate in (self.projects_at(programmer_id, week) if 0 <= week < self.weeks else [])
+                ]
+            })
+        return weeks
+
+    def free_hours(self, programmer_id: int, first: int, last: int):
+        # Horas libres (capacidad - carga, sin negativos) entre dos semanas;
+        # fuera del rango del índice la semana está libre
+        weeks = last - first + 1
+        if weeks <= 0:
+            return 0.0
+        row = self._position[programmer_id]
+        lo, hi = self._clip(first, last)
+        busy = np.minimum(self.load[row, lo:hi + 1], self.capacity).sum() if lo <= hi else 0.0
+        return float(self.capacity * weeks - busy)
+
+    def overloaded_in(self, week: int):
+        return [self.programmer_ids[row] for row in self._overloaded.get(week, [])]
+
+    def overload_weeks(self, first: int, last: int):
+        first, last = self._clip(first, last)
+        return [week for week in sorted(self._overloaded) if first <= week <= last]
+
+    def available(self, base_hours: float, first: int, last: int):
+        # Programadores que pueden absorber la tarea (sus horas con su
+        # coeficiente, repartidas en la ventana) sin pasar de la capacidad
+        weeks = max(last - first + 1, 1)
+        peaks = self.peak_loads(first, last)
+        extra = np.array([base_hours * self.coefficients[pid] for pid in self.programmer_ids]) / weeks
+        fits = np.flatnonzero(peaks + extra <= self.capacity + 1e-9)
+        ranked = sorted(fits.tolist(), key=lambda row: (peaks[row] + extra[row], self.programmer_ids[row]))
+        return [
+            {
+                'programmer_id': self.programmer_ids[row],
+                'name': self.names[self.programmer_ids[row]],
+                'peak_hours': _to_hours(peaks[row]),
+                'task_hours': _to_hours(extra[row] * weeks),
+                'spare_hours': _to_hours(self.capacity - peaks[row] - extra[row])
+            }
+            for row in ranked
+        ]
+
+
+def _assignment_statement():
+    hours = models.Task.base_time_hours * func.coalesce(models.Programmer.coefficient, 1)
+    return select(
+        models.ProjectTask.programmer_id,
+        models.Project.id,
+        models.Project.start_date,
+        models.Project.end_date,
+        func.sum(hours)
+    ).join(
+        models.Stage, models.Stage.id == models.ProjectTask.stage_id
+    ).join(
+        models.Project, models.Project.id == models.Stage.project_id
+    ).join(
+        models.Task, models.Task.id == models.ProjectTask.task_id
+    ).join(
+        models.Programmer, models.Programmer.id == models.ProjectTask.programmer_id
+    ).where(
+        func.coalesce(models.ProjectTask.status, "pending") != "completed"
+    ).group_by(
+        models.ProjectTask.programmer_id, models.Project.id, models.Project.start_date, models.Project.end_date
+    )
+
+
+def build_index(db: Session):
+    programmers = db.execute(
+        select(models.Programmer.id, models.Programmer.name, models.Programmer.coefficient).order_by(models.Programmer.id)
+    ).all()
+    rows = db.execute(_assignment_statement()).all()
+    return CapacityIndex(programmers, rows, config.CAPACITY_HOURS_PER_WEEK)
+
+
+_lock = threading.Lock()
+_cached = (None, None)
+
+
+def get_index(db: Session, versions=None):
+    # Reconstruye solo si cambió alguna versión desde la última vez
+    global _cached
+    versions = versions if versions is not None else versioning.get_versions(db, VERSION_KEYS)
+    cached_versions, index = _cached
+    if index is not None and cached_versions == versions:
+        return index
+    with _lock:
+        if _cached[1] is not None and _cached[0] == versions:
+            return _cached[1]
+        index = build_index(db)
+        _cached = (versions, index)
+        return index
+
+
+def _week_range(index: CapacityIndex, week_from: Optional[date], week_to: Optional[date]):
+    if week_from is not None and week_to is not None and week_to < week_from:
+        raise ValueError("week_to must not be before week_from")
+    first = index.week_index(week_from) if week_from is not None else None
+    last = index.week_index(week_to) if week_to is not None else None
+    return first, last
+
+
+def programmer_capacity(index: CapacityIndex, programmer_id: int,
+                        week_from: Optional[date] = None, week_to: Optional[date] = None):
+    if programmer_id not in index.names:
+        return None
+    first, last = _week_range(index, week_from, week_to)
+    if first is not None and last is None:
+        last = max(first, index.weeks - 1)
+    if last is not None and first is None:
+        first = min(last, 0)
+    return {
+        'programmer_id': programmer_id,
+        'name': index.names[programmer_id],
+        'capacity_hours_per_week': _to_hours(index.capacity),
+        'unscheduled_hours': _to_hours(index.unscheduled[programmer_id]),
+        'weeks': index.programmer_weeks(programmer_id, first, last)
+    }
+
+
+def overload_report(index: CapacityIndex, week_from: Optional[date] = None, week_to: Optional[date] = None):
+    first, last = _week_range(index, week_from, week_to)
+    first = 0 if first is None else first
+    last = index.weeks - 1 if last is None else last
+    report = []
+    for week in index.overload_weeks(first, last):
+        programmers = [
+            {
+                'programmer_id': pid,
+                'name': index.names[pid],
+                'hours': _to_hours(index.load[index._position[pid], week]),
+                'over_hours': _to_hours(index.load[index._position[pid], week] - index.capacity)
+            }
+            for pid in index.overloaded_in(week)
+        ]
+        programmers.sort(key=lambda p: p['over_hours'], reverse=True)
+        report.append({'week_start': index.week_date(week), 'programmers': programmers})
+    return report
+
+
+def available_programmers(db: Session, index: CapacityIndex, task_id: int, project_id: Optional[int] = None,
+                          start_date: Optional[date] = None, end_date: Optional[date] = None):
+    task = db.get(models.Task, task_id)
+    if task is None:
+        raise ValueError(f"Task {task_id} not found")
+    if project_id is not None:
+        project = db.get(models.Project, project_id)
+        if project is None:
+            raise ValueError(f"Project {project_id} not found")
+        start_date = start_date or project.start_date
+        end_date = end_date or project.end_date
+    if start_date is None:
+        raise ValueError("A start_date (or a project with dates) is required")
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise ValueError("end_date must not be before start_date")
+    return index.available(float(task.base_time_hours or 0), index.week_index(start_date), index.week_index(end_date))
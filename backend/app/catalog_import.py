@@ -0,0 +1,205 @@
+import argparse
+import csv
+import io
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from sqlalchemy import bindparam, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app import models, versioning
+
+# Columnas del catálogo (mismo formato que catalogo_tarefas_expandido.xlsx)
+DEFAULT_SHEET = "Catálogo de Tarefas"
+NAME_COLUMN = "Tarefa (Português)"
+DESCRIPTION_COLUMN = "Categoria"
+CLASSIFICATION_COLUMN = "Classificação"
+HOURS_COLUMN = "Estimativa (Horas)"
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 50
+# Las horas tienen que caber en tasks.base_time_hours (DECIMAL(5, 2)): fuera
+# de rango PostgreSQL rechaza el lote entero al escribirlo
+HOURS_TYPE = models.Task.__table__.c.base_time_hours.type
+HOURS_STEP = Decimal(1).scaleb(-HOURS_TYPE.scale)
+MAX_HOURS = Decimal(10) ** (HOURS_TYPE.precision - HOURS_TYPE.scale) - HOURS_STEP
+
+
+def read_xlsx_rows(source, sheet_name: str = DEFAULT_SHEET):
+    # openpyxl en modo read_only recorre la hoja fila a fila sin cargarla entera
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_csv_rows(source):
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+    else:
+        yield from csv.DictReader(io.TextIOWrapper(source, encoding="utf-8-sig", newline=""))
+
+
+def read_rows(source, file_format: str, sheet_name: str = DEFAULT_SHEET):
+    if file_format == "xlsx":
+        return read_xlsx_rows(source, sheet_name)
+    if file_format == "csv":
+        return read_csv_rows(source)
+    raise ValueError(f"Unsupported catalog format: {file_format}")
+
+
+def validate_row(row: dict):
+    name = (str(row.get(NAME_COLUMN) or "")).strip()
+    if not name:
+        raise ValueError("missing task name")
+    try:
+        base_time_hours = Decimal(str(row.get(HOURS_COLUMN)).strip()).quantize(HOURS_STEP)
+    except InvalidOperation:
+        raise ValueError(f"invalid hours {row.get(HOURS_COLUMN)!r}")
+    if not base_time_hours.is_finite():
+        raise ValueError(f"invalid hours {row.get(HOURS_COLUMN)!r}")
+    if not 0 <= base_time_hours <= MAX_HOURS:
+        raise ValueError(f"hours {row.get(HOURS_COLUMN)!r} out of range (0 to {MAX_HOURS})")
+    description = row.get(DESCRIPTION_COLUMN)
+    return {
+        'name': name,
+        'description': str(description).strip() if description is not None else None,
+        'type': "management" if row.get(CLASSIFICATION_COLUMN) == "Gestão" else "development",
+        'base_time_hours': base_time_hours
+    }
+
+
+def _has_unique_name(db: Session):
+    # ON CONFLICT (name) necesita un índice único en tasks.name (migración
+    # 0002); las bases sin migrar solo tienen el índice normal
+    inspector = inspect(db.connection())
+    return any(
+        index['unique'] and index['column_names'] == ["name"] for index in inspector.get_indexes("tasks")
+    ) or any(
+        constraint['column_names'] == ["name"] for constraint in inspector.get_unique_constraints("tasks")
+    )
+
+
+def _upsert_statement(db: Session):
+    # INSERT ... ON CONFLICT (name) DO UPDATE, según el dialecto de la sesión;
+    # None si no se puede (dialecto sin soporte o sin índice único)
+    insert = versioning.dialect_insert(db)
+    if insert is None or not _has_unique_name(db):
+        return None
+    stmt = insert(models.Task.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=[models.Task.__table__.c.name],
+        set_={
+            'description': stmt.excluded.description,
+            'type': stmt.excluded.type,
+            'base_time_hours': stmt.excluded.base_time_hours
+        }
+    )
+
+
+def _write_batch(db: Session, stmt, tasks):
+    if stmt is not None:
+        db.execute(stmt, tasks)
+        return
+    # Sin upsert: busca los nombres existentes, actualiza esos e inserta el resto
+    table = models.Task.__table__
+    existing = set(db.scalars(select(table.c.name).where(table.c.name.in_([t['name'] for t in tasks]))))
+    updates = [dict(t, task_name=t['name']) for t in tasks if t['name'] in existing]
+    inserts = [t for t in tasks if t['name'] not in existing]
+    if updates:
+        # El SET sale de las claves de cada fila (descripción, tipo y horas)
+        db.execute(
+            update(table).where(table.c.name == bindparam("task_name")),
+            [{k: v for k, v in t.items() if k != 'name'} for t in updates]
+        )
+    if inserts:
+        db.execute(table.insert(), inserts)
+
+
+def _projects_using(db: Session, task_names):
+    return db.scalars(
+        select(models.Stage.project_id)
+        .join(models.ProjectTask, models.ProjectTask.stage_id == models.Stage.id)
+        .join(models.Task, models.Task.id == models.ProjectTask.task_id)
+        .where(models.Task.name.in_(task_names))
+        .distinct()
+    ).all()
+
+
+def import_catalog(db: Session, rows, batch_size: int = BATCH_SIZE):
+    stmt = _upsert_statement(db)
+    stats = {'rows': 0, 'upserted': 0, 'errors': 0, 'error_details': []}
+    started = time.perf_counter()
+    rows = iter(rows)
+    line = 1  # la fila 1 es la cabecera
+    project_ids = set()
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            # Un mismo nombre solo puede aparecer una vez por sentencia ON CONFLICT
+            valid = {}
+            for row in batch:
+                line += 1
+                try:
+                    task = validate_row(row)
+                except ValueError as e:
+                    stats['errors'] += 1
+                    if len(stats['error_details']) < MAX_REPORTED_ERRORS:
+                        stats['error_details'].append(f"row {line}: {e}")
+                    continue
+                valid[task['name']] = task
+            stats['rows'] += len(batch)
+            if valid:
+                _write_batch(db, stmt, list(valid.values()))
+                stats['upserted'] += len(valid)
+                project_ids.update(_projects_using(db, list(valid)))
+        if stats['upserted']:
+            # Las horas base de tareas ya usadas cambian el detalle (y los
+            # agregados) de sus proyectos
+            versioning.bump(db, versioning.TASKS, *(versioning.project_key(pid) for pid in project_ids))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    elapsed = time.perf_counter() - started
+    stats['seconds'] = round(elapsed, 3)
+    stats['rows_per_second'] = round(stats['rows'] / elapsed, 1) if elapsed > 0 else float(stats['rows'])
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa el catálogo de tareas desde xlsx o CSV")
+    parser.add_argument("path")
+    parser.add_argument("--sheet", default=DEFAULT_SHEET)
+    parser.add_argument("--format", choices=["xlsx", "csv"])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "xlsx")
+    db = SessionLocal()
+    try:
+        stats = import_catalog(db, read_rows(args.path, file_format, args.sheet), args.batch_size)
+    finally:
+        db.close()
+    print(
+        f"{stats['rows']} filas, {stats['upserted']} tareas, {stats['errors']} errores "
+        f"en {stats['seconds']}s ({stats['rows_per_second']} filas/s)"
+    )
+    for detail in stats['error_details']:
+        print(f"  {detail}")
+
+
+if __name__ == "__main__":
+    main()
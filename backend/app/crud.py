@@ -1,41 +1,246 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, insert, update, delete, func, and_, or_, bindparam, literal, Date
+from sqlalchemy.orm import Session, joinedload, selectinload
+from datetime import date
 from decimal import Decimal
-from app import schemas, models
+from typing import Optional, List
+import base64
+import json
+import logging
+from app import schemas, models, versioning
+# Registra el refresco de los agregados de cartera antes de cada commit
+from app import rollups  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+# ========== PAGINATION ==========
+# Paginación por cursor (keyset): el cursor es opaco para el cliente y guarda
+# el par (sort_key, id) de la última fila devuelta. Así las páginas profundas
+# cuestan lo mismo que la primera, a diferencia de OFFSET.
+def _encode_cursor(sort_value, row_id):
+    payload = json.dumps([sort_value, row_id], default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def _cursor_value(sort_column, sort_value):
+    # El cursor guarda las fechas como texto ISO
+    if sort_value is None or not isinstance(sort_column.type, Date):
+        return sort_value
+    try:
+        return date.fromisoformat(sort_value)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def _keyset_order(query, sort_column, id_column, cursor: Optional[str] = None, descending: bool = False):
+    # NULL cuenta como mayor que cualquier valor (como los índices de
+    # PostgreSQL): al final en orden ascendente y al principio en descendente.
+    # El id desempata siempre en ascendente.
+    if sort_column is id_column:
+        if cursor:
+            _, last_id = _decode_cursor(cursor)
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        return query.order_by(id_column.desc() if descending else id_column)
+    if cursor:
+        sort_value, last_id = _decode_cursor(cursor)
+        sort_value = _cursor_value(sort_column, sort_value)
+        after_ties = and_(sort_column == sort_value, id_column > last_id)
+        if sort_value is None:
+            condition = and_(sort_column.is_(None), id_column > last_id)
+            if descending:
+                condition = or_(condition, sort_column.is_not(None))
+        elif descending:
+            condition = or_(sort_column < sort_value, after_ties)
+        else:
+            condition = or_(sort_column > sort_value, after_ties, sort_column.is_(None))
+        query = query.filter(condition)
+    order = sort_column.desc().nulls_first() if descending else sort_column.asc().nulls_last()
+    return query.order_by(order, id_column)
+
+# ========== FILTERS & SORTING ==========
+# Claves de orden admitidas en cada listado ("-clave" = descendente): solo
+# columnas con índice, para que ORDER BY ... LIMIT y el cursor recorran el
+# índice en vez de ordenar la tabla entera.
+PROJECT_SORT_KEYS = {
+    'name': models.Project.name,
+    'start_date': models.Project.start_date,
+    'end_date': models.Project.end_date,
+    'responsible_id': models.Project.responsible_id,
+    'id': models.Project.id,
+}
+TASK_SORT_KEYS = {
+    'name': models.Task.name,
+    'type': models.Task.type,
+    'id': models.Task.id,
+}
+STAGE_SORT_KEYS = {
+    'project_id': models.Stage.project_id,
+    'name': models.Stage.name,
+    'id': models.Stage.id,
+}
+STATUSES = ("pending", "in_progress", "completed")
+
+def _sort_column(allowed, sort: str):
+    descending = sort.startswith("-")
+    key = sort[1:] if descending else sort
+    if key not in allowed:
+        raise ValueError(f"Invalid sort key '{key}', expected one of: {', '.join(allowed)}")
+    return allowed[key], descending
+
+def _project_task_conditions(status: Optional[str] = None, programmer_id: Optional[int] = None):
+    # Sobre los índices (programmer_id, status) y (stage_id, status) de project_tasks
+    conditions = []
+    if status is not None:
+        if status not in STATUSES:
+            raise ValueError(f"Invalid status '{status}', expected one of: {', '.join(STATUSES)}")
+        # Las filas antiguas sin estado cuentan como pendientes
+        conditions.append(
+            or_(models.ProjectTask.status == status, models.ProjectTask.status.is_(None))
+            if status == "pending" else models.ProjectTask.status == status
+        )
+    if programmer_id is not None:
+        conditions.append(models.ProjectTask.programmer_id == programmer_id)
+    return conditions
+
+def _project_conditions(filters: Optional[schemas.ProjectFilters]):
+    if filters is None:
+        return []
+    conditions = rollups._date_filters(
+        models.Project.start_date, models.Project.end_date,
+        filters.start_from, filters.start_to, filters.end_from, filters.end_to
+    )
+    if filters.responsible_id is not None:
+        conditions.append(models.Project.responsible_id == filters.responsible_id)
+    task_conditions = _project_task_conditions(filters.status, filters.programmer_id)
+    if task_conditions:
+        # Proyectos con al menos una tarea que cumpla
+        conditions.append(
+            select(models.ProjectTask.id).join(
+                models.Stage, models.Stage.id == models.ProjectTask.stage_id
+            ).where(models.Stage.project_id == models.Project.id, *task_conditions).exists()
+        )
+    return conditions
+
+def _task_conditions(filters: Optional[schemas.TaskFilters]):
+    if filters is None or filters.type is None:
+        return []
+    return [models.Task.type == filters.type]
+
+def _stage_conditions(filters: Optional[schemas.StageFilters]):
+    if filters is None:
+        return []
+    conditions = []
+    if filters.project_id is not None:
+        conditions.append(models.Stage.project_id == filters.project_id)
+    task_conditions = _project_task_conditions(filters.status, filters.programmer_id)
+    if task_conditions:
+        conditions.append(
+            select(models.ProjectTask.id).where(models.ProjectTask.stage_id == models.Stage.id, *task_conditions).exists()
+        )
+    return conditions
+
+def _next_page(rows, limit: int, sort_key: str):
+    # Las consultas piden limit + 1 filas: si sobra una, hay página siguiente
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = _encode_cursor(last[sort_key], last['id'])
+        else:
+            next_cursor = _encode_cursor(getattr(last, sort_key), last.id)
+    return {'items': rows, 'next_cursor': next_cursor}
+
+def _keyset_page(db: Session, stmt, sort_column, id_column, cursor: Optional[str], limit: int, descending: bool = False):
+    rows = db.scalars(_keyset_order(stmt, sort_column, id_column, cursor, descending).limit(limit + 1)).all()
+    return _next_page(rows, limit, sort_column.key)
 
 # ========== PROGRAMMERS ==========
+def _programmer_workloads_statement(skip: int = 0, limit: int = 100,
+                                    programmer_id: Optional[int] = None, cursor: Optional[str] = None):
+    # Una sola sentencia agrupada: proyectos como responsable, tareas asignadas
+    # por estado y horas ponderadas por el coeficiente de cada programador.
+    # Los agregados se limitan a los programadores de la página (CTE): un
+    # GROUP BY sin filtro recorrería todos los proyectos y tareas
+    page = _keyset_order(select(models.Programmer), models.Programmer.name, models.Programmer.id, cursor)
+    if programmer_id is not None:
+        page = page.filter(models.Programmer.id == programmer_id)
+    page = page.offset(skip).limit(limit).cte("page")
+    page_ids = select(page.c.id)
+
+    project_counts = select(
+        models.Project.responsible_id.label("programmer_id"),
+        func.count(models.Project.id).label("project_count")
+    ).where(models.Project.responsible_id.in_(page_ids)).group_by(models.Project.responsible_id).subquery()
+
+    # NULL cuenta como pendiente (como en _project_task_conditions)
+    status = func.coalesce(models.ProjectTask.status, "pending")
+    task_totals = select(
+        models.ProjectTask.programmer_id.label("programmer_id"),
+        status.label("status"),
+        func.count(models.ProjectTask.id).label("task_count"),
+        func.coalesce(func.sum(models.Task.base_time_hours), 0).label("base_hours")
+    ).outerjoin(
+        models.Task, models.Task.id == models.ProjectTask.task_id
+    ).where(
+        models.ProjectTask.programmer_id.in_(page_ids)
+    ).group_by(models.ProjectTask.programmer_id, status).subquery()
+
+    return select(
+        page.c.id, page.c.name, page.c.seniority, page.c.coefficient,
+        func.coalesce(project_counts.c.project_count, 0).label("project_count"),
+        task_totals.c.status,
+        task_totals.c.task_count,
+        (task_totals.c.base_hours * func.coalesce(page.c.coefficient, 1)).label("weighted_hours")
+    ).outerjoin(
+        project_counts, project_counts.c.programmer_id == page.c.id
+    ).outerjoin(
+        task_totals, task_totals.c.programmer_id == page.c.id
+    ).order_by(page.c.name, page.c.id, task_totals.c.status)
+
+def _fold_programmer_workloads(rows):
+    result = {}
+    for row in rows:
+        workload = result.get(row.id)
+        if workload is None:
+            workload = result[row.id] = {
+                'id': row.id,
+                'name': row.name,
+                'seniority': row.seniority,
+                'coefficient': row.coefficient,
+                'project_count': row.project_count,
+                'task_counts': {},
+                'estimated_hours': Decimal("0.00")
+            }
+        if row.task_count:
+            workload['task_counts'][row.status] = row.task_count
+            workload['estimated_hours'] += Decimal(str(row.weighted_hours or 0))
+    for workload in result.values():
+        workload['estimated_hours'] = workload['estimated_hours'].quantize(Decimal("0.01"))
+    return list(result.values())
+
+def get_programmer_workloads(db: Session, skip: int = 0, limit: int = 100,
+                             programmer_id: Optional[int] = None, cursor: Optional[str] = None):
+    stmt = _programmer_workloads_statement(skip, limit, programmer_id, cursor)
+    return _fold_programmer_workloads(db.execute(stmt))
+
 def get_programmers(db: Session, skip: int = 0, limit: int = 100):
-    programmers = db.query(models.Programmer).offset(skip).limit(limit).all()
-    result = []
-    for p in programmers:
-        project_count = db.query(models.Project).filter(
-            models.Project.responsible_id == p.id
-        ).count()
-        
-        result.append({
-            'id': p.id,
-            'name': p.name,
-            'seniority': p.seniority,
-            'coefficient': p.coefficient,
-            'project_count': project_count
-        })
-    return result
+    return get_programmer_workloads(db, skip=skip, limit=limit)
+
+def get_programmer_workloads_page(db: Session, cursor: Optional[str] = None, limit: int = 100):
+    rows = get_programmer_workloads(db, limit=limit + 1, cursor=cursor)
+    return _next_page(rows, limit, 'name')
+
+def get_programmers_page(db: Session, cursor: Optional[str] = None, limit: int = 100):
+    return get_programmer_workloads_page(db, cursor=cursor, limit=limit)
 
 def get_programmer(db: Session, programmer_id: int):
-    programmer = db.query(models.Programmer).filter(
-        models.Programmer.id == programmer_id
-    ).first()
-    if programmer:
-        project_count = db.query(models.Project).filter(
-            models.Project.responsible_id == programmer_id
-        ).count()
-        return {
-            'id': programmer.id,
-            'name': programmer.name,
-            'seniority': programmer.seniority,
-            'coefficient': programmer.coefficient,
-            'project_count': project_count
-        }
-    return None
+    workloads = get_programmer_workloads(db, programmer_id=programmer_id, limit=1)
+    return workloads[0] if workloads else None
 
 def create_programmer(db: Session, programmer: schemas.ProgrammerCreate):
     db_programmer = models.Programmer(
@@ -44,6 +249,7 @@ def create_programmer(db: Session, programmer: schemas.ProgrammerCreate):
         coefficient=programmer.coefficient
     )
     db.add(db_programmer)
+    versioning.bump(db, versioning.PROGRAMMERS)
     db.commit()
     db.refresh(db_programmer)
     return db_programmer
@@ -53,9 +259,23 @@ def update_programmer(db: Session, programmer_id: int, programmer: schemas.Progr
         models.Programmer.id == programmer_id
     ).first()
     if db_programmer:
+        coefficient_changed = db_programmer.coefficient != programmer.coefficient
         db_programmer.name = programmer.name
         db_programmer.seniority = programmer.seniority
         db_programmer.coefficient = programmer.coefficient
+        # El detalle de los proyectos donde es responsable o tiene tareas
+        # muestra sus datos y usa su coeficiente en las horas calculadas
+        responsible = select(models.Project.id).where(models.Project.responsible_id == programmer_id)
+        with_tasks = select(models.Stage.project_id).join(
+            models.ProjectTask, models.ProjectTask.stage_id == models.Stage.id
+        ).where(models.ProjectTask.programmer_id == programmer_id)
+        rows = db.execute(
+            responsible.add_columns(literal(False)).union(with_tasks.add_columns(literal(True)))
+        ).all()
+        # Nombre o seniority no cambian horas: solo se invalida el detalle
+        versioning.bump(db, versioning.PROGRAMMERS, *(versioning.project_key(pid) for pid, _ in rows), refresh=False)
+        if coefficient_changed:
+            versioning.mark_programmer(db, programmer_id, {pid for pid, has_tasks in rows if has_tasks})
         db.commit()
         db.refresh(db_programmer)
     return db_programmer
@@ -83,21 +303,44 @@ def delete_programmer(db: Session, programmer_id: int):
                 
             # Si no tiene dependencias, proceder con la eliminación
             db.delete(db_programmer)
+            versioning.bump(db, versioning.PROGRAMMERS)
             db.commit()
             return True
         return False
         
     except Exception as e:
         db.rollback()
-        print(f"Error eliminando programador: {str(e)}")
+        logger.exception("Error eliminando programador %s", programmer_id)
         return False
 
 # ========== TASKS ==========
 def get_task(db: Session, task_id: int):
     return db.query(models.Task).filter(models.Task.id == task_id).first()
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Task).offset(skip).limit(limit).all()
+def _tasks_statement(skip: int = 0, limit: int = 100, filters: Optional[schemas.TaskFilters] = None, sort: str = "name"):
+    sort_column, descending = _sort_column(TASK_SORT_KEYS, sort)
+    stmt = _keyset_order(select(models.Task).where(*_task_conditions(filters)), sort_column, models.Task.id, descending=descending)
+    return stmt.offset(skip).limit(limit)
+
+def get_tasks(db: Session, skip: int = 0, limit: int = 100, filters: Optional[schemas.TaskFilters] = None, sort: str = "name"):
+    return db.scalars(_tasks_statement(skip, limit, filters, sort)).all()
+
+def get_tasks_page(db: Session, cursor: Optional[str] = None, limit: int = 100,
+                   filters: Optional[schemas.TaskFilters] = None, sort: str = "name"):
+    sort_column, descending = _sort_column(TASK_SORT_KEYS, sort)
+    stmt = select(models.Task).where(*_task_conditions(filters))
+    return _keyset_page(db, stmt, sort_column, models.Task.id, cursor, limit, descending)
+
+def _task_project_keys(db: Session, task_id: int):
+    # Proyectos cuyo detalle usa esta tarea (nombre y horas base)
+    return [
+        versioning.project_key(pid) for pid in db.scalars(
+            select(models.Stage.project_id)
+            .join(models.ProjectTask, models.ProjectTask.stage_id == models.Stage.id)
+            .where(models.ProjectTask.task_id == task_id)
+            .distinct()
+        )
+    ]
 
 def create_task(db: Session, task: schemas.TaskCreate):
     db_task = models.Task(
@@ -107,6 +350,7 @@ def create_task(db: Session, task: schemas.TaskCreate):
         base_time_hours=task.base_time_hours
     )
     db.add(db_task)
+    versioning.bump(db, versioning.TASKS)
     db.commit()
     db.refresh(db_task)
     return db_task
@@ -118,6 +362,7 @@ def update_task(db: Session, task_id: int, task: schemas.TaskCreate):
         db_task.description = task.description
         db_task.type = task.type
         db_task.base_time_hours = task.base_time_hours
+        versioning.bump(db, versioning.TASKS, *_task_project_keys(db, task_id))
         db.commit()
         db.refresh(db_task)
     return db_task
@@ -125,52 +370,85 @@ def update_task(db: Session, task_id: int, task: schemas.TaskCreate):
 def delete_task(db: Session, task_id: int):
     db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
     if db_task:
+        versioning.bump(db, versioning.TASKS, *_task_project_keys(db, task_id))
         db.delete(db_task)
         db.commit()
         return True
     return False
 
 # ========== PROJECTS ==========
-def get_projects(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Project).options(
+def _projects_statement(filters: Optional[schemas.ProjectFilters] = None):
+    return select(models.Project).options(
         joinedload(models.Project.responsible)
-    ).offset(skip).limit(limit).all()
+    ).where(*_project_conditions(filters))
 
-def create_project_with_stages(db: Session, project_data: schemas.ProjectCreateWithStages):
-    db_project = models.Project(
-        name=project_data.name, 
-        description=project_data.description, 
-        start_date=project_data.start_date, 
-        end_date=project_data.end_date,
-        responsible_id=project_data.responsible_id
-    )
-    db.add(db_project)
-    db.flush()  # Flush para obtener el ID del proyecto antes de añadir las etapas
-    db.refresh(db_project)
+def _projects_list_statement(skip: int = 0, limit: int = 100, filters: Optional[schemas.ProjectFilters] = None,
+                             sort: str = "name"):
+    sort_column, descending = _sort_column(PROJECT_SORT_KEYS, sort)
+    stmt = _keyset_order(_projects_statement(filters), sort_column, models.Project.id, descending=descending)
+    return stmt.offset(skip).limit(limit)
 
-    for stage_data in project_data.stages:
-        db_stage = models.Stage(
-            project_id=db_project.id,
-            name=stage_data.name,
-            description=stage_data.description,
-            order_index=stage_data.order_index
-        )
-        db.add(db_stage)
-        db.flush()  # Flush para obtener el ID de la etapa
-        db.refresh(db_stage)
+def get_projects(db: Session, skip: int = 0, limit: int = 100, filters: Optional[schemas.ProjectFilters] = None,
+                 sort: str = "name"):
+    return db.scalars(_projects_list_statement(skip, limit, filters, sort)).all()
 
-        for project_task_data in stage_data.project_tasks:
-            db_project_task = models.ProjectTask(
-                stage_id=db_stage.id,
-                task_id=project_task_data.task_id,
-                programmer_id=project_task_data.programmer_id,
-                status=project_task_data.status
-            )
-            db.add(db_project_task)
+def get_projects_page(db: Session, cursor: Optional[str] = None, limit: int = 100,
+                      filters: Optional[schemas.ProjectFilters] = None, sort: str = "name"):
+    sort_column, descending = _sort_column(PROJECT_SORT_KEYS, sort)
+    return _keyset_page(db, _projects_statement(filters), sort_column, models.Project.id, cursor, limit, descending)
 
-    db.commit()
-    db.refresh(db_project)
-    return db_project
+def create_project_with_stages(db: Session, project_data: schemas.ProjectCreateWithStages):
+    # Número fijo de sentencias sin importar el tamaño del payload: un INSERT
+    # para el proyecto, uno multi-fila con RETURNING para las etapas y uno
+    # multi-fila para las tareas, todo en la misma transacción.
+    # En PostgreSQL los ids de etapa vuelven en el orden del payload dentro de
+    # un único INSERT; SQLite no garantiza ese orden y SQLAlchemy lo resuelve
+    # con un INSERT por etapa.
+    try:
+        project_id = db.execute(
+            insert(models.Project).returning(models.Project.id),
+            {
+                'name': project_data.name,
+                'description': project_data.description,
+                'start_date': project_data.start_date,
+                'end_date': project_data.end_date,
+                'responsible_id': project_data.responsible_id
+            }
+        ).scalar_one()
+
+        if project_data.stages:
+            stage_ids = db.scalars(
+                insert(models.Stage.__table__).returning(models.Stage.id, sort_by_parameter_order=True),
+                [
+                    {
+                        'project_id': project_id,
+                        'name': stage_data.name,
+                        'description': stage_data.description,
+                        'order_index': stage_data.order_index
+                    }
+                    for stage_data in project_data.stages
+                ]
+            ).all()
+
+            project_tasks = [
+                {
+                    'stage_id': stage_id,
+                    'task_id': project_task_data.task_id,
+                    'programmer_id': project_task_data.programmer_id,
+                    'status': project_task_data.status
+                }
+                for stage_id, stage_data in zip(stage_ids, project_data.stages)
+                for project_task_data in stage_data.project_tasks
+            ]
+            if project_tasks:
+                db.execute(insert(models.ProjectTask.__table__), project_tasks)
+
+        versioning.bump(db, versioning.project_key(project_id))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return get_project_with_details(db, project_id)
 
 def create_project(db: Session, project: schemas.ProjectCreate):
     db_project = models.Project(
@@ -181,6 +459,8 @@ def create_project(db: Session, project: schemas.ProjectCreate):
         responsible_id=project.responsible_id
     )
     db.add(db_project)
+    db.flush()
+    versioning.bump(db, versioning.project_key(db_project.id))
     db.commit()
     db.refresh(db_project)
     return db_project
@@ -195,6 +475,7 @@ def update_project(db: Session, project_id: int, project: schemas.ProjectCreate)
         db_project.start_date = project.start_date
         db_project.end_date = project.end_date
         db_project.responsible_id = project.responsible_id
+        versioning.bump(db, versioning.project_key(project_id))
         db.commit()
         db.refresh(db_project)
     return db_project
@@ -206,6 +487,7 @@ def delete_project(db: Session, project_id: int):
         # debería manejar la eliminación en cascada automáticamente.
         # Solo necesitamos eliminar el proyecto principal.
         db.delete(db_project)
+        versioning.bump(db, versioning.project_key(project_id))
         db.commit()
         return True
     return False
@@ -215,26 +497,70 @@ def delete_project(db: Session, project_id: int):
 
 
 
-def get_project_with_details(db: Session, project_id: int):
-    project = db.query(models.Project).options(
+def _to_hours(value):
+    # PostgreSQL devuelve Decimal y SQLite float: normalizamos a Decimal con 2 decimales
+    if value is None:
+        return Decimal("0.00")
+    return Decimal(str(value)).quantize(Decimal("0.01"))
+
+def _task_hours_statement(project_id: int):
+    # Horas de cada tarea (base_time_hours * coeficiente); los totales de
+    # etapas y proyecto son los guardados (app/totals.py)
+    hours = models.Task.base_time_hours * func.coalesce(models.Programmer.coefficient, 1)
+    return select(
+        models.ProjectTask.id,
+        hours.label("hours")
+    ).join(
+        models.Stage, models.Stage.id == models.ProjectTask.stage_id
+    ).join(
+        models.Task, models.Task.id == models.ProjectTask.task_id
+    ).outerjoin(
+        models.Programmer, models.Programmer.id == models.ProjectTask.programmer_id
+    ).where(models.Stage.project_id == project_id)
+
+def _fold_task_hours(rows):
+    return {row.id: _to_hours(row.hours) for row in rows}
+
+def get_task_hours(db: Session, project_id: int):
+    return _fold_task_hours(db.execute(_task_hours_statement(project_id)))
+
+def _apply_task_hours(project, task_hours):
+    # Etapas y proyecto usan los totales guardados (app/totals.py); aquí solo se
+    # rellenan atributos no mapeados, así la lectura no ensucia la sesión
+    for stage in project.stages:
+        for pt in stage.project_tasks:
+            pt.calculated_total_hours = task_hours.get(pt.id)
+    project.total_estimated_hours = project.estimated_hours
+    return project
+
+# Estrategias de carga del detalle de proyecto. "joined" genera un único
+# LEFT OUTER JOIN cuyo tamaño es etapas x tareas; "selectin" emite una consulta
+# IN por tabla y no multiplica filas, por eso es la estrategia por defecto.
+PROJECT_DETAIL_LOADERS = {
+    "joined": lambda: (
         joinedload(models.Project.responsible),
         joinedload(models.Project.stages).joinedload(models.Stage.project_tasks).joinedload(models.ProjectTask.task),
         joinedload(models.Project.stages).joinedload(models.Stage.project_tasks).joinedload(models.ProjectTask.programmer)
-    ).filter(models.Project.id == project_id).first()
+    ),
+    "selectin": lambda: (
+        joinedload(models.Project.responsible),
+        selectinload(models.Project.stages).selectinload(models.Stage.project_tasks).options(
+            selectinload(models.ProjectTask.task),
+            selectinload(models.ProjectTask.programmer)
+        )
+    ),
+}
+
+def _project_detail_statement(project_id: int, loading: str = "selectin"):
+    return select(models.Project).options(
+        *PROJECT_DETAIL_LOADERS[loading]()
+    ).where(models.Project.id == project_id)
+
+def get_project_with_details(db: Session, project_id: int, loading: str = "selectin"):
+    project = db.scalars(_project_detail_statement(project_id, loading)).unique().first()
     
     if project:
-        total_hours = Decimal("0.00")
-        for stage in project.stages:
-            for pt in stage.project_tasks:
-                if pt.task and pt.programmer:
-                    calculated = Decimal(str(pt.task.base_time_hours)) * Decimal(str(pt.programmer.coefficient))
-                    pt.calculated_total_hours = calculated
-                    total_hours += calculated
-                elif pt.task:
-                    pt.calculated_total_hours = Decimal(str(pt.task.base_time_hours))
-                    total_hours += Decimal(str(pt.task.base_time_hours))
-        
-        project.total_estimated_hours = total_hours
+        _apply_task_hours(project, get_task_hours(db, project_id))
     
     return project
 
@@ -247,6 +573,7 @@ def create_stage(db: Session, stage: schemas.StageCreate):
         order_index=stage.order_index
     )
     db.add(db_stage)
+    versioning.bump(db, versioning.project_key(stage.project_id))
     db.commit()
     db.refresh(db_stage)
     return db_stage
@@ -256,8 +583,18 @@ def create_stage(db: Session, stage: schemas.StageCreate):
 def get_stage(db: Session, stage_id: int):
     return db.query(models.Stage).filter(models.Stage.id == stage_id).first()
 
-def get_stages(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Stage).offset(skip).limit(limit).all()
+def get_stages(db: Session, skip: int = 0, limit: int = 100, filters: Optional[schemas.StageFilters] = None,
+               sort: str = "project_id"):
+    sort_column, descending = _sort_column(STAGE_SORT_KEYS, sort)
+    stmt = _keyset_order(select(models.Stage).where(*_stage_conditions(filters)), sort_column, models.Stage.id,
+                         descending=descending)
+    return db.scalars(stmt.offset(skip).limit(limit)).all()
+
+def get_stages_page(db: Session, cursor: Optional[str] = None, limit: int = 100,
+                    filters: Optional[schemas.StageFilters] = None, sort: str = "project_id"):
+    sort_column, descending = _sort_column(STAGE_SORT_KEYS, sort)
+    stmt = select(models.Stage).where(*_stage_conditions(filters))
+    return _keyset_page(db, stmt, sort_column, models.Stage.id, cursor, limit, descending)
 
 def update_stage(db: Session, stage_id: int, stage: schemas.StageUpdate):
     db_stage = db.query(models.Stage).filter(models.Stage.id == stage_id).first()
@@ -265,6 +602,7 @@ def update_stage(db: Session, stage_id: int, stage: schemas.StageUpdate):
         db_stage.name = stage.name
         db_stage.description = stage.description
         db_stage.order_index = stage.order_index
+        versioning.bump(db, versioning.project_key(db_stage.project_id))
         db.commit()
         db.refresh(db_stage)
     return db_stage
@@ -273,11 +611,19 @@ def delete_stage(db: Session, stage_id: int):
     db_stage = db.query(models.Stage).filter(models.Stage.id == stage_id).first()
     if db_stage:
         db.delete(db_stage)
+        versioning.bump(db, versioning.project_key(db_stage.project_id))
         db.commit()
         return True
     return False
 
 # ========== PROJECT TASKS ==========
+def _bump_stage_versions(db: Session, stage_ids):
+    # Un cambio en project_tasks invalida las etapas y el detalle de sus proyectos
+    project_ids = db.scalars(
+        select(models.Stage.project_id).where(models.Stage.id.in_(stage_ids)).distinct()
+    ).all()
+    versioning.bump(db, *(versioning.project_key(pid) for pid in project_ids))
+
 def create_project_task(db: Session, project_task: schemas.ProjectTaskCreate):
     db_project_task = models.ProjectTask(
         stage_id=project_task.stage_id, 
@@ -286,10 +632,81 @@ def create_project_task(db: Session, project_task: schemas.ProjectTaskCreate):
         status=project_task.status
     )
     db.add(db_project_task)
+    _bump_stage_versions(db, [project_task.stage_id])
     db.commit()
     db.refresh(db_project_task)
     return db_project_task
 
+def _apply_loaded_hours(project_tasks):
+    # Horas de cada tarea con la tarea y el programador ya cargados, misma
+    # fórmula que _task_hours_statement y sin otra consulta
+    for pt in project_tasks:
+        if pt.task is None:
+            continue
+        coefficient = pt.programmer.coefficient if pt.programmer is not None else None
+        pt.calculated_total_hours = _to_hours(pt.task.base_time_hours * (coefficient if coefficient is not None else 1))
+    return project_tasks
+
+def get_project_tasks(db: Session, stage_id: Optional[int] = None, skip: int = 0, limit: Optional[int] = 100):
+    query = db.query(models.ProjectTask).options(
+        selectinload(models.ProjectTask.task),
+        selectinload(models.ProjectTask.programmer)
+    )
+    if stage_id is not None:
+        query = query.filter(models.ProjectTask.stage_id == stage_id)
+    return _apply_loaded_hours(query.order_by(models.ProjectTask.id).offset(skip).limit(limit).all())
+
+def replace_stage_tasks(db: Session, stage_id: int, project_tasks: List[schemas.StageTaskSync]):
+    # Sustituye la lista de tareas de una etapa calculando el diff contra las
+    # filas actuales: un DELETE, un UPDATE y un INSERT masivos en una transacción.
+    db_stage = get_stage(db, stage_id)
+    if db_stage is None:
+        return None
+    try:
+        current = {
+            row.id: (row.task_id, row.programmer_id, row.status)
+            for row in db.execute(
+                select(
+                    models.ProjectTask.id,
+                    models.ProjectTask.task_id,
+                    models.ProjectTask.programmer_id,
+                    models.ProjectTask.status
+                ).where(models.ProjectTask.stage_id == stage_id).with_for_update()
+            )
+        }
+        desired_ids = {pt.id for pt in project_tasks if pt.id is not None}
+        unknown = desired_ids - current.keys()
+        if unknown:
+            raise ValueError(f"Project tasks {sorted(unknown)} do not belong to stage {stage_id}")
+
+        to_delete = current.keys() - desired_ids
+        to_update = [
+            {'id': pt.id, 'task_id': pt.task_id, 'programmer_id': pt.programmer_id, 'status': pt.status}
+            for pt in project_tasks
+            if pt.id is not None and current[pt.id] != (pt.task_id, pt.programmer_id, pt.status)
+        ]
+        to_insert = [
+            {'stage_id': stage_id, 'task_id': pt.task_id, 'programmer_id': pt.programmer_id, 'status': pt.status}
+            for pt in project_tasks
+            if pt.id is None
+        ]
+
+        if to_delete:
+            db.execute(
+                delete(models.ProjectTask).where(models.ProjectTask.id.in_(to_delete)),
+                execution_options={'synchronize_session': False}
+            )
+        if to_update:
+            db.execute(update(models.ProjectTask), to_update)
+        if to_insert:
+            db.execute(insert(models.ProjectTask.__table__), to_insert)
+        versioning.bump(db, versioning.project_key(db_stage.project_id))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return get_project_tasks(db, stage_id=stage_id, limit=None)
+
 def get_project_task(db: Session, project_task_id: int):
     return db.query(models.ProjectTask).filter(
         models.ProjectTask.id == project_task_id
@@ -304,16 +721,74 @@ def update_project_task(db: Session, project_task_id: int, project_task_update:
             db_project_task.programmer_id = project_task_update.programmer_id
         if project_task_update.status is not None:
             db_project_task.status = project_task_update.status
+        _bump_stage_versions(db, [db_project_task.stage_id])
         db.commit()
         db.refresh(db_project_task)
     return db_project_task
 
+def bulk_update_project_tasks(db: Session, bulk: schemas.ProjectTaskBulkUpdate):
+    # Un único UPDATE ... WHERE ... RETURNING para todas las filas afectadas
+    # Solo los campos enviados: {"programmer_id": null} desasigna
+    values = bulk.values.model_dump(exclude_unset=True)
+    if not values:
+        raise ValueError("No values to update")
+    if 'status' in values and values['status'] is None:
+        raise ValueError("status cannot be null")
+    conditions = []
+    if bulk.ids is not None:
+        conditions.append(models.ProjectTask.id.in_(bulk.ids))
+    if bulk.filter is not None:
+        if bulk.filter.stage_id is not None:
+            conditions.append(models.ProjectTask.stage_id == bulk.filter.stage_id)
+        # Mismo criterio que los listados: status "pending" incluye las filas sin estado
+        conditions += _project_task_conditions(bulk.filter.status, bulk.filter.programmer_id)
+    if not conditions:
+        raise ValueError("Either ids or a filter is required")
+
+    stmt = update(models.ProjectTask.__table__).where(*conditions).values(**values).returning(
+        models.ProjectTask.id, models.ProjectTask.stage_id
+    )
+    try:
+        rows = db.execute(stmt).all()
+        ids = [row.id for row in rows]
+        if rows:
+            _bump_stage_versions(db, {row.stage_id for row in rows})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {'updated': len(ids), 'ids': sorted(ids)}
+
+def assign_project_tasks(db: Session, assignments):
+    # assignments: {project_task_id: programmer_id}. Solo se asignan las filas
+    # que siguen sin programador (pudieron asignarse a mano desde la propuesta)
+    if not assignments:
+        return []
+    table = models.ProjectTask.__table__
+    stmt = update(table).where(
+        table.c.id == bindparam("pt_id"), table.c.programmer_id.is_(None)
+    ).values(programmer_id=bindparam("programmer"))
+    try:
+        db.execute(stmt, [{'pt_id': ptid, 'programmer': pid} for ptid, pid in assignments.items()])
+        applied = db.execute(
+            select(table.c.id, table.c.stage_id, table.c.programmer_id).where(table.c.id.in_(list(assignments)))
+        ).all()
+        applied = [row for row in applied if row.programmer_id == assignments[row.id]]
+        if applied:
+            _bump_stage_versions(db, {row.stage_id for row in applied})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return sorted(row.id for row in applied)
+
 def delete_project_task(db: Session, project_task_id: int):
     db_project_task = db.query(models.ProjectTask).filter(
         models.ProjectTask.id == project_task_id
     ).first()
     if db_project_task:
         db.delete(db_project_task)
+        _bump_stage_versions(db, [db_project_task.stage_id])
         db.commit()
         return True
     return False
@@ -1,22 +1,132 @@
+import threading
+import time
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
+from sqlalchemy.pool import QueuePool
 
-# Obtener credenciales de variables de entorno
-DB_USER = os.getenv("POSTGRES_USER", "admin")
-DB_PASSWORD = os.getenv("POSTGRES_PASSWORD", "xxx")
-DB_HOST = os.getenv("DB_HOST", "db")
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("POSTGRES_DB", "project_manager_db")
+from . import config
 
-# Construir DATABASE_URL
-SQLALCHEMY_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+class InstrumentedQueuePool(QueuePool):
+    # QueuePool que además mide cuánto esperan las peticiones por una conexión
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        # Se considera espera cuando no queda ninguna conexión libre ni overflow
+        must_wait = self.checkedin() == 0 and self._max_overflow > -1 and self.overflow() >= self._max_overflow
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                if must_wait:
+                    self.waits += 1
+                    self.wait_seconds_total += waited
+                    self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def create_db_engine(url: str = config.DATABASE_URL):
+    # Única fábrica de engines de la aplicación
+    pool_args = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    if url.startswith("sqlite"):
+        # SQLite en memoria no admite un pool de varias conexiones
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            pool_args = {}
+        return create_engine(url, connect_args={"check_same_thread": False}, **pool_args)
+
+    connect_args = {"application_name": config.DB_APPLICATION_NAME}
+    if config.DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}"
+    return create_engine(url, connect_args=connect_args, **pool_args)
+
+
+def get_pool_stats(engine=None):
+    pool = (engine or globals()["engine"]).pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            stats.update({
+                "checkouts": pool.checkouts,
+                "waits": pool.waits,
+                "timeouts": pool.timeouts,
+                "wait_seconds_total": round(pool.wait_seconds_total, 6),
+                "max_wait_seconds": round(pool.max_wait_seconds, 6),
+            })
+    return stats
+
+
+def _async_url(url: str):
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+def create_async_db_engine(url: str = config.DATABASE_URL):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = _async_url(url)
+    if url.startswith("sqlite"):
+        return create_async_engine(url)
+
+    server_settings = {"application_name": config.DB_APPLICATION_NAME}
+    if config.DB_STATEMENT_TIMEOUT_MS > 0:
+        server_settings["statement_timeout"] = str(config.DB_STATEMENT_TIMEOUT_MS)
+    return create_async_engine(
+        url,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        connect_args={"server_settings": server_settings},
+    )
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# El engine asíncrono solo se crea si DB_ASYNC está activo
+async_engine = None
+AsyncSessionLocal = None
+if config.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = create_async_db_engine()
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -26,3 +136,6 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
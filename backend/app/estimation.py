@@ -0,0 +1,155 @@
+# Motor de estimación vectorizado. Carga las tareas de un proyecto (o de toda
+# la cartera) como arrays de NumPy y calcula horas = base_time_hours x
+# coeficiente del programador (1 sin asignar, igual que la consulta de
+# crud._task_hours_statement) y sus totales por etapa, estado y
+# programador con np.bincount, en una pasada y sin bucles en Python.
+#
+# Los escenarios "qué pasa si" (reasignar tareas, cambiar coeficientes) solo
+# modifican copias de los arrays: no se escribe nada en la base de datos.
+from decimal import Decimal
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+
+UNASSIGNED = -1
+
+
+def _to_hours(value):
+    return Decimal(repr(round(float(value), 2))).quantize(Decimal("0.01"))
+
+
+class EstimationFrame:
+    def __init__(self, rows, programmers):
+        # rows: (project_task_id, project_id, stage_id, programmer_id, status, base_time_hours)
+        columns = list(zip(*rows)) if rows else [()] * 6
+        self.project_task_ids = np.array(columns[0], dtype=np.int64)
+        self.project_ids = np.array(columns[1], dtype=np.int64)
+        self.stage_ids = np.array(columns[2], dtype=np.int64)
+        self.base_hours = np.array([float(h or 0) for h in columns[5]], dtype=np.float64)
+
+        # Programadores: índice compacto -> coeficiente. La última posición es
+        # el coeficiente 1 de las tareas sin asignar (índice -1)
+        self.programmer_ids = np.array([p[0] for p in programmers], dtype=np.int64)
+        self.coefficients = np.array([float(p[1] if p[1] is not None else 1) for p in programmers] + [1.0])
+        self._programmer_index = {pid: i for i, pid in enumerate(self.programmer_ids.tolist())}
+        self.programmer_codes = np.array(
+            [self._programmer_index.get(pid, UNASSIGNED) if pid is not None else UNASSIGNED for pid in columns[3]],
+            dtype=np.int64
+        )
+
+        self.statuses, self.status_codes = np.unique(
+            np.array([s or "pending" for s in columns[4]], dtype=object), return_inverse=True
+        )
+        self.stages, self.stage_codes = np.unique(self.stage_ids, return_inverse=True)
+        self._row_index = {ptid: i for i, ptid in enumerate(self.project_task_ids.tolist())}
+
+    def __len__(self):
+        return len(self.project_task_ids)
+
+    def programmer_code(self, programmer_id: Optional[int]):
+        if programmer_id is None:
+            return UNASSIGNED
+        if programmer_id not in self._programmer_index:
+            raise ValueError(f"Programmer {programmer_id} not found")
+        return self._programmer_index[programmer_id]
+
+    def row_positions(self, project_task_ids):
+        unknown = [ptid for ptid in project_task_ids if ptid not in self._row_index]
+        if unknown:
+            raise ValueError(f"Project tasks {sorted(unknown)} are not part of this estimate")
+        return np.array([self._row_index[ptid] for ptid in project_task_ids], dtype=np.int64)
+
+
+def _frame_statement(project_id: Optional[int]):
+    stmt = select(
+        models.ProjectTask.id,
+        models.Stage.project_id,
+        models.ProjectTask.stage_id,
+        models.ProjectTask.programmer_id,
+        models.ProjectTask.status,
+        models.Task.base_time_hours
+    ).join(
+        models.Stage, models.Stage.id == models.ProjectTask.stage_id
+    ).join(
+        models.Task, models.Task.id == models.ProjectTask.task_id
+    )
+    if project_id is not None:
+        stmt = stmt.where(models.Stage.project_id == project_id)
+    return stmt
+
+
+def load_frame(db: Session, project_id: Optional[int] = None):
+    # Dos consultas: las tareas (del proyecto o de toda la cartera) y todos los
+    # programadores, para poder simular reasignaciones a cualquiera de ellos
+    rows = db.execute(_frame_statement(project_id)).all()
+    programmers = db.execute(select(models.Programmer.id, models.Programmer.coefficient)).all()
+    return EstimationFrame(rows, programmers)
+
+
+def task_hours(frame: EstimationFrame, programmer_codes=None, coefficients=None):
+    codes = frame.programmer_codes if programmer_codes is None else programmer_codes
+    coefs = frame.coefficients if coefficients is None else coefficients
+    return frame.base_hours * coefs[codes]
+
+
+def apply_scenario(frame: EstimationFrame, reassignments=(), coefficient_overrides=None):
+    # Devuelve (códigos de programador, coeficientes) del escenario sin tocar el frame
+    codes = frame.programmer_codes.copy()
+    for reassignment in reassignments:
+        codes[frame.row_positions(reassignment.project_task_ids)] = frame.programmer_code(reassignment.programmer_id)
+    coefficients = frame.coefficients
+    if coefficient_overrides:
+        coefficients = coefficients.copy()
+        for programmer_id, coefficient in coefficient_overrides.items():
+            coefficients[frame.programmer_code(programmer_id)] = float(coefficient)
+    return codes, coefficients
+
+
+def summarize(frame: EstimationFrame, programmer_codes=None, coefficients=None):
+    codes = frame.programmer_codes if programmer_codes is None else programmer_codes
+    hours = task_hours(frame, codes, coefficients)
+
+    stage_hours = np.bincount(frame.stage_codes, weights=hours, minlength=len(frame.stages))
+    stage_counts = np.bincount(frame.stage_codes, minlength=len(frame.stages))
+    status_hours = np.bincount(frame.status_codes, weights=hours, minlength=len(frame.statuses))
+    # Sin asignar (-1) va a la última posición
+    slots = len(frame.programmer_ids) + 1
+    programmer_slots = np.where(codes == UNASSIGNED, slots - 1, codes)
+    programmer_hours = np.bincount(programmer_slots, weights=hours, minlength=slots)
+    programmer_counts = np.bincount(programmer_slots, minlength=slots)
+
+    programmers = [
+        {'programmer_id': int(frame.programmer_ids[i]), 'hours': _to_hours(programmer_hours[i]), 'task_count': int(programmer_counts[i])}
+        for i in np.flatnonzero(programmer_counts[:-1])
+    ]
+    if programmer_counts[-1]:
+        programmers.append({'programmer_id': None, 'hours': _to_hours(programmer_hours[-1]), 'task_count': int(programmer_counts[-1])})
+
+    return {
+        'total_hours': _to_hours(hours.sum()),
+        'stages': [
+            {'stage_id': int(stage_id), 'hours': _to_hours(h), 'task_count': int(n)}
+            for stage_id, h, n in zip(frame.stages, stage_hours, stage_counts)
+        ],
+        'statuses': {str(status): _to_hours(h) for status, h in zip(frame.statuses, status_hours)},
+        'programmers': programmers
+    }
+
+
+def estimate_project(db: Session, project_id: int, scenario=None):
+    if db.get(models.Project, project_id) is None:
+        return None
+    frame = load_frame(db, project_id)
+    baseline_total = _to_hours(task_hours(frame).sum())
+    codes, coefficients = None, None
+    if scenario is not None:
+        codes, coefficients = apply_scenario(frame, scenario.reassignments, scenario.coefficient_overrides)
+    return {
+        'project_id': project_id,
+        'baseline_total_hours': baseline_total,
+        **summarize(frame, codes, coefficients)
+    }
@@ -1,12 +1,18 @@
 
-import pandas as pd
 from sqlalchemy.orm import Session
-from app import models, schemas, crud
-from app.database import SessionLocal, engine
+from app import models, schemas, crud, catalog_import
+from app.database import SessionLocal
 from decimal import Decimal
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 def init_db():
-    models.Base.metadata.create_all(bind=engine)
+    # Aplica las migraciones pendientes (equivale a `alembic upgrade head`)
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
 
 def load_initial_data(db: Session):
     # Load Programmers
@@ -23,21 +29,11 @@ def load_initial_data(db: Session):
             crud.create_programmer(db, programmer)
     print("Programmers loaded.")
 
-    # Load Tasks from Excel
+    # Load Tasks from Excel (streaming + upsert por nombre)
     try:
-        df_tasks = pd.read_excel("/app/catalogo_tarefas_expandido.xlsx", sheet_name="Catálogo de Tarefas")
-        for index, row in df_tasks.iterrows():
-            task_type = "development" if row["Classificação"] != "Gestão" else "management"
-            task_data = {
-                "name": row["Tarefa (Português)"],
-                "description": row["Categoria"],
-                "type": task_type,
-                "base_time_hours": Decimal(str(row["Estimativa (Horas)"]))
-            }
-            if not db.query(models.Task).filter(models.Task.name == task_data["name"]).first():
-                task = schemas.TaskCreate(**task_data)
-                crud.create_task(db, task)
-        print("Tasks loaded from Excel.")
+        rows = catalog_import.read_rows("/app/catalogo_tarefas_expandido.xlsx", "xlsx")
+        stats = catalog_import.import_catalog(db, rows)
+        print(f"Tasks loaded from Excel: {stats['upserted']} tasks ({stats['rows_per_second']} rows/s).")
     except Exception as e:
         print(f"Error loading tasks from Excel: {e}")
 
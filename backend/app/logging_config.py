@@ -0,0 +1,171 @@
+# Logging de la API: los handlers de la petición solo encolan el registro y un
+# hilo (QueueListener) lo formatea y lo escribe, así la E/S de logs no suma
+# latencia. La salida es JSON (o texto con LOG_FORMAT=text), cada línea lleva
+# el request_id de la petición, y los logs de acceso de las peticiones correctas
+# se muestrean por ruta; los errores (status >= 400 o excepciones) siempre se
+# registran.
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app import config
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Atributos estándar de LogRecord; el resto se considera contexto ("extra")
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id"}
+
+access_logger = logging.getLogger("app.access")
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exception'] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(QueueHandler):
+    # Resuelve el mensaje y la traza en el hilo que registra (los args y el
+    # exc_info no son seguros de pasar a otro hilo) pero deja el formato final
+    # al handler del listener
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    if config.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+
+    handler = _QueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(config.LOG_LEVEL)
+    logging.getLogger("sqlalchemy.engine").setLevel(config.SQL_LOG_LEVEL)
+    # uvicorn instala sus propios handlers; se redirigen a la cola
+    for name in ("uvicorn", "uvicorn.error"):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+    # La línea de acceso la escribe RequestLogMiddleware con muestreo; la de
+    # uvicorn saldría siempre (además se arranca con --no-access-log)
+    access = logging.getLogger("uvicorn.access")
+    access.handlers = []
+    access.propagate = False
+    access.disabled = True
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def _parse_sample_rates(value: str):
+    # "GET /api/projects/{project_id}=0.01,GET /api/tasks/=0.1"
+    rates = {}
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        route, _, rate = part.rpartition("=")
+        rates[route.strip()] = float(rate)
+    return rates
+
+
+class RequestLogMiddleware:
+    # Asigna el request_id (X-Request-ID del cliente o uno nuevo), lo devuelve
+    # en la respuesta y escribe una línea de acceso por petición
+    def __init__(self, app):
+        self.app = app
+        self.default_rate = config.LOG_SAMPLE_RATE
+        self.rates = _parse_sample_rates(config.LOG_SAMPLE_ROUTES)
+
+    def _sampled(self, route_key: str):
+        rate = self.rates.get(route_key, self.default_rate)
+        return rate >= 1 or random.random() < rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            access_logger.exception(
+                "%s %s failed", scope["method"], scope["path"],
+                extra={'method': scope["method"], 'path': scope["path"], 'status': 500}
+            )
+            raise
+        else:
+            route = getattr(scope.get("route"), "path", scope["path"])
+            route_key = f"{scope['method']} {route}"
+            if status >= 400 or self._sampled(route_key):
+                level = logging.ERROR if status >= 500 else logging.WARNING if status >= 400 else logging.INFO
+                access_logger.log(
+                    level, "%s %s %s", scope["method"], scope["path"], status,
+                    extra={
+                        'method': scope["method"],
+                        'route': route,
+                        'path': scope["path"],
+                        'status': status,
+                        'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+                    }
+                )
+        finally:
+            request_id_var.reset(token)
@@ -1,24 +1,26 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
+from datetime import date
 import os 
 from fastapi.middleware.cors import CORSMiddleware 
+from fastapi.responses import PlainTextResponse
 import traceback
 import logging
 from sqlalchemy import text
 
-# Configurar logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
-
-from . import crud, schemas, models
-from .database import engine, get_db
+from . import crud, schemas, models, catalog_import, config, versioning, estimation, rollups, capacity, schedule, assignment, task_search
+from .logging_config import setup_logging, RequestLogMiddleware
 
-from .config import engine, get_db  # ← Cambiado de database a config
+# Logging en JSON a través de una cola (ver logging_config)
+setup_logging()
+logger = logging.getLogger(__name__)
 
-# Crea las tablas automáticamente si no existen
-models.Base.metadata.create_all(bind=engine)
+from .cache import project_cache, serialize_project_detail, json_response
+from .metrics import MetricsMiddleware, registry as metrics_registry
+from .database import engine, async_engine, get_db, get_pool_stats
 
+# El esquema se gestiona con Alembic (alembic upgrade head), no al importar
 app = FastAPI(
     title="Project Management API",
     description="API para la gestión de proyectos, tareas y programadores.",
@@ -45,6 +47,17 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Latencia, sentencias SQL y tiempo de BD por ruta, servidos en /metrics
+app.add_middleware(MetricsMiddleware)
+# request_id y log de acceso muestreado por ruta
+app.add_middleware(RequestLogMiddleware)
+
+# Con DB_ASYNC las lecturas principales se sirven desde AsyncSession; el router
+# se registra antes que las rutas síncronas para que tenga prioridad
+if config.DB_ASYNC:
+    from . import async_routes
+    app.include_router(async_routes.router)
+
 # Root
 @app.get("/", tags=["Root"])
 async def read_root():
@@ -67,6 +80,23 @@ def health_check(db: Session = Depends(get_db)):
         "message": "API is running"
     }
 
+# Estado del pool de conexiones (conexiones en uso, overflow y esperas)
+@app.get("/health/pool", tags=["Health"])
+def pool_stats():
+    stats = get_pool_stats(engine)
+    if async_engine is not None:
+        stats["async"] = get_pool_stats(async_engine.sync_engine)
+    return stats
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+# Aciertos, fallos y expulsiones de la caché del detalle de proyecto
+@app.get("/health/cache", tags=["Health"])
+def cache_stats():
+    return project_cache.stats() if project_cache is not None else {"backend": "none"}
+
 # -------------------------
 # PROGRAMMERS ENDPOINTS
 # -------------------------
@@ -75,11 +105,67 @@ def create_programmer(programmer: schemas.ProgrammerCreate, db: Session = Depend
     return crud.create_programmer(db=db, programmer=programmer)
 
 
-@app.get("/api/programmers/", response_model=List[schemas.Programmer], tags=["Programmers"])
-def read_programmers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+# Los listados aceptan `skip` (clientes antiguos, devuelve una lista) o `cursor`
+# (paginación keyset, devuelve {items, next_cursor}); la primera página se pide con `cursor=`.
+@app.get("/api/programmers/", response_model=Union[schemas.Page[schemas.Programmer], List[schemas.Programmer]], tags=["Programmers"])
+def read_programmers(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    cached = versioning.not_modified(request, response, versioning.get_versions(
+        db, [versioning.PROGRAMMERS, versioning.PROJECTS]
+    ))
+    if cached is not None:
+        return cached
+    if cursor is not None:
+        try:
+            return crud.get_programmers_page(db, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     return crud.get_programmers(db, skip=skip, limit=limit)
 
 
+@app.get("/api/programmers/workload", response_model=Union[schemas.Page[schemas.ProgrammerWorkload], List[schemas.ProgrammerWorkload]], tags=["Programmers"])
+def read_programmer_workloads(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    cached = versioning.not_modified(request, response, versioning.get_versions(
+        db, [versioning.PROGRAMMERS, versioning.PROJECTS, versioning.STAGES, versioning.TASKS]
+    ))
+    if cached is not None:
+        return cached
+    if cursor is not None:
+        try:
+            return crud.get_programmer_workloads_page(db, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return crud.get_programmer_workloads(db, skip=skip, limit=limit)
+
+
+# Capacidad semanal (app/capacity.py). Las fechas pueden ser cualquier día de la semana.
+@app.get("/api/programmers/overload", response_model=List[schemas.OverloadWeek], tags=["Programmers"])
+def read_overload_report(request: Request, response: Response, week_from: Optional[date] = None, week_to: Optional[date] = None,
+                         db: Session = Depends(get_db)):
+    versions = versioning.get_versions(db, capacity.VERSION_KEYS)
+    cached = versioning.not_modified(request, response, versions)
+    if cached is not None:
+        return cached
+    try:
+        return capacity.overload_report(capacity.get_index(db, versions), week_from, week_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/programmers/available", response_model=List[schemas.AvailableProgrammer], tags=["Programmers"])
+def read_available_programmers(request: Request, response: Response, task_id: int, project_id: Optional[int] = None,
+                               start_date: Optional[date] = None, end_date: Optional[date] = None, db: Session = Depends(get_db)):
+    versions = versioning.get_versions(db, capacity.VERSION_KEYS + [versioning.TASKS, versioning.PROJECTS])
+    cached = versioning.not_modified(request, response, versions)
+    if cached is not None:
+        return cached
+    try:
+        # El índice se cachea con las versiones de capacity.VERSION_KEYS (no con TASKS/PROJECTS)
+        index = capacity.get_index(db, {key: versions[key] for key in capacity.VERSION_KEYS})
+        return capacity.available_programmers(db, index, task_id, project_id, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/api/programmers/{programmer_id}", response_model=schemas.Programmer, tags=["Programmers"])
 def read_programmer(programmer_id: int, db: Session = Depends(get_db)):
     db_programmer = crud.get_programmer(db, programmer_id=programmer_id)
@@ -88,6 +174,22 @@ def read_programmer(programmer_id: int, db: Session = Depends(get_db)):
     return db_programmer
 
 
+@app.get("/api/programmers/{programmer_id}/capacity", response_model=schemas.ProgrammerCapacity, tags=["Programmers"])
+def read_programmer_capacity(request: Request, response: Response, programmer_id: int, week_from: Optional[date] = None,
+                             week_to: Optional[date] = None, db: Session = Depends(get_db)):
+    versions = versioning.get_versions(db, capacity.VERSION_KEYS)
+    cached = versioning.not_modified(request, response, versions)
+    if cached is not None:
+        return cached
+    try:
+        result = capacity.programmer_capacity(capacity.get_index(db, versions), programmer_id, week_from, week_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Programmer not found")
+    return result
+
+
 @app.put("/api/programmers/{programmer_id}", response_model=schemas.Programmer, tags=["Programmers"])
 def update_programmer(programmer_id: int, programmer: schemas.ProgrammerCreate, db: Session = Depends(get_db)):
     db_programmer = crud.update_programmer(db, programmer_id, programmer)
@@ -112,9 +214,47 @@ def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
     return crud.create_task(db=db, task=task)
 
 
-@app.get("/api/tasks/", response_model=List[schemas.Task], tags=["Tasks"])
-def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_tasks(db, skip=skip, limit=limit)
+@app.post("/api/tasks/import", tags=["Tasks"])
+def import_tasks(file: UploadFile = File(...), sheet: str = catalog_import.DEFAULT_SHEET, db: Session = Depends(get_db)):
+    file_format = "csv" if (file.filename or "").lower().endswith(".csv") else "xlsx"
+    try:
+        return catalog_import.import_catalog(db, catalog_import.read_rows(file.file, file_format, sheet))
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid catalog file: {str(e)}")
+    except Exception as e:
+        logger.exception("Error importando catálogo")
+        raise HTTPException(status_code=500, detail=f"Error interno al importar catálogo: {str(e)}")
+
+
+# Filtros y `sort` (clave de crud.*_SORT_KEYS, "-clave" descendente) se
+# traducen a SQL; una clave de orden no admitida devuelve 400.
+@app.get("/api/tasks/", response_model=Union[schemas.Page[schemas.Task], List[schemas.Task]], tags=["Tasks"])
+def read_tasks(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+               filters: schemas.TaskFilters = Depends(), sort: str = "name", db: Session = Depends(get_db)):
+    cached = versioning.not_modified(request, response, versioning.get_versions(db, [versioning.TASKS]))
+    if cached is not None:
+        return cached
+    try:
+        if cursor is not None:
+            return crud.get_tasks_page(db, cursor=cursor, limit=limit, filters=filters, sort=sort)
+        return crud.get_tasks(db, skip=skip, limit=limit, filters=filters, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Búsqueda por nombre y descripción (app/task_search.py); con prefix=true la
+# última palabra autocompleta. Declarada antes de /api/tasks/{task_id}.
+@app.get("/api/tasks/search", response_model=List[schemas.TaskSearchResult], tags=["Tasks"])
+def search_tasks(request: Request, response: Response, q: str, type: Optional[str] = None, prefix: bool = True,
+                 limit: int = 20, db: Session = Depends(get_db)):
+    versions = versioning.get_versions(db, task_search.VERSION_KEYS)
+    cached = versioning.not_modified(request, response, versions)
+    if cached is not None:
+        return cached
+    try:
+        return task_search.search(db, q, task_type=type, prefix=prefix, limit=limit, versions=versions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/api/tasks/{task_id}", response_model=schemas.Task, tags=["Tasks"])
@@ -144,16 +284,25 @@ def delete_task(task_id: int, db: Session = Depends(get_db)):
 # -------------------------
 # PROJECTS ENDPOINTS
 # -------------------------
-@app.get("/api/projects/", response_model=List[schemas.Project], tags=["Projects"])
-def read_projects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.get("/api/projects/", response_model=Union[schemas.Page[schemas.Project], List[schemas.Project]], tags=["Projects"])
+def read_projects(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                  filters: schemas.ProjectFilters = Depends(), sort: str = "name", db: Session = Depends(get_db)):
+    cached = versioning.not_modified(request, response, versioning.get_versions(
+        db, [versioning.PROJECTS, versioning.PROGRAMMERS]
+    ))
+    if cached is not None:
+        return cached
+    if cursor is not None:
+        try:
+            return crud.get_projects_page(db, cursor=cursor, limit=limit, filters=filters, sort=sort)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        logger.info("Ejecutando get_projects")
-        projects = crud.get_projects(db, skip=skip, limit=limit)
-        logger.info(f"Proyectos obtenidos: {len(projects)}")
-        return projects
-    except Exception as e:
-        logger.error(f"Error en /api/projects/: {str(e)}")
-        logger.error(traceback.format_exc())
+        return crud.get_projects(db, skip=skip, limit=limit, filters=filters, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        logger.exception("Error en /api/projects/")
         # Devuelve una lista vacía temporalmente para evitar el error 500
         return []
 
@@ -163,41 +312,146 @@ def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)
     try:
         return crud.create_project(db=db, project=project)
     except Exception as e:
-        logger.error(f"Error creando proyecto: {str(e)}")
+        logger.exception("Error creando proyecto")
+        raise HTTPException(status_code=500, detail=f"Error interno al crear proyecto: {str(e)}")
+
+
+@app.post("/api/projects/full", response_model=schemas.ProjectDetail, tags=["Projects"])
+def create_project_full(project: schemas.ProjectCreateWithStages, db: Session = Depends(get_db)):
+    try:
+        return crud.create_project_with_stages(db=db, project_data=project)
+    except Exception as e:
+        logger.exception("Error creando proyecto completo")
         raise HTTPException(status_code=500, detail=f"Error interno al crear proyecto: {str(e)}")
 
 
 @app.get("/api/projects/{project_id}", response_model=schemas.ProjectDetail, tags=["Projects"])
-def read_project(project_id: int, db: Session = Depends(get_db)):
+def read_project(project_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    key = versioning.project_key(project_id)
+    versions = versioning.get_versions(db, [key])
+    cached = versioning.not_modified(request, response, versions)
+    if cached is not None:
+        return cached
+    if project_cache is not None:
+        payload = project_cache.get(project_id, versions[key])
+        if payload is not None:
+            return json_response(payload, response.headers["ETag"])
     try:
-        logger.info(f"🔍 Buscando proyecto ID: {project_id}")
-        
-        # Log para verificar la sesión de BD
-        try:
-            db.execute(text("SELECT 1"))
-            logger.info("✅ Conexión a BD activa")
-        except Exception as e:
-            logger.error(f"❌ Error de conexión a BD: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Database connection error: {str(e)}")
-        
         db_project = crud.get_project_with_details(db, project_id=project_id)
-        logger.info(f"📊 Resultado de get_project_with_details: {db_project is not None}")
-        
         if db_project is None:
-            logger.warning(f"⚠️ Proyecto {project_id} no encontrado")
             raise HTTPException(status_code=404, detail="Project not found")
-        
-        logger.info(f"✅ Proyecto {project_id} encontrado, retornando datos")
+        if project_cache is not None:
+            payload = serialize_project_detail(db_project)
+            project_cache.set(project_id, versions[key], payload)
+            return json_response(payload, response.headers["ETag"])
         return db_project
         
     except HTTPException:
         # Re-lanzar excepciones HTTP directamente
         raise
     except Exception as e:
-        logger.error(f"💥 Error crítico en /api/projects/{project_id}: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error crítico en /api/projects/%s", project_id)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.post("/api/projects/{project_id}/estimate", response_model=schemas.ProjectEstimate, tags=["Projects"])
+def estimate_project(project_id: int, scenario: Optional[schemas.EstimateScenario] = None, db: Session = Depends(get_db)):
+    # Simulación "qué pasa si": recalcula los totales con las reasignaciones y
+    # coeficientes indicados sin escribir nada
+    try:
+        estimate = estimation.estimate_project(db, project_id, scenario)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if estimate is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return estimate
+
+# ========== ANALYTICS ENDPOINTS ==========
+ANALYTICS_VERSIONS = [versioning.ANALYTICS, versioning.PROGRAMMERS]
+
+@app.get("/api/analytics/summary", response_model=schemas.PortfolioSummary, tags=["Analytics"])
+def read_portfolio_summary(request: Request, response: Response, start_from: Optional[date] = None, start_to: Optional[date] = None,
+                           end_from: Optional[date] = None, end_to: Optional[date] = None, db: Session = Depends(get_db)):
+    cached = versioning.not_modified(request, response, versioning.get_versions(db, ANALYTICS_VERSIONS))
+    if cached is not None:
+        return cached
+    return rollups.get_summary(db, start_from, start_to, end_from, end_to)
+
+@app.get("/api/analytics/projects", response_model=schemas.Page[schemas.ProjectTotals], tags=["Analytics"])
+def read_project_totals(request: Request, response: Response, cursor: Optional[str] = None, limit: int = 100,
+                        start_from: Optional[date] = None, start_to: Optional[date] = None,
+                        end_from: Optional[date] = None, end_to: Optional[date] = None, db: Session = Depends(get_db)):
+    cached = versioning.not_modified(request, response, versioning.get_versions(db, ANALYTICS_VERSIONS + [versioning.PROJECTS]))
+    if cached is not None:
+        return cached
+    try:
+        return rollups.get_project_totals(db, cursor, limit, start_from, start_to, end_from, end_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/analytics/timeline", response_model=List[schemas.TimelinePoint], tags=["Analytics"])
+def read_portfolio_timeline(request: Request, response: Response, field: str = "start", date_from: Optional[str] = None,
+                            date_to: Optional[str] = None, db: Session = Depends(get_db)):
+    # date_from / date_to en formato "YYYY-MM"
+    cached = versioning.not_modified(request, response, versioning.get_versions(db, ANALYTICS_VERSIONS))
+    if cached is not None:
+        return cached
+    try:
+        return rollups.get_timeline(db, field, date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# ========== SCHEDULE ENDPOINTS ==========
+# Fechas de fin proyectadas (app/schedule.py) a partir de as_of (por defecto hoy)
+@app.get("/api/schedule/projects", response_model=List[schemas.ProjectScheduleSummary], tags=["Schedule"])
+def read_portfolio_schedule(request: Request, response: Response, as_of: Optional[date] = None, late_only: bool = False,
+                            skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    as_of = as_of or date.today()
+    cached = versioning.not_modified(request, response, {
+        **versioning.get_versions(db, [versioning.ANALYTICS, versioning.PROJECTS]), 'as_of': as_of.isoformat()
+    })
+    if cached is not None:
+        return cached
+    return schedule.portfolio(schedule.get_engine(db, as_of), late_only, skip, limit)
+
+@app.get("/api/projects/{project_id}/schedule", response_model=schemas.ProjectSchedule, tags=["Schedule"])
+def read_project_schedule(request: Request, response: Response, project_id: int, as_of: Optional[date] = None,
+                          db: Session = Depends(get_db)):
+    as_of = as_of or date.today()
+    # Depende también de los proyectos que comparten programadores
+    cached = versioning.not_modified(request, response, {
+        **versioning.get_versions(db, [versioning.ANALYTICS, versioning.PROJECTS]), 'as_of': as_of.isoformat()
+    })
+    if cached is not None:
+        return cached
+    result = schedule.get_engine(db, as_of).project(project_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return result
+
+# ========== AUTO-ASSIGN ENDPOINTS ==========
+# Propone programadores para las tareas sin asignar (app/assignment.py); con
+# apply=true además los guarda
+def _auto_assign(db: Session, request: schemas.AutoAssignRequest, project_ids):
+    try:
+        result = assignment.propose(db, project_ids, request.programmer_ids, request.as_of)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.apply:
+        applied = crud.assign_project_tasks(db, {a['project_task_id']: a['programmer_id'] for a in result['assignments']})
+        result['applied'] = len(applied)
+    return result
+
+@app.post("/api/projects/{project_id}/auto-assign", response_model=schemas.AutoAssignResult, tags=["Projects"])
+def auto_assign_project(project_id: int, request: Optional[schemas.AutoAssignRequest] = None, db: Session = Depends(get_db)):
+    if db.get(models.Project, project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return _auto_assign(db, request or schemas.AutoAssignRequest(), [project_id])
+
+@app.post("/api/auto-assign", response_model=schemas.AutoAssignResult, tags=["Projects"])
+def auto_assign_portfolio(request: Optional[schemas.PortfolioAutoAssignRequest] = None, db: Session = Depends(get_db)):
+    request = request or schemas.PortfolioAutoAssignRequest()
+    return _auto_assign(db, request, request.project_ids)
+
 @app.get("/api/debug/projects-simple", tags=["Debug"])
 def debug_projects_simple(db: Session = Depends(get_db)):
     try:
@@ -242,9 +496,20 @@ def create_stage(stage: schemas.StageCreate, db: Session = Depends(get_db)):
     return crud.create_stage(db=db, stage=stage)
 
 
-@app.get("/api/stages/", response_model=List[schemas.Stage], tags=["Stages"])
-def read_stages(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_stages(db, skip=skip, limit=limit)
+@app.get("/api/stages/", response_model=Union[schemas.Page[schemas.Stage], List[schemas.Stage]], tags=["Stages"])
+def read_stages(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                filters: schemas.StageFilters = Depends(), sort: str = "project_id", db: Session = Depends(get_db)):
+    cached = versioning.not_modified(request, response, versioning.get_versions(
+        db, [versioning.STAGES, versioning.TASKS, versioning.PROGRAMMERS]
+    ))
+    if cached is not None:
+        return cached
+    try:
+        if cursor is not None:
+            return crud.get_stages_page(db, cursor=cursor, limit=limit, filters=filters, sort=sort)
+        return crud.get_stages(db, skip=skip, limit=limit, filters=filters, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/api/stages/{stage_id}", response_model=schemas.Stage, tags=["Stages"])
@@ -263,6 +528,17 @@ def update_stage(stage_id: int, stage: schemas.StageUpdate, db: Session = Depend
     return db_stage
 
 
+@app.put("/api/stages/{stage_id}/tasks", response_model=List[schemas.ProjectTask], tags=["Stages"])
+def replace_stage_tasks(stage_id: int, project_tasks: List[schemas.StageTaskSync], db: Session = Depends(get_db)):
+    try:
+        db_project_tasks = crud.replace_stage_tasks(db, stage_id, project_tasks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if db_project_tasks is None:
+        raise HTTPException(status_code=404, detail="Stage not found")
+    return db_project_tasks
+
+
 @app.delete("/api/stages/{stage_id}", tags=["Stages"])
 def delete_stage(stage_id: int, db: Session = Depends(get_db)):
     success = crud.delete_stage(db, stage_id)
@@ -310,6 +586,19 @@ def create_project_task(project_task: schemas.ProjectTaskCreate, db: Session = D
     return crud.create_project_task(db=db, project_task=project_task)
 
 
+@app.get("/api/project-tasks/", response_model=List[schemas.ProjectTask], tags=["Project Tasks"])
+def read_project_tasks(stage_id: Optional[int] = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    return crud.get_project_tasks(db, stage_id=stage_id, skip=skip, limit=limit)
+
+
+@app.patch("/api/project-tasks/bulk", response_model=schemas.ProjectTaskBulkResult, tags=["Project Tasks"])
+def bulk_update_project_tasks(bulk: schemas.ProjectTaskBulkUpdate, db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_update_project_tasks(db, bulk)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.put("/api/project-tasks/{project_task_id}", response_model=schemas.ProjectTask, tags=["Project Tasks"])
 def update_project_task(project_task_id: int, project_task: schemas.ProjectTaskUpdate, db: Session = Depends(get_db)):
     db_project_task = crud.update_project_task(db, project_task_id, project_task)
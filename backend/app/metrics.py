@@ -0,0 +1,174 @@
+# Métricas por ruta en formato de texto de Prometheus (/metrics).
+#
+# MetricsMiddleware abre un contador por petición en un ContextVar y los hooks
+# before/after_cursor_execute del Engine suman ahí cada sentencia SQL y su
+# duración. Al terminar la petición se registran, por plantilla de ruta
+# (/api/projects/{project_id}, no la URL concreta), la latencia, el número de
+# sentencias y el tiempo de BD. Un N+1 aparece como un salto en
+# db_statements_per_request para esa ruta.
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+UNMATCHED_ROUTE = "<unmatched>"
+INF_LABEL = 'le="+Inf"'
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Objeto mutable: el threadpool de las rutas síncronas recibe una copia del
+# contexto, pero apunta al mismo RequestStats
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.statements = {}
+        self.db_seconds = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        with self._lock:
+            key = (method, route, str(status))
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            key = (method, route)
+            self.statements.setdefault(key, Histogram(STATEMENT_BUCKETS)).observe(stats.statements)
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + stats.db_seconds
+
+    def reset(self):
+        with self._lock:
+            self.latency.clear()
+            self.statements.clear()
+            self.db_seconds.clear()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            _render_histogram(
+                lines, "http_request_duration_seconds", "Request latency by route template",
+                ("method", "route", "status"), self.latency
+            )
+            _render_histogram(
+                lines, "db_statements_per_request", "SQL statements executed per request",
+                ("method", "route"), self.statements
+            )
+            lines.append("# HELP db_statements_total SQL statements executed by route template")
+            lines.append("# TYPE db_statements_total counter")
+            for key, histogram in sorted(self.statements.items()):
+                lines.append(f"db_statements_total{_labels(('method', 'route'), key)} {histogram.sum:g}")
+            lines.append("# HELP db_seconds_total Time spent in SQL statements by route template")
+            lines.append("# TYPE db_seconds_total counter")
+            for key, seconds in sorted(self.db_seconds.items()):
+                lines.append(f"db_seconds_total{_labels(('method', 'route'), key)} {seconds:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra: str = ""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _render_histogram(lines, name, help_text, label_names, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            le = 'le="%g"' % bound
+            lines.append(f"{name}_bucket{_labels(label_names, key, le)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(label_names, key, INF_LABEL)} {histogram.total}")
+        lines.append(f"{name}_sum{_labels(label_names, key)} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{_labels(label_names, key)} {histogram.total}")
+
+
+registry = Registry()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_started")
+    if started:
+        stats.db_seconds += time.perf_counter() - started.pop()
+    stats.statements += 1
+
+
+class MetricsMiddleware:
+    # Middleware ASGI puro: no envuelve la respuesta como BaseHTTPMiddleware
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            # FastAPI deja la ruta resuelta en el scope; sin ella (404) se agrupa
+            # todo bajo una etiqueta para no crear una serie por URL
+            route = scope.get("route")
+            registry.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - started,
+                stats
+            )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, DECIMAL, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -25,9 +25,10 @@ class Task(Base):
     __tablename__ = "tasks"
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
+    # Único: el importador del catálogo hace upsert por nombre
+    name = Column(String, index=True, unique=True)
     description = Column(String)
-    type = Column(String)
+    type = Column(String, index=True)
     base_time_hours = Column(DECIMAL(5, 2))
     
     project_tasks = relationship("ProjectTask", back_populates="task")
@@ -39,9 +40,16 @@ class Project(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     description = Column(String)
-    start_date = Column(Date)
-    end_date = Column(Date)
-    responsible_id = Column(Integer, ForeignKey("programmers.id"), nullable=True)
+    # Indexadas para los filtros por rango y el orden de GET /api/projects/
+    start_date = Column(Date, index=True)
+    end_date = Column(Date, index=True)
+    responsible_id = Column(Integer, ForeignKey("programmers.id"), nullable=True, index=True)
+    # Totales guardados; los mantiene app/totals.py al confirmar cada escritura
+    estimated_hours = Column(DECIMAL(12, 2), nullable=False, default=0, server_default="0")
+    task_count = Column(Integer, nullable=False, default=0, server_default="0")
+    pending_count = Column(Integer, nullable=False, default=0, server_default="0")
+    in_progress_count = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relación al programador responsable
     responsible = relationship(
@@ -63,10 +71,16 @@ class Stage(Base):
     __tablename__ = "stages"
     
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     name = Column(String, index=True)
     description = Column(String, nullable=True)
     order_index = Column(Integer, nullable=False, default=0)
+    # Totales guardados (ver Project)
+    estimated_hours = Column(DECIMAL(12, 2), nullable=False, default=0, server_default="0")
+    task_count = Column(Integer, nullable=False, default=0, server_default="0")
+    pending_count = Column(Integer, nullable=False, default=0, server_default="0")
+    in_progress_count = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     project = relationship("Project", back_populates="stages")
     project_tasks = relationship(
@@ -78,14 +92,67 @@ class Stage(Base):
 
 class ProjectTask(Base):
     __tablename__ = "project_tasks"
+    # stage_id y programmer_id se indexan a través de los índices compuestos,
+    # que también sirven para filtrar solo por su primera columna
+    __table_args__ = (
+        Index("ix_project_tasks_stage_id_status", "stage_id", "status"),
+        Index("ix_project_tasks_programmer_id_status", "programmer_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     stage_id = Column(Integer, ForeignKey("stages.id"), nullable=False)
-    task_id = Column(Integer, ForeignKey("tasks.id"))
+    task_id = Column(Integer, ForeignKey("tasks.id"), index=True)
     programmer_id = Column(Integer, ForeignKey("programmers.id"), nullable=True)
     assigned_time_hours = Column(DECIMAL(5, 2), nullable=True)
-    status = Column(String, default="pending")
+    status = Column(String, default="pending", index=True)
     
     stage = relationship("Stage", back_populates="project_tasks")
     task = relationship("Task", back_populates="project_tasks")
-    programmer = relationship("Programmer", back_populates="project_tasks")
\ No newline at end of file
+    programmer = relationship("Programmer", back_populates="project_tasks")
+
+class ProjectRollup(Base):
+    # Horas y número de tareas de un proyecto agregadas por programador
+    # asignado, estado y tipo de tarea (ver app/rollups.py). Sin clave foránea:
+    # las filas de un proyecto borrado se eliminan al refrescarlo.
+    __tablename__ = "project_rollups"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, nullable=False, index=True)
+    programmer_id = Column(Integer, nullable=True, index=True)
+    responsible_id = Column(Integer, nullable=True)
+    status = Column(String, nullable=False)
+    task_type = Column(String, nullable=True)
+    start_date = Column(Date, nullable=True)
+    end_date = Column(Date, nullable=True)
+    hours = Column(DECIMAL(14, 4), nullable=False, default=0)
+    task_count = Column(Integer, nullable=False, default=0)
+
+
+class PortfolioRollup(Base):
+    # Totales de toda la cartera por dimensión ("status", "programmer", ...)
+    __tablename__ = "portfolio_rollups"
+
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    hours = Column(DECIMAL(16, 4), nullable=False, default=0)
+    task_count = Column(Integer, nullable=False, default=0)
+
+
+class PortfolioRollupDelta(Base):
+    # Diferencias pendientes de sumar a portfolio_rollups: las escrituras solo
+    # insertan aquí y fold_deltas (app/rollups.py) las pliega por lotes
+    __tablename__ = "portfolio_rollup_deltas"
+
+    id = Column(Integer, primary_key=True)
+    dimension = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    hours = Column(DECIMAL(16, 4), nullable=False, default=0)
+    task_count = Column(Integer, nullable=False, default=0)
+
+
+class ResourceVersion(Base):
+    # Contador de versión por recurso para los ETag de las lecturas
+    __tablename__ = "resource_versions"
+
+    key = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,405 @@
+# Agregados de cartera para la analítica (/api/analytics/*).
+#
+# Dos niveles:
+#   project_rollups    una fila por (proyecto, programador asignado, estado,
+#                      tipo de tarea) con horas y número de tareas, más los
+#                      datos del proyecto por los que se filtra (responsable,
+#                      fechas)
+#   portfolio_rollups  totales de toda la cartera por dimensión (estado, tipo,
+#                      programador, responsable, mes de inicio y de fin); su
+#                      tamaño no depende del número de proyectos
+#
+# Refresco incremental: versioning.bump anota en la sesión los proyectos cuyo
+# detalle cambia (tareas del proyecto, coeficiente del programador, horas base
+# de la tarea, fechas...). Antes del commit se bloquean las filas de esos
+# proyectos (SELECT ... FOR UPDATE) y se recalculan solo ellos, en la misma
+# transacción que la escritura. La diferencia con sus filas anteriores no se
+# suma directamente a portfolio_rollups (sus filas las tocan todas las
+# escrituras y serializarían a los escritores): se inserta en
+# portfolio_rollup_deltas, las lecturas suman las pendientes y fold_deltas las
+# pliega cada ROLLUP_FOLD_EVERY commits o con "python -m app.rollups fold". El
+# mismo listener mantiene los totales guardados en stages y projects
+# (app/totals.py).
+import argparse
+import itertools
+import re
+from collections import defaultdict
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import delete, event, func, select, union_all, update
+from sqlalchemy.orm import Session
+
+from app import config, models, totals, versioning
+
+NONE_KEY = "none"
+REBUILD_BATCH = 1000
+# Clave del advisory lock de PostgreSQL que evita dos plegados a la vez
+FOLD_LOCK_ID = 740019
+MONTH_PATTERN = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+def _key(value):
+    return NONE_KEY if value is None else str(value)
+
+
+def _month(value):
+    return NONE_KEY if value is None else value.strftime("%Y-%m")
+
+
+def _project_rows_statement(project_ids=None, programmer_id=None):
+    hours = models.Task.base_time_hours * func.coalesce(models.Programmer.coefficient, 1)
+    status = func.coalesce(models.ProjectTask.status, "pending")
+    stmt = select(
+        models.Stage.project_id,
+        models.ProjectTask.programmer_id,
+        models.Project.responsible_id,
+        status.label("status"),
+        models.Task.type.label("task_type"),
+        models.Project.start_date,
+        models.Project.end_date,
+        func.sum(hours).label("hours"),
+        func.count().label("task_count")
+    ).join(
+        models.Stage, models.Stage.id == models.ProjectTask.stage_id
+    ).join(
+        models.Project, models.Project.id == models.Stage.project_id
+    ).join(
+        models.Task, models.Task.id == models.ProjectTask.task_id
+    ).outerjoin(
+        models.Programmer, models.Programmer.id == models.ProjectTask.programmer_id
+    ).group_by(
+        models.Stage.project_id,
+        models.ProjectTask.programmer_id,
+        models.Project.responsible_id,
+        status,
+        models.Task.type,
+        models.Project.start_date,
+        models.Project.end_date
+    )
+    if project_ids is not None:
+        stmt = stmt.where(models.Stage.project_id.in_(project_ids))
+    if programmer_id is not None:
+        stmt = stmt.where(models.ProjectTask.programmer_id == programmer_id)
+    return stmt
+
+
+def _contributions(rows, sign: int, totals):
+    for row in rows:
+        hours = Decimal(str(row.hours or 0)) * sign
+        count = row.task_count * sign
+        for dimension, key in (
+            ("status", row.status),
+            ("task_type", _key(row.task_type)),
+            ("programmer", _key(row.programmer_id)),
+            ("responsible", _key(row.responsible_id)),
+            ("start_month", _month(row.start_date)),
+            ("end_month", _month(row.end_date)),
+        ):
+            entry = totals[(dimension, key)]
+            entry[0] += hours
+            entry[1] += count
+
+
+def _delta_rows(totals):
+    # Ordenadas por (dimensión, clave): los bloqueos de fila se toman siempre
+    # en el mismo orden, como en versioning.bump
+    return [
+        {'dimension': dimension, 'key': key, 'hours': hours, 'task_count': count}
+        for (dimension, key), (hours, count) in sorted(totals.items())
+        if hours or count
+    ]
+
+
+def _apply_deltas(db: Session, rows):
+    if not rows:
+        return
+    table = models.PortfolioRollup.__table__
+    insert = versioning.dialect_insert(db)
+    if insert is not None:
+        stmt = insert(table)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.dimension, table.c.key],
+            set_={
+                'hours': table.c.hours + stmt.excluded.hours,
+                'task_count': table.c.task_count + stmt.excluded.task_count
+            }
+        ), rows)
+    else:
+        for row in rows:
+            updated = db.execute(
+                update(table).where(
+                    table.c.dimension == row['dimension'], table.c.key == row['key']
+                ).values(hours=table.c.hours + row['hours'], task_count=table.c.task_count + row['task_count'])
+            ).rowcount
+            if not updated:
+                db.execute(table.insert().values(**row))
+    # Solo puede quedar a cero una clave que pierde tareas
+    if any(row['task_count'] < 0 for row in rows):
+        db.execute(delete(table).where(table.c.task_count == 0))
+
+
+def _snapshot(rows):
+    return sorted(
+        (row.project_id, _key(row.programmer_id), _key(row.responsible_id), row.status, _key(row.task_type),
+         _key(row.start_date), _key(row.end_date), Decimal(str(row.hours or 0)), row.task_count)
+        for row in rows
+    )
+
+
+def _replace_rows(db: Session, condition, stmt):
+    # Sustituye las filas de project_rollups que cumplen condition por las de
+    # stmt y encola la diferencia para la cartera
+    rollup = models.ProjectRollup
+    old = db.execute(select(rollup.__table__).where(condition)).all()
+    new = db.execute(stmt).all()
+
+    # Cambios que no tocan las horas (nombre de etapa, descripción...)
+    if _snapshot(old) == _snapshot(new):
+        return
+
+    totals = defaultdict(lambda: [Decimal("0"), 0])
+    _contributions(old, -1, totals)
+    _contributions(new, 1, totals)
+
+    if old:
+        db.execute(delete(rollup).where(condition), execution_options={'synchronize_session': False})
+    if new:
+        db.execute(models.ProjectRollup.__table__.insert(), [dict(row._mapping) for row in new])
+    rows = _delta_rows(totals)
+    if rows:
+        db.execute(models.PortfolioRollupDelta.__table__.insert(), rows)
+
+
+def refresh_projects(db: Session, project_ids):
+    # Recalcula los agregados de esos proyectos y aplica la diferencia a la cartera
+    project_ids = sorted(set(project_ids))
+    if project_ids:
+        _replace_rows(db, models.ProjectRollup.project_id.in_(project_ids), _project_rows_statement(project_ids))
+
+
+def refresh_programmer(db: Session, programmer_id: int):
+    # Cambio de coeficiente: solo cambian las filas de sus tareas
+    _replace_rows(
+        db, models.ProjectRollup.programmer_id == programmer_id, _project_rows_statement(programmer_id=programmer_id)
+    )
+
+
+def lock_projects(db: Session, project_ids):
+    # Dos transacciones sobre el mismo proyecto no pueden partir de la misma
+    # foto. SQLite no tiene FOR UPDATE ni le hace falta (un solo escritor)
+    if db.get_bind().dialect.name == "sqlite":
+        return
+    db.execute(
+        select(models.Project.id).where(models.Project.id.in_(sorted(project_ids)))
+        .order_by(models.Project.id).with_for_update()
+    ).all()
+
+
+def fold_deltas(db: Session):
+    # Pliega las diferencias pendientes en portfolio_rollups; devuelve cuántas
+    if db.get_bind().dialect.name == "postgresql":
+        if not db.scalar(select(func.pg_try_advisory_xact_lock(FOLD_LOCK_ID))):
+            return 0
+    table = models.PortfolioRollupDelta.__table__
+    pending = db.execute(delete(table).returning(table.c.dimension, table.c.key, table.c.hours, table.c.task_count)).all()
+    totals = defaultdict(lambda: [Decimal("0"), 0])
+    for dimension, key, hours, count in pending:
+        entry = totals[(dimension, key)]
+        entry[0] += Decimal(str(hours))
+        entry[1] += count
+    _apply_deltas(db, _delta_rows(totals))
+    return len(pending)
+
+
+def rebuild(db: Session):
+    # Reconstrucción completa (primera carga o reparación)
+    db.execute(delete(models.ProjectRollup))
+    db.execute(delete(models.PortfolioRollup))
+    db.execute(delete(models.PortfolioRollupDelta))
+    totals = defaultdict(lambda: [Decimal("0"), 0])
+    project_ids = db.scalars(select(models.Project.id).order_by(models.Project.id)).all()
+    for start in range(0, len(project_ids), REBUILD_BATCH):
+        rows = db.execute(_project_rows_statement(project_ids[start:start + REBUILD_BATCH])).all()
+        if rows:
+            db.execute(models.ProjectRollup.__table__.insert(), [dict(row._mapping) for row in rows])
+        _contributions(rows, 1, totals)
+    _apply_deltas(db, _delta_rows(totals))
+
+
+_commits = itertools.count(1)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_before_commit(session):
+    project_ids = session.info.pop(versioning.CHANGED_PROJECTS, None) or set()
+    programmers = session.info.pop(versioning.CHANGED_PROGRAMMERS, None) or {}
+    if project_ids or programmers:
+        # Los borrados en cascada del ORM aún no se han enviado
+        session.flush()
+        touched = project_ids.union(*programmers.values())
+        lock_projects(session, touched)
+        totals.refresh_projects(session, touched)
+        refresh_projects(session, project_ids)
+        for programmer_id in sorted(programmers):
+            refresh_programmer(session, programmer_id)
+        if next(_commits) % config.ROLLUP_FOLD_EVERY == 0:
+            fold_deltas(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(versioning.CHANGED_PROJECTS, None)
+    session.info.pop(versioning.CHANGED_PROGRAMMERS, None)
+
+
+# ========== CONSULTAS ==========
+def _to_hours(value):
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+def _portfolio_statement(dimension: Optional[str] = None):
+    # portfolio_rollups más las diferencias aún sin plegar
+    parts = []
+    for table in (models.PortfolioRollup.__table__, models.PortfolioRollupDelta.__table__):
+        part = select(table.c.dimension, table.c.key, table.c.hours, table.c.task_count)
+        parts.append(part if dimension is None else part.where(table.c.dimension == dimension))
+    combined = union_all(*parts).subquery()
+    return select(
+        combined.c.dimension,
+        combined.c.key,
+        func.sum(combined.c.hours).label("hours"),
+        func.sum(combined.c.task_count).label("task_count")
+    ).group_by(combined.c.dimension, combined.c.key).having(func.sum(combined.c.task_count) != 0)
+
+
+def _programmer_names(db: Session):
+    return {str(pid): name for pid, name in db.execute(select(models.Programmer.id, models.Programmer.name))}
+
+
+def _date_filters(column_start, column_end, start_from=None, start_to=None, end_from=None, end_to=None):
+    conditions = []
+    if start_from is not None:
+        conditions.append(column_start >= start_from)
+    if start_to is not None:
+        conditions.append(column_start <= start_to)
+    if end_from is not None:
+        conditions.append(column_end >= end_from)
+    if end_to is not None:
+        conditions.append(column_end <= end_to)
+    return conditions
+
+
+def get_summary(db: Session, start_from=None, start_to=None, end_from=None, end_to=None):
+    rollup = models.ProjectRollup
+    conditions = _date_filters(rollup.start_date, rollup.end_date, start_from, start_to, end_from, end_to)
+    buckets = defaultdict(list)
+    if not conditions:
+        # Sin filtros de fecha: directamente de portfolio_rollups
+        for dimension, key, hours, count in db.execute(_portfolio_statement()):
+            buckets[dimension].append((key, hours, count))
+    else:
+        columns = {
+            "status": rollup.status,
+            "task_type": rollup.task_type,
+            "programmer": rollup.programmer_id,
+            "responsible": rollup.responsible_id,
+        }
+        for dimension, column in columns.items():
+            stmt = select(column, func.sum(rollup.hours), func.sum(rollup.task_count)).where(*conditions).group_by(column)
+            for key, hours, count in db.execute(stmt):
+                buckets[dimension].append((_key(key), hours, count))
+
+    names = _programmer_names(db) if buckets["programmer"] or buckets["responsible"] else {}
+
+    def rows(dimension):
+        return sorted(
+            (
+                {'key': key, 'label': names.get(key) if dimension in ("programmer", "responsible") else None,
+                 'hours': _to_hours(hours), 'task_count': int(count)}
+                for key, hours, count in buckets[dimension]
+            ),
+            key=lambda r: r['hours'], reverse=True
+        )
+
+    by_status = rows("status")
+    return {
+        'total_hours': _to_hours(sum((r['hours'] for r in by_status), Decimal("0"))),
+        'task_count': sum(r['task_count'] for r in by_status),
+        'by_status': by_status,
+        'by_task_type': rows("task_type"),
+        'by_programmer': rows("programmer"),
+        'by_responsible': rows("responsible")
+    }
+
+
+def get_timeline(db: Session, field: str = "start", date_from: Optional[str] = None, date_to: Optional[str] = None):
+    # Meses "YYYY-MM" de start_date o end_date; "none" = proyectos sin fecha
+    if field not in ("start", "end"):
+        raise ValueError("field must be 'start' or 'end'")
+    for value in (date_from, date_to):
+        if value is not None and not MONTH_PATTERN.fullmatch(value):
+            raise ValueError(f"Invalid month '{value}', expected YYYY-MM")
+    table = _portfolio_statement(f"{field}_month").subquery()
+    stmt = select(table.c.key, table.c.hours, table.c.task_count)
+    if date_from is not None:
+        stmt = stmt.where(table.c.key >= date_from, table.c.key != NONE_KEY)
+    if date_to is not None:
+        stmt = stmt.where(table.c.key <= date_to, table.c.key != NONE_KEY)
+    return [
+        {'month': key, 'hours': _to_hours(hours), 'task_count': int(count)}
+        for key, hours, count in db.execute(stmt.order_by(table.c.key))
+    ]
+
+
+def get_project_totals(db: Session, cursor: Optional[str] = None, limit: int = 100,
+                       start_from=None, start_to=None, end_from=None, end_to=None):
+    # Página de proyectos (keyset por nombre) y sus totales por estado
+    from app import crud
+
+    project = models.Project
+    stmt = select(project.id, project.name, project.responsible_id, project.start_date, project.end_date).where(
+        *_date_filters(project.start_date, project.end_date, start_from, start_to, end_from, end_to)
+    )
+    stmt = crud._keyset_order(stmt, project.name, project.id, cursor).limit(limit + 1)
+    page = crud._next_page([dict(row._mapping) for row in db.execute(stmt)], limit, 'name')
+
+    ids = [item['id'] for item in page['items']]
+    totals = defaultdict(dict)
+    if ids:
+        rollup = models.ProjectRollup
+        for project_id, status, hours, count in db.execute(
+            select(rollup.project_id, rollup.status, func.sum(rollup.hours), func.sum(rollup.task_count))
+            .where(rollup.project_id.in_(ids))
+            .group_by(rollup.project_id, rollup.status)
+        ):
+            totals[project_id][status] = (hours, count)
+    for item in page['items']:
+        by_status = totals.get(item['id'], {})
+        item['by_status'] = {status: _to_hours(hours) for status, (hours, _) in by_status.items()}
+        item['total_hours'] = _to_hours(sum((Decimal(str(h or 0)) for h, _ in by_status.values()), Decimal("0")))
+        item['task_count'] = int(sum(c for _, c in by_status.values()))
+    return page
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregados de cartera")
+    parser.add_argument("command", choices=["rebuild", "fold"])
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "fold":
+            folded = fold_deltas(db)
+        else:
+            rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"diferencias plegadas: {folded}" if args.command == "fold" else "rollups reconstruidos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# Proyección de fechas de fin de toda la cartera. Las etapas de un proyecto se
+# ejecutan en orden (order_index) y cada una empieza cuando termina la
+# anterior. Dentro de una etapa cada programador trabaja sus horas pendientes
+# (tareas no completadas, base_time_hours x coeficiente) a razón de
+# CAPACITY_HOURS_PER_WEEK / 5 horas por día laborable, en paralelo con el
+# resto; la etapa termina con el último. Las horas sin asignar no consumen a
+# nadie.
+#
+# Los programadores son recursos compartidos: cada uno tiene un calendario de
+# bloques ocupados (intervalos fusionados) y cada tramo de trabajo se coloca
+# en el primer hueco libre desde que la etapa está lista. El cálculo completo
+# avanza por orden de fecha con un heap (a igualdad, primero el proyecto con
+# end_date más cercana). Tras una edición solo se recoloca ese proyecto: se
+# liberan sus reservas y se vuelve a insertar en los huecos, sin mover a los
+# demás. Así el resultado incremental puede diferir del completo; se recalcula
+# todo si cambian más de INCREMENTAL_LIMIT proyectos o la fecha de referencia.
+#
+# El tiempo se mide en días laborables (lunes a viernes) desde el lunes de la
+# semana de `as_of`.
+import heapq
+import math
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import config, models, versioning
+
+INCREMENTAL_LIMIT = 200
+EPSILON = 1e-9
+UNASSIGNED = None
+
+
+def _to_hours(value):
+    return Decimal(repr(round(float(value), 2))).quantize(Decimal("0.01"))
+
+
+class WorkCalendar:
+    # Convierte fechas en días laborables desde el lunes de la semana de as_of
+    def __init__(self, as_of: date):
+        self.as_of = as_of
+        self.monday = as_of - timedelta(days=as_of.weekday())
+        self.today = self.offset(as_of)
+
+    def offset(self, day: date):
+        weeks, weekday = divmod((day - self.monday).days, 7)
+        return weeks * 5 + min(weekday, 5)
+
+    def day(self, offset: float):
+        weeks, weekday = divmod(int(math.floor(offset)), 5)
+        return self.monday + timedelta(weeks=weeks, days=weekday)
+
+    def last_day(self, end: float):
+        # Último día trabajado de un intervalo [inicio, end)
+        return self.day(math.ceil(end - EPSILON) - 1)
+
+
+class ResourceCalendar:
+    # Bloques ocupados de un programador, fusionados y ordenados, más las
+    # reservas de cada proyecto para poder liberarlas
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.reservations = defaultdict(list)
+
+    def earliest(self, ready: float, duration: float):
+        i = bisect_right(self.starts, ready) - 1
+        t = ready
+        if i >= 0 and self.ends[i] > t:
+            t = self.ends[i]
+        j = i + 1
+        while j < len(self.starts) and self.starts[j] - t < duration - EPSILON:
+            t = max(t, self.ends[j])
+            j += 1
+        return t
+
+    def reserve(self, project_id: int, start: float, end: float):
+        self.reservations[project_id].append((start, end))
+        i = bisect_right(self.starts, start)
+        merge_left = i > 0 and self.ends[i - 1] >= start - EPSILON
+        merge_right = i < len(self.starts) and self.starts[i] <= end + EPSILON
+        if merge_left and merge_right:
+            self.ends[i - 1] = self.ends[i]
+            del self.starts[i], self.ends[i]
+        elif merge_left:
+            self.ends[i - 1] = max(self.ends[i - 1], end)
+        elif merge_right:
+            self.starts[i] = start
+        else:
+            self.starts.insert(i, start)
+            self.ends.insert(i, end)
+
+    def release(self, project_id: int):
+        if self.reservations.pop(project_id, None) is None:
+            return
+        intervals = sorted(interval for reserved in self.reservations.values() for interval in reserved)
+        self.starts, self.ends = [], []
+        for start, end in intervals:
+            if self.ends and self.ends[-1] >= start - EPSILON:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+
+class ProjectPlan:
+    __slots__ = ("project_id", "name", "start_date", "end_date", "stages")
+
+    def __init__(self, project_id, name, start_date, end_date):
+        self.project_id = project_id
+        self.name = name
+        self.start_date = start_date
+        self.end_date = end_date
+        # [(stage_id, nombre, {programmer_id: horas})] en orden
+        self.stages = []
+
+    def priority(self):
+        return (self.end_date is None, self.end_date or date.max, self.project_id)
+
+
+class ScheduleEngine:
+    def __init__(self, as_of: date, hours_per_day: float):
+        self.calendar = WorkCalendar(as_of)
+        self.hours_per_day = hours_per_day
+        self.plans = {}
+        self.results = {}
+        self.resources = defaultdict(ResourceCalendar)
+        self.versions = {}
+
+    def _ready(self, plan: ProjectPlan):
+        start = self.calendar.offset(plan.start_date) if plan.start_date else self.calendar.today
+        return max(start, self.calendar.today)
+
+    def _schedule_stage(self, plan: ProjectPlan, index: int, ready: float):
+        stage_id, name, hours = plan.stages[index]
+        finish = ready
+        assignments = []
+        for programmer_id in sorted(hours, key=lambda pid: (pid is None, pid or 0)):
+            duration = hours[programmer_id] / self.hours_per_day
+            if duration <= EPSILON:
+                continue
+            if programmer_id is UNASSIGNED:
+                start = ready
+            else:
+                resource = self.resources[programmer_id]
+                start = resource.earliest(ready, duration)
+                resource.reserve(plan.project_id, start, start + duration)
+            assignments.append((programmer_id, start, start + duration, hours[programmer_id]))
+            finish = max(finish, start + duration)
+        self.results[plan.project_id]['stages'].append((stage_id, name, ready, finish, assignments))
+        return finish
+
+    def _start(self, plan: ProjectPlan):
+        self.results[plan.project_id] = {'stages': [], 'finish': None}
+
+    def _finish(self, plan: ProjectPlan):
+        worked = [a[2] for stage in self.results[plan.project_id]['stages'] for a in stage[4]]
+        self.results[plan.project_id]['finish'] = max(worked) if worked else None
+
+    def full(self, plans):
+        # Cálculo completo: etapas listas por orden de fecha (heap)
+        self.plans = {plan.project_id: plan for plan in plans}
+        self.results = {}
+        self.resources = defaultdict(ResourceCalendar)
+        heap = []
+        for plan in self.plans.values():
+            self._start(plan)
+            if plan.stages:
+                heap.append((self._ready(plan), plan.priority(), 0))
+            else:
+                self._finish(plan)
+        heapq.heapify(heap)
+        while heap:
+            ready, priority, index = heapq.heappop(heap)
+            plan = self.plans[priority[2]]
+            finish = self._schedule_stage(plan, index, ready)
+            if index + 1 < len(plan.stages):
+                heapq.heappush(heap, (finish, priority, index + 1))
+            else:
+                self._finish(plan)
+
+    def remove(self, project_id: int):
+        plan = self.plans.pop(project_id, None)
+        self.results.pop(project_id, None)
+        if plan is not None:
+            for stage in plan.stages:
+                for programmer_id in stage[2]:
+                    if programmer_id is not UNASSIGNED and programmer_id in self.resources:
+                        self.resources[programmer_id].release(project_id)
+
+    def reschedule(self, plan: ProjectPlan):
+        # Incremental: libera las reservas del proyecto y lo vuelve a colocar
+        self.remove(plan.project_id)
+        self.plans[plan.project_id] = plan
+        self._start(plan)
+        ready = self._ready(plan)
+        for index in range(len(plan.stages)):
+            ready = self._schedule_stage(plan, index, ready)
+        self._finish(plan)
+
+    def summary(self, project_id: int):
+        plan = self.plans[project_id]
+        finish = self.results[project_id]['finish']
+        projected_end = self.calendar.last_day(finish) if finish is not None else None
+        slack = (plan.end_date - projected_end).days if plan.end_date and projected_end else None
+        return {
+            'project_id': project_id,
+            'name': plan.name,
+            'start_date': plan.start_date,
+            'end_date': plan.end_date,
+            'projected_end': projected_end,
+            'slack_days': slack,
+            'late': slack is not None and slack < 0,
+            'remaining_hours': _to_hours(sum(sum(stage[2].values()) for stage in plan.stages))
+        }
+
+    def project(self, project_id: int):
+        if project_id not in self.plans:
+            return None
+        day, last_day = self.calendar.day, self.calendar.last_day
+        return {
+            **self.summary(project_id),
+            'stages': [
+                {
+                    'stage_id': stage_id,
+                    'name': name,
+                    'projected_start': day(ready),
+                    'projected_end': last_day(finish) if assignments else None,
+                    'assignments': [
+                        {
+                            'programmer_id': programmer_id,
+                            'hours': _to_hours(hours),
+                            'projected_start': day(start),
+                            'projected_end': last_day(end)
+                        }
+                        for programmer_id, start, end, hours in assignments
+                    ]
+                }
+                for stage_id, name, ready, finish, assignments in self.results[project_id]['stages']
+            ]
+        }
+
+
+def _plans_statement(project_ids=None):
+    hours = models.Task.base_time_hours * func.coalesce(models.Programmer.coefficient, 1)
+    remaining = select(
+        models.ProjectTask.stage_id,
+        models.ProjectTask.programmer_id,
+        func.sum(hours).label("hours")
+    ).join(
+        models.Task, models.Task.id == models.ProjectTask.task_id
+    ).outerjoin(
+        models.Programmer, models.Programmer.id == models.ProjectTask.programmer_id
+    ).where(
+        func.coalesce(models.ProjectTask.status, "pending") != "completed"
+    ).group_by(models.ProjectTask.stage_id, models.ProjectTask.programmer_id)
+    if project_ids is not None:
+        remaining = remaining.join(models.Stage, models.Stage.id == models.ProjectTask.stage_id).where(
+            models.Stage.project_id.in_(project_ids)
+        )
+    remaining = remaining.subquery()
+
+    stmt = select(
+        models.Project.id,
+        models.Project.name,
+        models.Project.start_date,
+        models.Project.end_date,
+        models.Stage.id.label("stage_id"),
+        models.Stage.name.label("stage_name"),
+        remaining.c.programmer_id,
+        remaining.c.hours
+    ).outerjoin(
+        models.Stage, models.Stage.project_id == models.Project.id
+    ).outerjoin(
+        remaining, remaining.c.stage_id == models.Stage.id
+    ).order_by(models.Project.id, models.Stage.order_index, models.Stage.id)
+    if project_ids is not None:
+        stmt = stmt.where(models.Project.id.in_(project_ids))
+    return stmt
+
+
+def load_plans(db: Session, project_ids=None):
+    plans = {}
+    for row in db.execute(_plans_statement(project_ids)):
+        plan = plans.get(row.id)
+        if plan is None:
+            plan = plans[row.id] = ProjectPlan(row.id, row.name, row.start_date, row.end_date)
+        if row.stage_id is None:
+            continue
+        if not plan.stages or plan.stages[-1][0] != row.stage_id:
+            plan.stages.append((row.stage_id, row.stage_name, {}))
+        if row.hours is not None:
+            plan.stages[-1][2][row.programmer_id] = float(row.hours)
+    return list(plans.values())
+
+
+_lock = threading.Lock()
+_engine = None
+
+
+def get_engine(db: Session, as_of: Optional[date] = None):
+    # Motor en memoria; se actualiza según las versiones de detalle de cada proyecto
+    global _engine
+    as_of = as_of or date.today()
+    with _lock:
+        versions = versioning.project_versions(db)
+        engine = _engine
+        if engine is None or engine.calendar.as_of != as_of:
+            engine = ScheduleEngine(as_of, config.CAPACITY_HOURS_PER_WEEK / 5)
+            engine.full(load_plans(db))
+        else:
+            changed = [pid for pid, version in versions.items() if engine.versions.get(pid) != version]
+            removed = [pid for pid in engine.versions if pid not in versions]
+            if len(changed) + len(removed) > INCREMENTAL_LIMIT:
+                engine.full(load_plans(db))
+            else:
+                for project_id in removed:
+                    engine.remove(project_id)
+                if changed:
+                    for plan in load_plans(db, changed):
+                        engine.reschedule(plan)
+        engine.versions = versions
+        _engine = engine
+        return engine
+
+
+def portfolio(engine: ScheduleEngine, late_only: bool = False, skip: int = 0, limit: int = 100):
+    # Proyectos ordenados por holgura (los más retrasados primero; sin fecha al final)
+    items = [engine.summary(project_id) for project_id in engine.plans]
+    if late_only:
+        items = [item for item in items if item['late']]
+    items.sort(key=lambda item: (item['slack_days'] is None, item['slack_days'] or 0, item['project_id']))
+    return items[skip:skip + limit]
@@ -1,8 +1,15 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Generic, TypeVar
 from datetime import date
 from decimal import Decimal
 
+T = TypeVar("T")
+
+# ========== PAGINATION SCHEMAS ==========
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 # ========== PROGRAMMER SCHEMAS ==========
 class ProgrammerBase(BaseModel):
     name: str
@@ -19,6 +26,45 @@ class Programmer(ProgrammerBase):
     class Config:
         from_attributes = True
 
+class ProgrammerWorkload(Programmer):
+    task_counts: Dict[str, int] = {}
+    estimated_hours: Decimal = Decimal("0.00")
+
+class CapacityProject(BaseModel):
+    project_id: int
+    hours: Decimal
+
+class CapacityWeek(BaseModel):
+    week_start: date
+    hours: Decimal
+    capacity: Decimal
+    overloaded: bool
+    projects: List[CapacityProject] = []
+
+class ProgrammerCapacity(BaseModel):
+    programmer_id: int
+    name: str
+    capacity_hours_per_week: Decimal
+    unscheduled_hours: Decimal
+    weeks: List[CapacityWeek] = []
+
+class OverloadedProgrammer(BaseModel):
+    programmer_id: int
+    name: str
+    hours: Decimal
+    over_hours: Decimal
+
+class OverloadWeek(BaseModel):
+    week_start: date
+    programmers: List[OverloadedProgrammer] = []
+
+class AvailableProgrammer(BaseModel):
+    programmer_id: int
+    name: str
+    peak_hours: Decimal
+    task_hours: Decimal
+    spare_hours: Decimal
+
 # ========== TASK SCHEMAS ==========
 class TaskBase(BaseModel):
     name: str
@@ -35,6 +81,13 @@ class Task(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskSearchResult(Task):
+    rank: float
+
+# Filtros de GET /api/tasks/ (parámetros de query con Depends())
+class TaskFilters(BaseModel):
+    type: Optional[str] = None
+
 # ========== PROJECT TASK SCHEMAS ==========
 class ProjectTaskBase(BaseModel):
     stage_id: int
@@ -45,10 +98,32 @@ class ProjectTaskBase(BaseModel):
 class ProjectTaskCreate(ProjectTaskBase):
     pass
 
+class StageTaskCreate(BaseModel):
+    task_id: int
+    programmer_id: Optional[int] = None
+    status: str = "pending"
+
+class StageTaskSync(StageTaskCreate):
+    id: Optional[int] = None
+
 class ProjectTaskUpdate(BaseModel):
     programmer_id: Optional[int] = None
     status: Optional[str] = None
 
+class ProjectTaskBulkFilter(BaseModel):
+    stage_id: Optional[int] = None
+    programmer_id: Optional[int] = None
+    status: Optional[str] = None
+
+class ProjectTaskBulkUpdate(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[ProjectTaskBulkFilter] = None
+    values: ProjectTaskUpdate
+
+class ProjectTaskBulkResult(BaseModel):
+    updated: int
+    ids: List[int] = []
+
 class ProjectTask(ProjectTaskBase):
     id: int
     task: Task
@@ -68,6 +143,12 @@ class StageBase(BaseModel):
 class StageCreate(StageBase):
     project_tasks: List["ProjectTaskCreate"] = []
 
+class ProjectStageCreate(BaseModel):
+    name: str
+    description: Optional[str] = None
+    order_index: int = 0
+    project_tasks: List[StageTaskCreate] = []
+
 class StageUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
@@ -76,10 +157,21 @@ class StageUpdate(BaseModel):
 class Stage(StageBase):
     id: int
     project_tasks: List[ProjectTask] = []
+    estimated_hours: Optional[Decimal] = None
+    task_count: int = 0
+    pending_count: int = 0
+    in_progress_count: int = 0
+    completed_count: int = 0
 
     class Config:
         from_attributes = True
 
+# Etapas del proyecto y/o con alguna tarea en ese estado o de ese programador
+class StageFilters(BaseModel):
+    project_id: Optional[int] = None
+    status: Optional[str] = None
+    programmer_id: Optional[int] = None
+
 # ========== PROJECT SCHEMAS ==========
 class ProjectBase(BaseModel):
     name: str
@@ -92,18 +184,152 @@ class ProjectCreate(ProjectBase):
     pass
 
 class ProjectCreateWithStages(ProjectCreate):
-    stages: List[StageCreate] = []
+    stages: List[ProjectStageCreate] = []
 
 class Project(ProjectBase):
     id: int
     responsible: Optional[Programmer] = None
+    estimated_hours: Decimal = Decimal("0.00")
+    task_count: int = 0
+    pending_count: int = 0
+    in_progress_count: int = 0
+    completed_count: int = 0
 
     class Config:
         from_attributes = True
 
+# status y programmer_id: proyectos con alguna tarea en ese estado o de ese programador
+class ProjectFilters(BaseModel):
+    responsible_id: Optional[int] = None
+    start_from: Optional[date] = None
+    start_to: Optional[date] = None
+    end_from: Optional[date] = None
+    end_to: Optional[date] = None
+    status: Optional[str] = None
+    programmer_id: Optional[int] = None
+
 class ProjectDetail(Project):
     stages: List[Stage] = []
     total_estimated_hours: Optional[Decimal] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+# ========== ESTIMATE SCHEMAS ==========
+class EstimateReassignment(BaseModel):
+    project_task_ids: List[int]
+    programmer_id: Optional[int] = None
+
+class EstimateScenario(BaseModel):
+    reassignments: List[EstimateReassignment] = []
+    coefficient_overrides: Dict[int, Decimal] = {}
+
+class StageEstimate(BaseModel):
+    stage_id: int
+    hours: Decimal
+    task_count: int
+
+class ProgrammerEstimate(BaseModel):
+    programmer_id: Optional[int] = None
+    hours: Decimal
+    task_count: int
+
+class ProjectEstimate(BaseModel):
+    project_id: int
+    total_hours: Decimal
+    baseline_total_hours: Decimal
+    stages: List[StageEstimate] = []
+    statuses: Dict[str, Decimal] = {}
+    programmers: List[ProgrammerEstimate] = []
+
+# ========== ANALYTICS SCHEMAS ==========
+class AnalyticsBucket(BaseModel):
+    key: str
+    label: Optional[str] = None
+    hours: Decimal
+    task_count: int
+
+class PortfolioSummary(BaseModel):
+    total_hours: Decimal
+    task_count: int
+    by_status: List[AnalyticsBucket] = []
+    by_task_type: List[AnalyticsBucket] = []
+    by_programmer: List[AnalyticsBucket] = []
+    by_responsible: List[AnalyticsBucket] = []
+
+class ProjectTotals(BaseModel):
+    id: int
+    name: str
+    responsible_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    total_hours: Decimal
+    task_count: int
+    by_status: Dict[str, Decimal] = {}
+
+class TimelinePoint(BaseModel):
+    month: str
+    hours: Decimal
+    task_count: int
+
+# ========== SCHEDULE SCHEMAS ==========
+class ScheduleAssignment(BaseModel):
+    programmer_id: Optional[int] = None
+    hours: Decimal
+    projected_start: date
+    projected_end: date
+
+class StageSchedule(BaseModel):
+    stage_id: int
+    name: str
+    projected_start: date
+    projected_end: Optional[date] = None
+    assignments: List[ScheduleAssignment] = []
+
+class ProjectScheduleSummary(BaseModel):
+    project_id: int
+    name: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    projected_end: Optional[date] = None
+    slack_days: Optional[int] = None
+    late: bool = False
+    remaining_hours: Decimal
+
+class ProjectSchedule(ProjectScheduleSummary):
+    stages: List[StageSchedule] = []
+
+# ========== AUTO-ASSIGN SCHEMAS ==========
+class AutoAssignRequest(BaseModel):
+    apply: bool = False
+    programmer_ids: Optional[List[int]] = None
+    as_of: Optional[date] = None
+
+class PortfolioAutoAssignRequest(AutoAssignRequest):
+    project_ids: Optional[List[int]] = None
+
+class ProposedAssignment(BaseModel):
+    project_task_id: int
+    project_id: int
+    stage_id: int
+    task_name: str
+    task_type: Optional[str] = None
+    base_hours: Decimal
+    programmer_id: int
+    programmer_name: str
+    weighted_hours: Decimal
+
+class UnassignableTask(BaseModel):
+    project_task_id: int
+    project_id: int
+    task_name: str
+    reason: str
+
+class AutoAssignResult(BaseModel):
+    window_start: date
+    window_end: date
+    assignments: List[ProposedAssignment] = []
+    unassigned: List[UnassignableTask] = []
+    total_weighted_hours: Decimal
+    greedy_weighted_hours: Decimal
+    local_search_moves: int = 0
+    applied: int = 0
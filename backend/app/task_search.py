@@ -0,0 +1,169 @@
+# Búsqueda en el catálogo de tareas (GET /api/tasks/search) por nombre y
+# descripción, con filtro por tipo. Todas las palabras de la consulta tienen
+# que aparecer; con prefix la última se completa (autocompletar).
+#
+#   PostgreSQL  tsvector con el nombre (peso A) y la descripción (peso B),
+#               ordenado por ts_rank, más similitud de trigramas (pg_trgm)
+#               sobre el nombre para encontrar nombres con erratas. Usa los
+#               índices GIN de la migración 0006: DOCUMENT_SQL tiene que
+#               coincidir con la expresión del índice.
+#   otros       índice invertido en memoria (palabra -> {tarea: peso}) que se
+#               reconstruye cuando cambia la versión de TASKS. Los prefijos se
+#               resuelven con bisect sobre el vocabulario ordenado; no tolera
+#               erratas.
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import func, literal, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from app import models, versioning
+
+VERSION_KEYS = [versioning.TASKS]
+WORD_PATTERN = re.compile(r"\w+")
+MAX_LIMIT = 100
+NAME_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+DOCUMENT_SQL = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+
+def words(value: Optional[str]):
+    return WORD_PATTERN.findall(value.lower()) if value else []
+
+
+def _result(task_id, name, description, task_type, base_time_hours, rank):
+    return {
+        'id': task_id,
+        'name': name,
+        'description': description,
+        'type': task_type,
+        'base_time_hours': base_time_hours,
+        'rank': round(float(rank), 4)
+    }
+
+
+# ========== POSTGRESQL ==========
+def _tsquery(terms, prefix: bool):
+    # Las palabras solo tienen letras, dígitos y "_": no hace falta escaparlas
+    parts = list(terms)
+    if prefix:
+        parts[-1] += ":*"
+    return " & ".join(parts)
+
+
+def search_statement(terms, q: str, task_type: Optional[str] = None, prefix: bool = True, limit: int = 20):
+    document = literal_column(DOCUMENT_SQL)
+    query = func.to_tsquery(literal_column("'simple'"), _tsquery(terms, prefix))
+    name = func.lower(models.Task.name)
+    typed = literal(q.lower())
+    rank = (func.ts_rank(document, query) + func.word_similarity(typed, name)).label("rank")
+    stmt = select(
+        models.Task.id,
+        models.Task.name,
+        models.Task.description,
+        models.Task.type,
+        models.Task.base_time_hours,
+        rank
+    ).where(
+        or_(document.op("@@")(query), typed.op("<%")(name))
+    )
+    if task_type is not None:
+        stmt = stmt.where(models.Task.type == task_type)
+    return stmt.order_by(rank.desc(), models.Task.name).limit(limit)
+
+
+# ========== ÍNDICE EN MEMORIA ==========
+class TaskSearchIndex:
+    def __init__(self, rows):
+        # rows: (id, name, description, type, base_time_hours)
+        self.tasks = {row[0]: tuple(row) for row in rows}
+        postings = defaultdict(dict)
+        for task_id, name, description, _, _ in self.tasks.values():
+            for weight, value in ((NAME_WEIGHT, name), (DESCRIPTION_WEIGHT, description)):
+                for word in words(value):
+                    postings[word][task_id] = postings[word].get(task_id, 0.0) + weight
+        self.postings = dict(postings)
+        self.vocabulary = sorted(self.postings)
+
+    def expand(self, prefix: str):
+        # Palabras del vocabulario que empiezan por el prefijo (rango contiguo)
+        start = bisect_left(self.vocabulary, prefix)
+        end = start
+        while end < len(self.vocabulary) and self.vocabulary[end].startswith(prefix):
+            end += 1
+        return self.vocabulary[start:end]
+
+    def _term_scores(self, matches):
+        # Peso x idf; si el prefijo cubre varias palabras de una tarea, la mejor
+        scores = {}
+        for word in matches:
+            entries = self.postings[word]
+            idf = math.log(1 + len(self.tasks) / len(entries))
+            for task_id, weight in entries.items():
+                if weight * idf > scores.get(task_id, 0.0):
+                    scores[task_id] = weight * idf
+        return scores
+
+    def search(self, terms, task_type: Optional[str] = None, prefix: bool = True, limit: int = 20):
+        scores = None
+        for position, word in enumerate(terms):
+            if prefix and position == len(terms) - 1:
+                matches = self.expand(word)
+            else:
+                matches = [word] if word in self.postings else []
+            term_scores = self._term_scores(matches)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {task_id: score + term_scores[task_id] for task_id, score in scores.items() if task_id in term_scores}
+            if not scores:
+                return []
+        if task_type is not None:
+            scores = {task_id: score for task_id, score in scores.items() if self.tasks[task_id][3] == task_type}
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], self.tasks[item[0]][1] or ""))
+        return [_result(*self.tasks[task_id], score) for task_id, score in best]
+
+
+def build_index(db: Session):
+    return TaskSearchIndex(db.execute(select(
+        models.Task.id, models.Task.name, models.Task.description, models.Task.type, models.Task.base_time_hours
+    )).all())
+
+
+_lock = threading.Lock()
+_cached = (None, None)
+
+
+def get_index(db: Session, versions=None):
+    # Reconstruye solo si cambió el catálogo desde la última vez
+    global _cached
+    versions = versions if versions is not None else versioning.get_versions(db, VERSION_KEYS)
+    cached_versions, index = _cached
+    if index is not None and cached_versions == versions:
+        return index
+    with _lock:
+        if _cached[1] is not None and _cached[0] == versions:
+            return _cached[1]
+        index = build_index(db)
+        _cached = (versions, index)
+        return index
+
+
+def search(db: Session, q: str, task_type: Optional[str] = None, prefix: bool = True, limit: int = 20, versions=None):
+    terms = words(q)
+    if not terms:
+        raise ValueError("q must contain at least one letter or digit")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    if db.get_bind().dialect.name == "postgresql":
+        return [_result(*row) for row in db.execute(search_statement(terms, q, task_type, prefix, limit))]
+    return get_index(db, versions).search(terms, task_type, prefix, limit)
@@ -0,0 +1,161 @@
+# Totales guardados en stages y projects: horas estimadas (base_time_hours x
+# coeficiente, igual que crud._task_hours_statement) y número de tareas
+# por estado. Se recalculan para los proyectos que cambian en cada escritura
+# (los que anota versioning.bump; ver el listener de app/rollups.py), así el
+# listado de proyectos los devuelve sin agregar project_tasks.
+#
+#   cd backend && python -m app.totals recompute          # repara desvíos
+#   cd backend && python -m app.totals recompute --check  # solo los cuenta
+import argparse
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+
+STATUS_COLUMNS = {
+    "pending": "pending_count",
+    "in_progress": "in_progress_count",
+    "completed": "completed_count",
+}
+COLUMNS = ("estimated_hours", "task_count") + tuple(STATUS_COLUMNS.values())
+RECOMPUTE_BATCH = 1000
+
+
+def _to_hours(value):
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+def _empty():
+    return dict({column: 0 for column in COLUMNS}, estimated_hours=Decimal("0"))
+
+
+def _stored(row, prefix):
+    return {column: getattr(row, prefix + column) for column in COLUMNS}
+
+
+def _totals_statement(project_ids):
+    # Una fila por (proyecto, etapa, estado) con los valores guardados al lado;
+    # proyectos sin etapas y etapas sin tareas salen con NULL para ponerlos a cero
+    hours = models.Task.base_time_hours * func.coalesce(models.Programmer.coefficient, 1)
+    status = func.coalesce(models.ProjectTask.status, "pending")
+    stage_totals = select(
+        models.ProjectTask.stage_id,
+        status.label("status"),
+        func.sum(hours).label("hours"),
+        func.count().label("task_count")
+    ).join(
+        models.Stage, models.Stage.id == models.ProjectTask.stage_id
+    ).join(
+        models.Task, models.Task.id == models.ProjectTask.task_id
+    ).outerjoin(
+        models.Programmer, models.Programmer.id == models.ProjectTask.programmer_id
+    ).where(
+        models.Stage.project_id.in_(project_ids)
+    ).group_by(models.ProjectTask.stage_id, status).subquery()
+
+    stored = [getattr(models.Project, c).label("project_" + c) for c in COLUMNS]
+    stored += [getattr(models.Stage, c).label("stage_" + c) for c in COLUMNS]
+    return select(
+        models.Project.id.label("project_id"),
+        models.Stage.id.label("stage_id"),
+        stage_totals.c.status,
+        stage_totals.c.hours,
+        stage_totals.c.task_count,
+        *stored
+    ).outerjoin(
+        models.Stage, models.Stage.project_id == models.Project.id
+    ).outerjoin(
+        stage_totals, stage_totals.c.stage_id == models.Stage.id
+    ).where(models.Project.id.in_(project_ids))
+
+
+def _compute(rows):
+    # Devuelve {id: (guardado, calculado)} de proyectos y de etapas
+    projects, stages = {}, {}
+    for row in rows:
+        targets = [projects.setdefault(row.project_id, (_stored(row, "project_"), _empty()))[1]]
+        if row.stage_id is not None:
+            targets.append(stages.setdefault(row.stage_id, (_stored(row, "stage_"), _empty()))[1])
+        if row.status is None:
+            continue
+        for totals in targets:
+            totals['estimated_hours'] += Decimal(str(row.hours or 0))
+            totals['task_count'] += row.task_count
+            if row.status in STATUS_COLUMNS:
+                totals[STATUS_COLUMNS[row.status]] += row.task_count
+    for entries in (projects, stages):
+        for _, totals in entries.values():
+            totals['estimated_hours'] = _to_hours(totals['estimated_hours'])
+    return projects, stages
+
+
+def _changed(entries):
+    return [
+        dict(computed, row_id=row_id)
+        for row_id, (stored, computed) in entries.items()
+        if any(
+            (_to_hours(stored[c]) if c == "estimated_hours" else stored[c]) != computed[c]
+            for c in COLUMNS
+        )
+    ]
+
+
+def _write(db: Session, model, rows):
+    if not rows:
+        return
+    # El SET sale de las claves de cada fila (todas las de COLUMNS)
+    db.execute(update(model.__table__).where(model.__table__.c.id == bindparam("row_id")), rows)
+
+
+def refresh_projects(db: Session, project_ids):
+    # Una consulta y, solo si algo cambió, un UPDATE por tabla (executemany)
+    # por cada lote de RECOMPUTE_BATCH proyectos
+    project_ids = sorted(set(project_ids))
+    changed = 0
+    for start in range(0, len(project_ids), RECOMPUTE_BATCH):
+        projects, stages = _compute(db.execute(_totals_statement(project_ids[start:start + RECOMPUTE_BATCH])))
+        changed_projects, changed_stages = _changed(projects), _changed(stages)
+        _write(db, models.Project, changed_projects)
+        _write(db, models.Stage, changed_stages)
+        changed += len(changed_projects) + len(changed_stages)
+    return changed
+
+
+def recompute(db: Session, check_only: bool = False):
+    # Recalcula todos los proyectos por lotes; devuelve las filas desviadas
+    drifted = defaultdict(int)
+    project_ids = db.scalars(select(models.Project.id).order_by(models.Project.id)).all()
+    for start in range(0, len(project_ids), RECOMPUTE_BATCH):
+        projects, stages = _compute(db.execute(_totals_statement(project_ids[start:start + RECOMPUTE_BATCH])))
+        changed_projects, changed_stages = _changed(projects), _changed(stages)
+        drifted['projects'] += len(changed_projects)
+        drifted['stages'] += len(changed_stages)
+        if not check_only:
+            _write(db, models.Project, changed_projects)
+            _write(db, models.Stage, changed_stages)
+    return dict(drifted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Totales guardados de etapas y proyectos")
+    parser.add_argument("command", choices=["recompute"])
+    parser.add_argument("--check", action="store_true", help="Solo informa de los desvíos, no escribe")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        drifted = recompute(db, check_only=args.check)
+        db.commit()
+    finally:
+        db.close()
+    print(f"desvíos: {drifted.get('projects', 0)} proyectos, {drifted.get('stages', 0)} etapas"
+          + (" (sin corregir)" if args.check else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# Versiones de recursos para GET condicionales (ETag / If-None-Match).
+#
+# Cada escritura en crud incrementa, dentro de su misma transacción, la versión
+# de las claves que invalida: "programmers", "tasks" y "project:<id>" para el
+# detalle de un proyecto. Las versiones viven en la tabla resource_versions
+# para que todos los workers vean el mismo valor.
+#
+# "projects", "stages" y "analytics" no se incrementan: dependen de cualquier
+# proyecto, y subir una fila global en cada escritura serializaría en
+# PostgreSQL a todos los escritores por el bloqueo de esa fila. Cada escritura
+# de un proyecto sube además uno de PORTFOLIO_SHARDS contadores
+# ("portfolio:<id % N>", en el mismo orden que el resto de claves) y
+# get_versions resuelve esas tres claves con la suma de los contadores: dos
+# escritores solo coinciden si sus proyectos caen en el mismo, y leerla son
+# PORTFOLIO_SHARDS filas sea cual sea el número de proyectos.
+import hashlib
+
+from fastapi import Response
+from sqlalchemy import String, cast, func, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+
+PROGRAMMERS = "programmers"
+TASKS = "tasks"
+PROJECTS = "projects"
+STAGES = "stages"
+ANALYTICS = "analytics"
+# Claves derivadas de todos los proyectos (ver arriba)
+PORTFOLIO_KEYS = (ANALYTICS, PROJECTS, STAGES)
+PORTFOLIO_SHARDS = 16
+# Proyectos cambiados en la transacción en curso (los usa app.rollups)
+CHANGED_PROJECTS = "changed_projects"
+# Programadores cuyo coeficiente cambió: {id: proyectos con sus tareas}
+CHANGED_PROGRAMMERS = "changed_programmers"
+
+
+def project_key(project_id: int):
+    return f"project:{project_id}"
+
+
+def _shard_key(project_id: int):
+    return f"portfolio:{project_id % PORTFOLIO_SHARDS}"
+
+
+def _project_id(key: str):
+    return int(key[len("project:"):]) if key.startswith("project:") else None
+
+
+def dialect_insert(db: Session):
+    # INSERT con soporte de ON CONFLICT según el dialecto de la sesión
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+
+def bump(db: Session, *keys, refresh: bool = True):
+    # Se llama antes del commit de cada escritura; no hace commit por sí misma.
+    # refresh=False invalida el detalle de los proyectos sin recalcular sus
+    # agregados ni sus totales (cambios que no tocan las horas)
+    keys = {key for key in keys if key is not None}
+    if not keys:
+        return
+    project_ids = {pid for pid in map(_project_id, keys) if pid is not None}
+    if project_ids and refresh:
+        # Los agregados de cartera (app/rollups.py) y los totales guardados de
+        # proyectos y etapas (app/totals.py) se refrescan en el commit
+        db.info.setdefault(CHANGED_PROJECTS, set()).update(project_ids)
+    keys = sorted(keys | {_shard_key(pid) for pid in project_ids})
+    table = models.ResourceVersion.__table__
+    insert = dialect_insert(db)
+    if insert is not None:
+        stmt = insert(table).on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={'version': table.c.version + 1}
+        )
+        db.execute(stmt, [{'key': key, 'version': 1} for key in keys])
+        return
+    for key in keys:
+        updated = db.execute(
+            update(table).where(table.c.key == key).values(version=table.c.version + 1)
+        ).rowcount
+        if not updated:
+            db.execute(table.insert().values(key=key, version=1))
+
+
+def mark_programmer(db: Session, programmer_id: int, project_ids):
+    # Cambió su coeficiente: en el commit se recalculan los totales de esos
+    # proyectos y solo las filas de ese programador en los agregados
+    db.info.setdefault(CHANGED_PROGRAMMERS, {}).setdefault(programmer_id, set()).update(project_ids)
+
+
+def versions_statement(keys):
+    version = models.ResourceVersion
+    stmt = select(version.key, version.version).where(version.key.in_(keys))
+    portfolio = [key for key in keys if key in PORTFOLIO_KEYS]
+    if not portfolio:
+        return stmt
+    # Una fila por clave derivada con la suma de los contadores de cartera
+    total = select(func.coalesce(func.sum(version.version), 0)).where(
+        version.key.in_([f"portfolio:{shard}" for shard in range(PORTFOLIO_SHARDS)])
+    ).scalar_subquery()
+    return stmt.where(version.key.not_in(portfolio)).union_all(*(
+        select(literal(key), total) for key in portfolio
+    ))
+
+
+def collect_versions(rows, keys):
+    found = dict(rows)
+    return {key: found.get(key, 0) for key in keys}
+
+
+def get_versions(db: Session, keys):
+    return collect_versions(db.execute(versions_statement(keys)).all(), keys)
+
+
+def project_versions(db: Session):
+    # {project_id: versión de su detalle} de todos los proyectos (0 si nunca se bumpeó)
+    version = models.ResourceVersion
+    return dict(db.execute(
+        select(models.Project.id, func.coalesce(version.version, 0)).outerjoin(
+            version, version.key == literal("project:") + cast(models.Project.id, String)
+        )
+    ).all())
+
+
+def make_etag(request, versions: dict):
+    # ETag fuerte: depende de la URL completa (query incluida) y de las versiones
+    raw = "|".join([str(request.url.path), str(request.url.query)] + [
+        f"{key}={versions[key]}" for key in sorted(versions)
+    ])
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+def etag_matches(request, etag: str):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(request, response: Response, versions: dict):
+    # Devuelve un 304 si el cliente ya tiene esta versión; si no, deja el ETag
+    # en la respuesta y la ruta sigue con la consulta normal
+    etag = make_etag(request, versions)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,89 @@
+# Utilidades compartidas por los benchmarks: sesión aislada y contador de SQL
+import os
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite://")
+# make_session borra todas las tablas: fuera de una base de prueba hay que
+# confirmarlo con BENCH_YES_DROP=1
+BENCH_YES_DROP = os.getenv("BENCH_YES_DROP", "").lower() in ("1", "true", "yes")
+
+
+def is_scratch_database(url: str):
+    # SQLite en memoria o en el directorio temporal, o una base cuyo nombre
+    # contiene "bench"
+    database = make_url(url).database or ""
+    if url.startswith("sqlite"):
+        if database in ("", ":memory:"):
+            return True
+        if os.path.abspath(database).startswith(os.path.abspath(tempfile.gettempdir()) + os.sep):
+            return True
+    return "bench" in os.path.basename(database).lower()
+
+
+def ensure_scratch_database(url: str):
+    # Se llama antes de cualquier drop_all
+    if not is_scratch_database(url) and not BENCH_YES_DROP:
+        raise RuntimeError(
+            f"{make_url(url).render_as_string(hide_password=True)} no parece una base de prueba y se "
+            "borrarían todas sus tablas: usa una base con \"bench\" en el nombre o BENCH_YES_DROP=1"
+        )
+
+
+def make_session(url: str = BENCH_DATABASE_URL):
+    # SQLite en memoria por defecto; con BENCH_DATABASE_URL se usa un PostgreSQL local
+    ensure_scratch_database(url)
+    if url.startswith("sqlite"):
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    else:
+        engine = create_engine(url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = 0
+        self.executed = []
+
+    def count_rows(self, db):
+        # Filas devueltas por las SELECT capturadas, medidas re-ejecutándolas
+        # como COUNT(*) una vez terminada la medición
+        rows = 0
+        connection = db.connection()
+        for statement, parameters in self.executed:
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            result = connection.exec_driver_sql(
+                f"SELECT COUNT(*) FROM ({statement}) AS counted", parameters
+            )
+            rows += result.scalar()
+        return rows
+
+
+@contextmanager
+def count_queries(db):
+    counter = QueryCounter()
+    engine = db.get_bind()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements += 1
+        counter.executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,77 @@
+# Optimizador de asignación (app.assignment) sobre miles de tareas sin
+# programador: tiempo del voraz con heap y de la búsqueda local, y horas
+# ponderadas frente a dos referencias:
+#   primero-que-cabe  cada tarea, en orden de id, al programador elegible más
+#                     barato que aún tenga hueco (lo que haría alguien a mano)
+#   cota inferior     coste del plan fraccionario (flujo de coste mínimo con
+#                     la capacidad, tareas divisibles); ninguna asignación
+#                     entera puede bajar de ahí
+#
+#   cd backend && python -m benchmarks.auto_assign
+import random
+import time
+
+from app.assignment import AssignmentProblem, eligible
+
+SIZES = [1_000, 5_000, 20_000]
+SENIORITIES = [("Junior", 1.75), ("Pleno", 1.25), ("Senior", 1.0), ("lead", 0.8), ("PM", 1.0)]
+PROGRAMMERS = 60
+# Holgura total de capacidad respecto a las horas a repartir
+CAPACITY_FACTOR = 1.3
+
+
+def synthetic(size, rng):
+    programmers = []
+    for i in range(1, PROGRAMMERS + 1):
+        seniority, coefficient = SENIORITIES[i % len(SENIORITIES)]
+        programmers.append((i, f"Programmer {i}", seniority, round(coefficient * rng.uniform(0.9, 1.1), 2)))
+    tasks = [
+        (i, 1, 1, f"Task {i}", "management" if rng.random() < 0.1 else "development", float(rng.randint(1, 40)))
+        for i in range(1, size + 1)
+    ]
+    total = sum(t[5] for t in tasks) * CAPACITY_FACTOR
+    weights = [rng.uniform(0.5, 1.5) for _ in programmers]
+    budgets = {p[0]: total * w / sum(weights) for p, w in zip(programmers, weights)}
+    return tasks, programmers, budgets
+
+
+def first_fit(tasks, programmers, budgets):
+    remaining = dict(budgets)
+    ranked = sorted(programmers, key=lambda p: p[3])
+    cost = 0.0
+    for _, _, _, _, task_type, hours in tasks:
+        for pid, _, seniority, coefficient in ranked:
+            if eligible(task_type, seniority) and remaining[pid] >= hours * coefficient:
+                remaining[pid] -= hours * coefficient
+                cost += hours * coefficient
+                break
+    return cost
+
+
+def lower_bound(tasks, programmers, budgets):
+    problem = AssignmentProblem(tasks, programmers, budgets)
+    return sum(hours * problem.coefficients[pid] for (_, pid), hours in problem._plan().items())
+
+
+def main():
+    print(f"{'tareas':>7} {'voraz ms':>9} {'local ms':>9} {'movs':>5} {'primero-que-cabe':>17} {'voraz':>10} {'final':>10} {'cota':>10}")
+    for size in SIZES:
+        rng = random.Random(size)
+        tasks, programmers, budgets = synthetic(size, rng)
+        problem = AssignmentProblem(tasks, programmers, budgets)
+        started = time.perf_counter()
+        problem.greedy()
+        greedy_ms = (time.perf_counter() - started) * 1000
+        greedy_cost = problem.total_cost()
+        started = time.perf_counter()
+        moves = problem.improve()
+        local_ms = (time.perf_counter() - started) * 1000
+        assert all(r >= -1e-6 for r in problem.remaining.values())
+        print(
+            f"{size:>7} {greedy_ms:>9.1f} {local_ms:>9.1f} {moves:>5} {first_fit(tasks, programmers, budgets):>17.1f} "
+            f"{greedy_cost:>10.1f} {problem.total_cost():>10.1f} {lower_bound(tasks, programmers, budgets):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Coste del índice de capacidad (app.capacity): construcción a partir de las
+# filas agregadas (programador, proyecto) y consultas una vez construido. Las
+# consultas no dependen del número de asignaciones: el informe por semana es
+# una búsqueda en un dict y "quién puede tomar esta tarea" es un máximo por
+# rango O(1) por programador.
+#
+#   cd backend && python -m benchmarks.capacity_index
+import random
+import time
+from datetime import date, timedelta
+
+from app.capacity import CapacityIndex
+
+SIZES = [1_000, 10_000, 100_000]
+PROGRAMMERS = 200
+YEARS = 3
+REPEAT = 20
+
+
+def synthetic(size, rng):
+    programmers = [(i, f"Programmer {i}", rng.choice([0.75, 1.0, 1.25, 1.75])) for i in range(1, PROGRAMMERS + 1)]
+    origin = date(2026, 1, 5)
+    rows = []
+    for project_id in range(1, size + 1):
+        start = origin + timedelta(days=rng.randint(0, 365 * YEARS))
+        end = start + timedelta(days=rng.randint(7, 120))
+        rows.append((rng.randint(1, PROGRAMMERS), project_id, start, end, rng.randint(10, 400)))
+    return programmers, rows
+
+
+def best_ms(fn):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    print(f"{'asignaciones':>12} {'construcción':>13} {'sobrecarga':>11} {'disponibles':>12} {'semanas prog.':>14}  (ms)")
+    for size in SIZES:
+        rng = random.Random(size)
+        programmers, rows = synthetic(size, rng)
+        started = time.perf_counter()
+        index = CapacityIndex(programmers, rows, 40.0)
+        build_ms = (time.perf_counter() - started) * 1000
+        week = index.weeks // 2
+        overload_ms = best_ms(lambda: index.overloaded_in(week))
+        available_ms = best_ms(lambda: index.available(40.0, week, week + 8))
+        weeks_ms = best_ms(lambda: index.programmer_weeks(1, week, week + 12))
+        print(f"{size:>12} {build_ms:>13.2f} {overload_ms:>11.4f} {available_ms:>12.3f} {weeks_ms:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
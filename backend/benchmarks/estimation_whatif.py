@@ -0,0 +1,82 @@
+# Tiempo del motor de estimación vectorizado (app.estimation) frente a la
+# consulta de horas por tarea de crud en un proyecto con miles de tareas, y
+# coste de un escenario "qué pasa si" una vez cargado el frame.
+#
+#   cd backend && python -m benchmarks.estimation_whatif
+import random
+import time
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from app import crud, estimation, models, schemas
+from benchmarks._support import make_session
+
+SIZES = [1_000, 5_000, 20_000]
+STAGES = 10
+PROGRAMMERS = 30
+REPEAT = 5
+
+
+def seed(db, size):
+    rng = random.Random(size)
+    db.execute(insert(models.Programmer.__table__), [
+        {'id': i, 'name': f"Programmer {i}", 'seniority': "Pleno", 'coefficient': Decimal(rng.choice(["0.75", "1.00", "1.25", "1.75"]))}
+        for i in range(1, PROGRAMMERS + 1)
+    ])
+    db.execute(insert(models.Task.__table__), [
+        {'id': i, 'name': f"Task {i}", 'type': "development", 'base_time_hours': Decimal(rng.randint(1, 40))}
+        for i in range(1, 201)
+    ])
+    db.execute(insert(models.Project.__table__), [{'id': 1, 'name': "Project"}])
+    db.execute(insert(models.Stage.__table__), [
+        {'id': i, 'project_id': 1, 'name': f"Etapa {i}", 'order_index': i} for i in range(1, STAGES + 1)
+    ])
+    db.execute(insert(models.ProjectTask.__table__), [
+        {
+            'id': i,
+            'stage_id': rng.randint(1, STAGES),
+            'task_id': rng.randint(1, 200),
+            'programmer_id': rng.randint(1, PROGRAMMERS) if rng.random() > 0.1 else None,
+            'status': rng.choice(["pending", "in_progress", "completed"])
+        }
+        for i in range(1, size + 1)
+    ])
+    db.commit()
+
+
+def best_ms(fn):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, result
+
+
+def main():
+    print(f"{'tareas':>7} {'sql':>9} {'carga':>9} {'cálculo':>9} {'qué-pasa-si':>12}  (ms)")
+    for size in SIZES:
+        db = make_session()
+        seed(db, size)
+        sql_ms, task_hours = best_ms(lambda: crud.get_task_hours(db, 1))
+        load_ms, frame = best_ms(lambda: estimation.load_frame(db, 1))
+        compute_ms, summary = best_ms(lambda: estimation.summarize(frame))
+        # "Qué pasa si Bob (programador 1) se queda con la mitad de las tareas"
+        scenario = schemas.EstimateScenario(
+            reassignments=[schemas.EstimateReassignment(
+                project_task_ids=list(range(1, size + 1, 2)), programmer_id=1
+            )],
+            coefficient_overrides={1: Decimal("0.80")}
+        )
+        whatif_ms, _ = best_ms(lambda: estimation.summarize(
+            frame, *estimation.apply_scenario(frame, scenario.reassignments, scenario.coefficient_overrides)
+        ))
+        sql_total = sum(task_hours.values(), Decimal("0.00"))
+        assert summary['total_hours'] == sql_total, (summary['total_hours'], sql_total)
+        print(f"{size:>7} {sql_ms:>9.2f} {load_ms:>9.2f} {compute_ms:>9.2f} {whatif_ms:>12.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# Carga HTTP de extremo a extremo que reproduce las secuencias de llamadas
+# del frontend:
+#
+#   page_load       Projects.jsx: los tres listados en paralelo, recorriendo
+#                   todas las páginas por cursor (fetchAllPages)
+#   view_detail     Projects.jsx: "ver detalles" de un proyecto
+#   edit_save       Projects.jsx: cargar el detalle, PUT del proyecto, PUT de
+#                   cada etapa y de su lista de tareas, y recarga de los listados
+#   detail_session  ProjectDetail.jsx: detalle + tareas + programadores en
+#                   paralelo; alta, cambio de estado y baja de una tarea del
+#                   proyecto, recargando el detalle tras cada cambio
+#
+# Cada usuario virtual repite sesiones elegidas según --mix y, como el
+# navegador, reenvía el ETag de cada URL en If-None-Match (--no-etag lo desactiva).
+#
+#   cd backend && python -m benchmarks.load_replay --users 50 --duration 30
+#   python -m benchmarks.load_replay --base-url http://localhost:8000 --users 200
+#
+# Sin --base-url la app se ejecuta en el mismo proceso (ASGI) sobre un SQLite
+# temporal cargado con benchmarks.datagen, o sobre BENCH_DATABASE_URL.
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+DEFAULT_MIX = "page_load=4,view_detail=3,detail_session=2,edit_save=1"
+PAGE_LIMIT = 500
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.not_modified = defaultdict(int)
+
+    def add(self, route, seconds, status):
+        self.latencies[route].append(seconds)
+        if status == 304:
+            self.not_modified[route] += 1
+        elif status is None or status >= 400:
+            self.errors[route] += 1
+
+
+def percentile(values, p):
+    # Nearest-rank sobre los valores ordenados
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class VirtualUser:
+    def __init__(self, http, recorder, rng, own_projects, all_projects, use_etag=True):
+        self.http = http
+        self.recorder = recorder
+        self.rng = rng
+        self.own_projects = own_projects
+        self.all_projects = all_projects
+        self.use_etag = use_etag
+        # Caché HTTP del "navegador": url -> (etag, cuerpo)
+        self.cache = {}
+
+    async def request(self, method, url, route, **kwargs):
+        headers = {}
+        cached = self.cache.get(url) if method == "GET" and self.use_etag else None
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        started = time.perf_counter()
+        try:
+            response = await self.http.request(method, url, headers=headers, **kwargs)
+        except Exception:
+            self.recorder.add(f"{method} {route}", time.perf_counter() - started, None)
+            return None
+        self.recorder.add(f"{method} {route}", time.perf_counter() - started, response.status_code)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        if response.status_code >= 400:
+            return None
+        body = response.json() if response.content else None
+        if method == "GET" and self.use_etag and "etag" in response.headers:
+            self.cache[url] = (response.headers["etag"], body)
+        return body
+
+    async def fetch_all_pages(self, url):
+        items = []
+        cursor = ""
+        while True:
+            page = await self.request("GET", f"{url}?limit={PAGE_LIMIT}&cursor={cursor}", url)
+            if page is None:
+                return items
+            items.extend(page["items"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return items
+
+    async def page_load(self):
+        await asyncio.gather(
+            self.fetch_all_pages("/api/projects/"),
+            self.fetch_all_pages("/api/tasks/"),
+            self.fetch_all_pages("/api/programmers/")
+        )
+
+    async def view_detail(self):
+        project_id = self.rng.choice(self.all_projects)
+        await self.request("GET", f"/api/projects/{project_id}", "/api/projects/{project_id}")
+
+    async def edit_save(self):
+        project_id = self.rng.choice(self.own_projects)
+        detail = await self.request("GET", f"/api/projects/{project_id}", "/api/projects/{project_id}")
+        if detail is None:
+            return
+        await self.request("PUT", f"/api/projects/{project_id}", "/api/projects/{project_id}", json={
+            'name': detail['name'],
+            'description': detail['description'],
+            'start_date': detail['start_date'],
+            'end_date': detail['end_date'],
+            'responsible_id': detail['responsible_id']
+        })
+        for i, stage in enumerate(detail['stages']):
+            await self.request("PUT", f"/api/stages/{stage['id']}", "/api/stages/{stage_id}", json={
+                'name': stage['name'], 'description': stage['description'], 'order_index': i
+            })
+            tasks = [
+                {'id': pt['id'], 'task_id': pt['task_id'], 'programmer_id': pt['programmer_id'], 'status': pt['status']}
+                for pt in stage['project_tasks']
+            ]
+            # Como en el modal: a veces se cambia el estado de alguna tarea
+            if tasks and self.rng.random() < 0.5:
+                self.rng.choice(tasks)['status'] = self.rng.choice(["pending", "in_progress", "completed"])
+            await self.request("PUT", f"/api/stages/{stage['id']}/tasks", "/api/stages/{stage_id}/tasks", json=tasks)
+        await self.page_load()
+
+    async def detail_session(self):
+        project_id = self.rng.choice(self.own_projects)
+        url = f"/api/projects/{project_id}"
+        route = "/api/projects/{project_id}"
+        detail, tasks, _ = await asyncio.gather(
+            self.request("GET", url, route),
+            self.request("GET", "/api/tasks/", "/api/tasks/"),
+            self.request("GET", "/api/programmers/", "/api/programmers/")
+        )
+        if not detail or not detail['stages'] or not tasks:
+            return
+        stage = self.rng.choice(detail['stages'])
+        created = await self.request("POST", "/api/project-tasks/", "/api/project-tasks/", json={
+            'stage_id': stage['id'], 'task_id': self.rng.choice(tasks)['id'], 'status': "pending"
+        })
+        await self.request("GET", url, route)
+        if created is None:
+            return
+        project_task_url = f"/api/project-tasks/{created['id']}"
+        await self.request("PUT", project_task_url, "/api/project-tasks/{project_task_id}", json={'status': "in_progress"})
+        await self.request("GET", url, route)
+        await self.request("DELETE", project_task_url, "/api/project-tasks/{project_task_id}")
+        await self.request("GET", url, route)
+
+
+def parse_mix(mix: str):
+    scenarios = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if not hasattr(VirtualUser, name.strip()):
+            raise SystemExit(f"Escenario desconocido: {name}")
+        scenarios[name.strip()] = float(weight or 1)
+    return scenarios
+
+
+async def run_load(http, project_ids, users, duration, sessions, mix, use_etag, seed):
+    recorder = Recorder()
+    session_counts = defaultdict(int)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    deadline = time.perf_counter() + duration
+
+    async def user(index):
+        rng = random.Random(seed + index)
+        # Cada usuario edita solo sus proyectos para no pisar los cambios de otro
+        own = project_ids[index::users] or project_ids
+        vu = VirtualUser(http, recorder, rng, own, project_ids, use_etag)
+        done = 0
+        while (sessions and done < sessions) or (not sessions and time.perf_counter() < deadline):
+            name = rng.choices(names, weights)[0]
+            await getattr(vu, name)()
+            session_counts[name] += 1
+            done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(users)))
+    return recorder, dict(session_counts), time.perf_counter() - started
+
+
+def summarize(recorder, elapsed):
+    routes = {}
+    for route in sorted(recorder.latencies):
+        values = recorder.latencies[route]
+        routes[route] = {
+            'requests': len(values),
+            'rps': round(len(values) / elapsed, 2),
+            'errors': recorder.errors[route],
+            'error_rate': round(recorder.errors[route] / len(values), 4),
+            'not_modified': recorder.not_modified[route],
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2)
+        }
+    every = [v for values in recorder.latencies.values() for v in values]
+    errors = sum(recorder.errors.values())
+    total = {
+        'requests': len(every),
+        'rps': round(len(every) / elapsed, 2),
+        'errors': errors,
+        'error_rate': round(errors / len(every), 4) if every else 0.0,
+        'p50_ms': round(percentile(every, 50) * 1000, 2),
+        'p95_ms': round(percentile(every, 95) * 1000, 2),
+        'p99_ms': round(percentile(every, 99) * 1000, 2)
+    }
+    return routes, total
+
+
+def print_report(routes, total):
+    print(f"{'ruta':<48} {'req':>7} {'req/s':>8} {'err %':>6} {'304':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, r in list(routes.items()) + [("TOTAL", dict(total, not_modified=""))]:
+        print(
+            f"{route:<48} {r['requests']:>7} {r['rps']:>8.1f} {r['error_rate'] * 100:>6.2f} {r['not_modified']:>6} "
+            f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}"
+        )
+
+
+def _prepare_in_process(scale):
+    # DATABASE_URL debe fijarse antes de importar app.main
+    url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/load.db"
+    os.environ["DATABASE_URL"] = url
+    from benchmarks import datagen
+    from benchmarks._support import make_session
+
+    db = make_session(url)
+    datagen.seed(db, **datagen.SCALES[scale])
+    db.close()
+    db.get_bind().dispose()
+    from app import main as app_main
+
+    return app_main.app, list(range(1, datagen.SCALES[scale]['projects'] + 1))
+
+
+async def main_async(args):
+    import httpx
+
+    mix = parse_mix(args.mix)
+    if args.base_url:
+        http = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        async with http:
+            first = (await http.get("/api/projects/", params={'limit': 10_000})).json()
+            project_ids = [p['id'] for p in first]
+            return await run_load(http, project_ids, args.users, args.duration, args.sessions, mix, not args.no_etag, args.seed)
+    app, project_ids = _prepare_in_process(args.scale)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=args.timeout) as http:
+        return await run_load(http, project_ids, args.users, args.duration, args.sessions, mix, not args.no_etag, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce el tráfico del frontend contra la API")
+    parser.add_argument("--base-url", help="Servidor ya arrancado; sin él la app corre en proceso")
+    parser.add_argument("--scale", default="small", help="Escala de benchmarks.datagen (solo en proceso)")
+    parser.add_argument("--users", type=int, default=20, help="Usuarios virtuales concurrentes")
+    parser.add_argument("--duration", type=float, default=20, help="Segundos de carga")
+    parser.add_argument("--sessions", type=int, default=0, help="Sesiones por usuario (en lugar de --duration)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Pesos de cada escenario")
+    parser.add_argument("--no-etag", action="store_true", help="No reenviar If-None-Match")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichero JSON de resultados")
+    args = parser.parse_args()
+
+    recorder, session_counts, elapsed = asyncio.run(main_async(args))
+    routes, total = summarize(recorder, elapsed)
+    print(f"{args.users} usuarios, {elapsed:.1f}s, sesiones: {session_counts}")
+    print_report(routes, total)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                'users': args.users,
+                'seconds': round(elapsed, 3),
+                'mix': parse_mix(args.mix),
+                'etag': not args.no_etag,
+                'sessions': session_counts,
+                'total': total,
+                'routes': routes
+            }, f, indent=2)
+        print(f"resultados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Verifica que el listado de programadores cuesta un número fijo de sentencias
+# SQL sin importar cuántos programadores, proyectos o tareas existan.
+#
+#   cd backend && python -m benchmarks.programmer_workload
+import time
+from decimal import Decimal
+
+from app import crud, models
+from benchmarks._support import make_session, count_queries
+
+SIZES = [5, 50, 500]
+
+
+def seed(db, size):
+    db.add_all([
+        models.Programmer(id=i, name=f"Programmer {i}", seniority="Pleno", coefficient=Decimal("1.25"))
+        for i in range(1, size + 1)
+    ])
+    db.add_all([
+        models.Task(id=i, name=f"Task {i}", type="development", base_time_hours=Decimal("4.00"))
+        for i in range(1, size + 1)
+    ])
+    db.add_all([
+        models.Project(id=i, name=f"Project {i}", responsible_id=i)
+        for i in range(1, size + 1)
+    ])
+    db.add_all([
+        models.Stage(id=i, project_id=i, name="Etapa", order_index=0)
+        for i in range(1, size + 1)
+    ])
+    db.add_all([
+        models.ProjectTask(
+            stage_id=i, task_id=i, programmer_id=i,
+            status="pending" if j % 2 else "completed"
+        )
+        for i in range(1, size + 1) for j in range(3)
+    ])
+    db.commit()
+
+
+def main():
+    counts = set()
+    for size in SIZES:
+        db = make_session()
+        seed(db, size)
+        with count_queries(db) as counter:
+            started = time.perf_counter()
+            programmers = crud.get_programmers(db, limit=size)
+            elapsed = time.perf_counter() - started
+        assert len(programmers) == size
+        assert programmers[0]['project_count'] == 1
+        assert programmers[0]['task_counts'] == {"completed": 2, "pending": 1}
+        assert programmers[0]['estimated_hours'] == Decimal("15.00")
+        print(f"{size:>5} programadores: {counter.statements} sentencias, {elapsed * 1000:.2f} ms")
+        counts.add(counter.statements)
+        db.close()
+
+    assert len(counts) == 1, f"El número de sentencias crece con los datos: {sorted(counts)}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Compara las estrategias de carga de get_project_with_details ("joined" vs
+# "selectin") en proyectos de 10, 100 y 1000 tareas: tiempo, sentencias SQL,
+# filas leídas y memoria asignada.
+#
+#   cd backend && python -m benchmarks.project_detail_loading
+import time
+import tracemalloc
+from decimal import Decimal
+
+from app import crud, models
+from benchmarks._support import make_session, count_queries
+
+SIZES = [10, 100, 1000]
+STAGES_PER_PROJECT = 5
+PROGRAMMERS = 10
+REPEAT = 5
+
+
+def seed(db, project_id, task_count):
+    db.add(models.Project(id=project_id, name=f"Project {task_count}"))
+    stage_ids = []
+    for index in range(STAGES_PER_PROJECT):
+        stage = models.Stage(project_id=project_id, name=f"Etapa {index}", order_index=index)
+        db.add(stage)
+        db.flush()
+        stage_ids.append(stage.id)
+    db.add_all([
+        models.ProjectTask(
+            stage_id=stage_ids[i % STAGES_PER_PROJECT],
+            task_id=(i % 50) + 1,
+            programmer_id=(i % PROGRAMMERS) + 1
+        )
+        for i in range(task_count)
+    ])
+
+
+def measure(db, project_id, loading):
+    timings = []
+    for _ in range(REPEAT):
+        db.expunge_all()
+        started = time.perf_counter()
+        crud.get_project_with_details(db, project_id, loading=loading)
+        timings.append(time.perf_counter() - started)
+
+    db.expunge_all()
+    tracemalloc.start()
+    with count_queries(db) as counter:
+        project = crud.get_project_with_details(db, project_id, loading=loading)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = project.total_estimated_hours
+    return {
+        "ms": min(timings) * 1000,
+        "statements": counter.statements,
+        "rows": counter.count_rows(db),
+        "peak_kib": peak / 1024,
+        "total": total,
+    }
+
+
+def main():
+    db = make_session()
+    db.add_all([
+        models.Programmer(id=i, name=f"Programmer {i}", seniority="Pleno", coefficient=Decimal("1.25"))
+        for i in range(1, PROGRAMMERS + 1)
+    ])
+    db.add_all([
+        models.Task(id=i, name=f"Task {i}", type="development", base_time_hours=Decimal("3.50"))
+        for i in range(1, 51)
+    ])
+    for project_id, size in enumerate(SIZES, start=1):
+        seed(db, project_id, size)
+    db.commit()
+
+    print(f"{'tareas':>7} {'carga':>9} {'ms':>9} {'sentencias':>10} {'filas':>7} {'pico KiB':>9}")
+    for project_id, size in enumerate(SIZES, start=1):
+        results = {loading: measure(db, project_id, loading) for loading in crud.PROJECT_DETAIL_LOADERS}
+        assert len({r["total"] for r in results.values()}) == 1
+        for loading, r in results.items():
+            print(f"{size:>7} {loading:>9} {r['ms']:>9.2f} {r['statements']:>10} {r['rows']:>7} {r['peak_kib']:>9.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Índice invertido en memoria de la búsqueda de tareas (app.task_search, el
+# que se usa fuera de PostgreSQL): construcción y consultas frente a recorrer
+# todo el catálogo buscando subcadenas, que es lo que hace hoy el selector de
+# tareas del frontend tras descargar /api/tasks/.
+#
+#   cd backend && python -m benchmarks.task_search
+import random
+import time
+
+from app.task_search import TaskSearchIndex, words
+
+SIZES = [1_000, 10_000, 100_000]
+TYPES = ["development", "management", "testing", "design", "deploy"]
+REPEAT = 20
+SYLLABLES = ["ba", "se", "da", "tos", "mi", "gra", "cion", "pla", "ni", "fi", "ca", "re", "vi", "sion", "in", "for", "me"]
+
+
+def _word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def synthetic(size, rng):
+    vocabulary = [_word(rng) for _ in range(2_000)]
+    return [
+        (
+            i,
+            " ".join(rng.choice(vocabulary) for _ in range(rng.randint(2, 5))) + f" {i}",
+            " ".join(rng.choice(vocabulary) for _ in range(rng.randint(5, 20))),
+            rng.choice(TYPES),
+            rng.randint(1, 40)
+        )
+        for i in range(1, size + 1)
+    ], vocabulary
+
+
+def scan(tasks, q, limit=20):
+    terms = words(q)
+    found = []
+    for task in tasks:
+        text = f"{task[1]} {task[2]}".lower()
+        if all(term in text for term in terms):
+            found.append(task)
+    return sorted(found, key=lambda t: t[1])[:limit]
+
+
+def best_ms(fn):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    print(f"{'tareas':>7} {'construcción':>13} {'palabra':>8} {'prefijo':>8} {'2 palabras':>11} {'recorrido':>10}  (ms)")
+    for size in SIZES:
+        rng = random.Random(size)
+        tasks, vocabulary = synthetic(size, rng)
+        started = time.perf_counter()
+        index = TaskSearchIndex(tasks)
+        build_ms = (time.perf_counter() - started) * 1000
+        word, other = vocabulary[0], vocabulary[1]
+        word_ms = best_ms(lambda: index.search([word], prefix=False))
+        prefix_ms = best_ms(lambda: index.search([word[:3]]))
+        two_ms = best_ms(lambda: index.search([word, other[:3]], task_type="development"))
+        scan_ms = best_ms(lambda: scan(tasks, f"{word} {other[:3]}"))
+        print(f"{size:>7} {build_ms:>13.1f} {word_ms:>8.3f} {prefix_ms:>8.3f} {two_ms:>11.3f} {scan_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -231,6 +231,7 @@ const ProjectModal = ({ isOpen, onClose, project, onSave, isEditing, availableTa
         order_index: stage.order_index,
         project_tasks: stage.project_tasks ? stage.project_tasks.map(pt => ({
           id: pt.id,
+          persisted: true,
           task_id: pt.task ? pt.task.id : '',
           programmer_id: pt.programmer ? pt.programmer.id : '',
           status: pt.status || 'pending'
@@ -543,6 +544,20 @@ const ProjectModal = ({ isOpen, onClose, project, onSave, isEditing, availableTa
   );
 };
 
+// Recorre todas las páginas de un listado usando la paginación por cursor
+const fetchAllPages = async (url) => {
+  const items = [];
+  let cursor = '';
+  do {
+    const response = await fetch(`${url}?limit=500&cursor=${encodeURIComponent(cursor)}`);
+    if (!response.ok) throw new Error('Error al cargar datos iniciales');
+    const page = await response.json();
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor);
+  return items;
+};
+
 // COMPONENTE PRINCIPAL PROJECTS
 function Projects() {
   const [projects, setProjects] = useState([]);
@@ -564,20 +579,12 @@ function Projects() {
 
   const loadInitialData = async () => {
     try {
-      const [projectsRes, tasksRes, programmersRes] = await Promise.all([
-        fetch('/api/projects/'),
-        fetch('/api/tasks/'),
-        fetch('/api/programmers/')
+      const [projectsData, tasksData, programmersData] = await Promise.all([
+        fetchAllPages('/api/projects/'),
+        fetchAllPages('/api/tasks/'),
+        fetchAllPages('/api/programmers/')
       ]);
 
-      if (!projectsRes.ok || !tasksRes.ok || !programmersRes.ok) {
-        throw new Error('Error al cargar datos iniciales');
-      }
-
-      const projectsData = await projectsRes.json();
-      const tasksData = await tasksRes.json();
-      const programmersData = await programmersRes.json();
-
       setProjects(projectsData);
       setAvailableTasks(tasksData);
       setAvailableProgrammers(programmersData);
@@ -642,63 +649,47 @@ function Projects() {
   // Guardar proyecto (crear o actualizar)
   const handleSaveProject = async (projectData) => {
     try {
-      const method = isEditing ? 'PUT' : 'POST';
-      const url = isEditing ? `/api/projects/${editingProject.id}` : '/api/projects/';
-      
-      // 1. Guardar proyecto base
-      const projectResponse = await fetch(url, {
-        method: method,
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          name: projectData.name,
-          description: projectData.description,
-          start_date: projectData.start_date,
-          end_date: projectData.end_date,
-          responsible_id: null
-        })
-      });
-
-      if (!projectResponse.ok) throw new Error('Error al guardar proyecto');
-      const savedProject = await projectResponse.json();
-      const projectId = savedProject.id;
-
-      // 2. Manejar etapas
       if (!isEditing) {
-        // NUEVO: Crear etapas secuencialmente
-        for (let i = 0; i < projectData.stages.length; i++) {
-          const stage = projectData.stages[i];
-          const stageResponse = await fetch('/api/stages/', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-              project_id: projectId,
+        // NUEVO: proyecto, etapas y tareas en una sola petición transaccional
+        const response = await fetch('/api/projects/full', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({
+            name: projectData.name,
+            description: projectData.description,
+            start_date: projectData.start_date,
+            end_date: projectData.end_date,
+            responsible_id: null,
+            stages: projectData.stages.map((stage, i) => ({
               name: stage.name,
               description: stage.description,
-              order_index: i
-            })
-          });
-          if (!stageResponse.ok) throw new Error('Error al crear etapa');
-          
-          const savedStage = await stageResponse.json();
-          const stageId = savedStage.id;
-
-          // Crear tareas
-          for (const task of stage.project_tasks) {
-            if (task.task_id) {
-              await fetch('/api/project-tasks/', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                  stage_id: stageId,
+              order_index: i,
+              project_tasks: stage.project_tasks
+                .filter(task => task.task_id)
+                .map(task => ({
                   task_id: parseInt(task.task_id),
                   programmer_id: task.programmer_id ? parseInt(task.programmer_id) : null,
                   status: task.status || 'pending'
-                })
-              });
-            }
-          }
-        }
+                }))
+            }))
+          })
+        });
+        if (!response.ok) throw new Error('Error al guardar proyecto');
       } else {
+        // 1. Guardar proyecto base
+        const projectResponse = await fetch(`/api/projects/${editingProject.id}`, {
+          method: 'PUT',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({
+            name: projectData.name,
+            description: projectData.description,
+            start_date: projectData.start_date,
+            end_date: projectData.end_date,
+            responsible_id: null
+          })
+        });
+        if (!projectResponse.ok) throw new Error('Error al guardar proyecto');
+
         // EDITAR: Actualizar etapas existentes
         for (let i = 0; i < projectData.stages.length; i++) {
           const stage = projectData.stages[i];
@@ -715,29 +706,22 @@ function Projects() {
             })
           });
 
-          // Eliminar tareas antiguas
-          if (stage.project_tasks) {
-            const oldTasks = await fetch(`/api/project-tasks/?stage_id=${stageId}`).then(r => r.json());
-            for (const oldTask of oldTasks) {
-              await fetch(`/api/project-tasks/${oldTask.id}`, { method: 'DELETE' });
-            }
-          }
-
-          // Crear tareas nuevas
-          for (const task of stage.project_tasks) {
-            if (task.task_id) {
-              await fetch('/api/project-tasks/', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                  stage_id: stageId,
+          // Reemplazar la lista de tareas de la etapa en una sola petición atómica
+          const tasksResponse = await fetch(`/api/stages/${stageId}/tasks`, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(
+              stage.project_tasks
+                .filter(task => task.task_id)
+                .map(task => ({
+                  id: task.persisted ? task.id : null,
                   task_id: parseInt(task.task_id),
                   programmer_id: task.programmer_id ? parseInt(task.programmer_id) : null,
                   status: task.status || 'pending'
-                })
-              });
-            }
-          }
+                }))
+            )
+          });
+          if (!tasksResponse.ok) throw new Error('Error al guardar tareas de la etapa');
         }
       }
 